@@ -0,0 +1 @@
+"""Benchmarks et tests de charge du Dashboard sur données enregistrées (hors ligne)."""
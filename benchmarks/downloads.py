@@ -0,0 +1,103 @@
+"""Vérifie les téléchargements différés de la section Export, sans navigateur.
+
+    python -m benchmarks.downloads
+    python -m benchmarks.downloads --formats csv parquet
+
+La section est exécutée sur les données enregistrées, une fois par format
+d'export. Chaque fonction passée à st.download_button est appelée comme au
+clic, et son résultat passe par le convertisseur de Streamlit : un type
+refusé (fichier temporaire, générateur...) échoue ici plutôt que chez
+l'utilisateur. Les exports qui signalent une dépendance optionnelle absente
+(RuntimeError, PDF sans kaleido ni weasyprint) sont ignorés. Le code de
+sortie est 1 au premier échec.
+"""
+import argparse
+import os
+import sys
+
+# Environnement reproductible, comme benchmarks.run
+os.environ.pop('TRACKER_GATEWAY_URL', None)
+os.environ['TRACKER_SHARED_CACHE'] = '0'
+os.environ['TRACKER_UPSTREAM_RATE'] = '1000000'
+os.environ['TRACKER_UPSTREAM_BURST'] = '1000000'
+os.environ['TRACKER_DB'] = ':memory:'
+
+import streamlit  # noqa: E402
+from streamlit.errors import StreamlitAPIException  # noqa: E402
+from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from benchmarks.offline import DEFAULT_DIRECTORY, MANIFEST, MENUS, OfflineProvider  # noqa: E402
+from benchmarks.record import record_synthetic  # noqa: E402
+from tracker import export  # noqa: E402
+
+DASHBOARD = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Dashboard.py')
+
+
+class _Recorder:
+    """Remplace st.download_button : garde (libellé, données) puis affiche le bouton"""
+
+    def __init__(self):
+        self.buttons = []
+        self._original = streamlit.download_button
+
+    def __call__(self, label, data, *args, **kwargs):
+        self.buttons.append((label, data))
+        return self._original(label, data, *args, **kwargs)
+
+    def __enter__(self):
+        streamlit.download_button = self
+        return self
+
+    def __exit__(self, *exc):
+        streamlit.download_button = self._original
+
+
+def check(data):
+    """(taille en octets, None), ou (None, motif) si l'export est indisponible ; AssertionError si refusé"""
+    try:
+        payload = data() if callable(data) else data
+    except RuntimeError as error:
+        return None, f"ignoré : {error}"
+    unsupported = StreamlitAPIException(f"type non pris en charge : {type(payload).__name__}")
+    try:
+        content, _ = convert_data_to_bytes_and_infer_mime(payload, unsupported_error=unsupported)
+    except StreamlitAPIException as error:
+        raise AssertionError(str(error))
+    return len(content), None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Téléchargements différés de la section Export")
+    parser.add_argument('--data', default=DEFAULT_DIRECTORY, help="répertoire des données enregistrées")
+    parser.add_argument('--formats', nargs='*', default=export.available_formats(), help="formats d'export")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(os.path.join(args.data, MANIFEST)):
+        print(f"Pas de données dans {args.data} : génération des données synthétiques")
+        record_synthetic(args.data, len(MENUS))
+    OfflineProvider(args.data).install()
+
+    for fmt in args.formats:
+        app = AppTest.from_file(DASHBOARD, default_timeout=300)
+        app.session_state['menu'] = MENUS['export']
+        app.run()
+        select = next(box for box in app.selectbox if box.label == "Format d'export")
+        with _Recorder() as recorder:
+            select.set_value(fmt).run()
+        if app.exception:
+            print(f"ÉCHEC {fmt} : {app.exception[0].value}")
+            return 1
+        for label, data in recorder.buttons:
+            try:
+                size, note = check(data)
+            except Exception as error:
+                print(f"ÉCHEC {fmt} · {label} : {error}")
+                return 1
+            print(f"{fmt:<10}{label:<52}{note or f'{size} octets'}")
+    print("Tous les téléchargements passent le convertisseur de Streamlit")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,483 @@
+"""Test de charge : N sessions simultanées sur une instance du Dashboard.
+
+    python -m benchmarks.load                                   # paliers de 1, 5, 10 et 20 sessions
+    python -m benchmarks.load --sessions 50 --latency 0.3 --auto-share 0.5 --output charge.json
+
+Pour chaque palier, une instance `streamlit run` est lancée sur le
+fournisseur hors ligne (benchmarks.offline, avec --latency secondes de
+latence amont simulée) ; chaque session est un client websocket qui parle le
+protocole de Streamlit comme le navigateur. Les sessions suivent un mélange
+réaliste : section tirée selon MENU_MIX, symbole selon une popularité
+décroissante, nouvelle action après un temps de réflexion exponentiel, et
+une part --auto-share de sessions en actualisation automatique (le serveur
+relance alors le script lui-même, attente comprise).
+
+Rapport par palier : débit (exécutions/s), latence d'exécution p50/p95/p99
+(du début du script au dernier rendu), temps de réponse aux actions,
+mémoire (RSS) du serveur par session, threads, et amplification amont
+(appels au fournisseur par exécution et par symbole distinct demandé), lue
+sur l'endpoint Prometheus de l'instance.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from urllib.parse import urlencode
+
+import numpy as np
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from websockets.sync.client import connect
+
+from benchmarks.offline import DEFAULT_DIRECTORY, MANIFEST, MENUS, OfflineProvider, read_manifest
+from benchmarks.record import record_synthetic
+from tracker.storage import storage
+from tracker.universe import DEFAULT_WATCHLIST
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'load_app.py')
+
+# Part de chaque section dans les sessions (et dans la navigation)
+MENU_MIX = (
+    ('tableau_de_bord', 0.40),
+    ('portefeuille', 0.15),
+    ('alertes', 0.10),
+    ('indices', 0.10),
+    ('export', 0.10),
+    ('predictions_ml', 0.10),
+    ('notifications', 0.05),
+)
+# (période, intervalle, part)
+PERIOD_MIX = (
+    ('1mo', '1d', 0.35),
+    ('6mo', '1d', 0.20),
+    ('1y', '1d', 0.10),
+    ('5d', '15m', 0.20),
+    ('1d', '5m', 0.15),
+)
+# Symboles tirés parmi les SYMBOL_POOL premiers de l'univers enregistré
+SYMBOL_POOL = 200
+# Action d'une session interactive : changer de section, de symbole, sinon simple réexécution
+NAVIGATE_SECTION = 0.5
+NAVIGATE_SYMBOL = 0.3
+SIZES = (1, 5, 10, 20)
+STARTUP_TIMEOUT = 60
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+# --- Côté serveur (exécuté par load_app.py) ---
+
+def install_provider():
+    """Installe une fois par processus le fournisseur hors ligne (TRACKER_LOAD_DATA, TRACKER_LOAD_LATENCY)"""
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = OfflineProvider(
+                os.environ.get('TRACKER_LOAD_DATA', DEFAULT_DIRECTORY),
+                latency=float(os.environ.get('TRACKER_LOAD_LATENCY', 0)),
+            ).install()
+    return _provider
+
+
+def apply_profile(state, params):
+    """Prépare la session d'après le profil de l'URL (seulement quand l'URL change).
+
+    Watchlist et portefeuille sont écrits dans le stockage, sous l'utilisateur
+    de la session (paramètre user), comme le ferait l'utilisateur lui-même.
+    """
+    query = urlencode(sorted(params.items()))
+    user = params.get('user')
+    if not user or state.get('load_query') == query:
+        return
+    state['load_query'] = query
+    if params.get('menu') in MENUS:
+        state['menu'] = MENUS[params['menu']]
+    symbol = params.get('symbol')
+    if symbol:
+        watchlist = storage.watchlist(user) or list(DEFAULT_WATCHLIST)
+        storage.set_watchlist(user, [symbol] + [s for s in watchlist if s != symbol])
+    for key in ('period', 'interval'):
+        if params.get(key):
+            state[key] = params[key]
+    if int(params.get('refresh', 0)) and 'auto_refresh' not in state:
+        state['auto_refresh'] = True
+        state['refresh_rate'] = int(params['refresh'])
+    if params.get('portfolio') and not storage.portfolio(user):
+        for s in params['portfolio'].split(','):
+            storage.add_position(user, s, {'shares': 100, 'buy_price': 10.0, 'date': '2026-01-02 09:30:00 (UTC+1)'})
+
+
+# --- Côté client ---
+
+class LoadError(RuntimeError):
+    """L'instance n'a pas démarré ou a cessé de répondre"""
+
+
+def _free_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def _proc_status(pid):
+    """VmRSS (Mo) et nombre de threads d'un processus (Linux), ou (None, None)"""
+    try:
+        with open(f"/proc/{pid}/status", encoding='ascii') as source:
+            fields = dict(line.split(':', 1) for line in source if ':' in line)
+    except OSError:
+        return None, None
+    return int(fields['VmRSS'].split()[0]) / 1024, int(fields['Threads'])
+
+
+def _scrape(url):
+    """Valeurs d'une exposition Prometheus : {'nom{étiquettes}': valeur}"""
+    with urllib.request.urlopen(url, timeout=10) as response:
+        text = response.read().decode('utf-8')
+    values = {}
+    for line in text.splitlines():
+        if line and not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            values[name] = float(value)
+    return values
+
+
+class Server:
+    """Instance `streamlit run benchmarks/load_app.py` dans un sous-processus"""
+
+    def __init__(self, data, latency):
+        self.data = data
+        self.latency = latency
+        self.port = _free_port()
+        self.metrics_port = _free_port()
+        self.process = None
+        self._cache_directory = None
+        self._log = None
+
+    @property
+    def url(self):
+        return f"ws://127.0.0.1:{self.port}/_stcore/stream"
+
+    def start(self):
+        # Cache partagé propre à l'instance : chaque palier part à froid
+        self._cache_directory = tempfile.mkdtemp(prefix='tracker-load-')
+        env = dict(
+            os.environ,
+            TRACKER_LOAD_DATA=self.data,
+            TRACKER_LOAD_LATENCY=str(self.latency),
+            TRACKER_METRICS_PORT=str(self.metrics_port),
+            TRACKER_SHARED_CACHE_DIR=self._cache_directory,
+            TRACKER_DB=os.path.join(self._cache_directory, 'tracker.db'),
+        )
+        env.pop('TRACKER_GATEWAY_URL', None)
+        env.pop('TRACKER_ADMIN_TOKEN', None)
+        self._log = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'streamlit', 'run', APP,
+             '--server.port', str(self.port), '--server.address', '127.0.0.1',
+             '--server.headless', 'true', '--server.fileWatcherType', 'none',
+             '--browser.gatherUsageStats', 'false'],
+            env=env, stdout=self._log, stderr=subprocess.STDOUT,
+        )
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise LoadError(f"L'instance s'est arrêtée au démarrage :\n{self.output()}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{self.port}/_stcore/health", timeout=2):
+                    return self
+            except OSError:
+                time.sleep(0.2)
+        self.stop()
+        raise LoadError(f"L'instance n'a pas répondu en {STARTUP_TIMEOUT} s")
+
+    def output(self):
+        self._log.seek(0)
+        return self._log.read().decode('utf-8', 'replace')[-4000:]
+
+    def status(self):
+        return _proc_status(self.process.pid)
+
+    def metrics(self):
+        return _scrape(f"http://127.0.0.1:{self.metrics_port}/metrics")
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        if self._cache_directory:
+            shutil.rmtree(self._cache_directory, ignore_errors=True)
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def _pick(rng, mix):
+    return rng.choices([entry[:-1] for entry in mix], weights=[entry[-1] for entry in mix])[0]
+
+
+class Recorder:
+    """Mesures des sessions d'un palier (partagé entre les threads clients)"""
+
+    def __init__(self):
+        self.latencies = []
+        self.responses = []
+        self.auto_runs = 0
+        self.errors = 0
+        self.failures = []
+        self.symbols = set()
+        self._lock = threading.Lock()
+
+    def run(self, latency, response, errors, auto):
+        with self._lock:
+            self.latencies.append(latency)
+            if response is not None:
+                self.responses.append(response)
+            self.auto_runs += auto
+            self.errors += errors
+
+    def failure(self, error):
+        with self._lock:
+            self.failures.append(f"{type(error).__name__}: {error}")
+
+    def requested(self, symbols):
+        with self._lock:
+            self.symbols.update(symbols)
+
+
+class Session(threading.Thread):
+    """Un client : ouvre la page, puis agit après un temps de réflexion (ou laisse l'actualisation tourner)"""
+
+    def __init__(self, url, symbols, recorder, rng, think, stop_at, refresh=0, positions=0, max_runs=None):
+        super().__init__(daemon=True)
+        self.url = url
+        self.symbols = symbols
+        self.recorder = recorder
+        self.rng = rng
+        self.think = think
+        self.stop_at = stop_at
+        self.max_runs = max_runs
+        self.runs = 0
+        period, interval = _pick(rng, PERIOD_MIX)
+        menu, = _pick(rng, MENU_MIX)
+        self.profile = {'user': f"load-{rng.getrandbits(64):016x}", 'menu': menu,
+                        'symbol': self._pick_symbol(), 'period': period, 'interval': interval}
+        if menu == 'predictions_ml':
+            self.profile['period'], self.profile['interval'] = '1y', '1d'
+        if refresh:
+            self.profile['refresh'] = refresh
+        if positions and menu == 'portefeuille':
+            self.profile['portfolio'] = ','.join(rng.sample(symbols, min(positions, len(symbols))))
+        self._sent = None
+
+    def _pick_symbol(self):
+        # Popularité décroissante (loi de Zipf) : la watchlist initiale d'abord
+        return self.rng.choices(self.symbols, weights=[1 / (rank + 1) for rank in range(len(self.symbols))])[0]
+
+    def _rerun(self, ws):
+        portfolio = self.profile.get('portfolio')
+        self.recorder.requested([self.profile['symbol']] + (portfolio.split(',') if portfolio else []))
+        message = BackMsg()
+        message.rerun_script.query_string = urlencode(self.profile)
+        self._sent = time.monotonic()
+        ws.send(message.SerializeToString())
+
+    def _navigate(self):
+        roll = self.rng.random()
+        if roll < NAVIGATE_SECTION:
+            self.profile['menu'], = _pick(self.rng, MENU_MIX)
+        elif roll < NAVIGATE_SECTION + NAVIGATE_SYMBOL:
+            self.profile['symbol'] = self._pick_symbol()
+
+    def run(self):
+        try:
+            with connect(self.url, subprotocols=['streamlit'], max_size=None, open_timeout=30) as ws:
+                self._loop(ws)
+        except Exception as error:  # noqa: BLE001 — compté comme échec de session
+            self.recorder.failure(error)
+
+    def _loop(self, ws):
+        self._rerun(ws)
+        current = None
+        while self.max_runs is None or self.runs < self.max_runs:
+            remaining = self.stop_at - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                data = ws.recv(timeout=remaining)
+            except TimeoutError:
+                return
+            message = ForwardMsg()
+            message.ParseFromString(data)
+            kind = message.WhichOneof('type')
+            now = time.monotonic()
+            if kind == 'new_session':
+                current = {'started': now, 'last': now, 'errors': 0}
+            elif kind == 'delta' and current is not None:
+                current['last'] = now
+                element = message.delta.new_element if message.delta.WhichOneof('type') == 'new_element' else None
+                if element is not None and element.WhichOneof('type') == 'exception':
+                    current['errors'] += 1
+            elif kind == 'script_finished' and current is not None:
+                finished = message.script_finished == ForwardMsg.FINISHED_SUCCESSFULLY
+                # Exécution relancée (actualisation automatique) : fin au dernier rendu, avant l'attente
+                end = now if finished else current['last']
+                response = end - self._sent if self._sent is not None else None
+                self.recorder.run(end - current['started'], response, current['errors'], auto=self._sent is None)
+                self._sent = None
+                current = None
+                self.runs += 1
+                if not self.profile.get('refresh') and (self.max_runs is None or self.runs < self.max_runs):
+                    time.sleep(min(self.rng.expovariate(1 / self.think), max(0.0, self.stop_at - time.monotonic())))
+                    if time.monotonic() >= self.stop_at:
+                        return
+                    self._navigate()
+                    self._rerun(ws)
+
+
+def _percentiles(values):
+    if not values:
+        return {'p50': None, 'p95': None, 'p99': None}
+    p50, p95, p99 = np.percentile(np.asarray(values) * 1000, [50, 95, 99])
+    return {'p50': round(float(p50), 1), 'p95': round(float(p95), 1), 'p99': round(float(p99), 1)}
+
+
+def _metric(values, name, span='rerun'):
+    return values.get(f'{name}{{span="{span}"}}', 0.0)
+
+
+def run_level(args, symbols, sessions, seed):
+    """Un palier : instance neuve, échauffement, puis `sessions` clients pendant --duration secondes"""
+    rng = random.Random(seed)
+    with Server(args.data, args.latency) as server:
+        # Échauffement (imports, premier rendu) hors mesures
+        warmup = Recorder()
+        Session(server.url, symbols, warmup, random.Random(seed), args.think,
+                time.monotonic() + STARTUP_TIMEOUT, max_runs=1).run()
+        if warmup.failures or not warmup.latencies:
+            raise LoadError(f"Échec de l'échauffement : {warmup.failures}\n{server.output()}")
+        baseline_rss, _ = server.status()
+        before = server.metrics()
+
+        recorder = Recorder()
+        started = time.monotonic()
+        stop_at = started + args.ramp + args.duration
+        clients = []
+        for i in range(sessions):
+            refresh = args.refresh if rng.random() < args.auto_share else 0
+            clients.append(Session(server.url, symbols, recorder, random.Random(rng.random()), args.think,
+                                   stop_at, refresh=refresh, positions=args.positions))
+        peak_rss, peak_threads = baseline_rss, 0
+        for i, client in enumerate(clients):
+            # Arrivées étalées sur --ramp secondes
+            time.sleep(max(0.0, started + args.ramp * i / max(sessions, 1) - time.monotonic()))
+            client.start()
+        while any(client.is_alive() for client in clients):
+            rss, threads = server.status()
+            if rss is not None:
+                peak_rss, peak_threads = max(peak_rss, rss), max(peak_threads, threads)
+            time.sleep(0.5)
+        elapsed = time.monotonic() - started
+        after = server.metrics()
+        if server.process.poll() is not None:
+            raise LoadError(f"L'instance s'est arrêtée pendant le palier :\n{server.output()}")
+
+    delta = {name: after.get(name, 0.0) - before.get(name, 0.0) for name in after}
+    upstream = _metric(delta, 'tracker_span_upstream_calls_total')
+    hits, misses = _metric(delta, 'tracker_span_cache_hits_total'), _metric(delta, 'tracker_span_cache_misses_total')
+    runs = len(recorder.latencies)
+    return {
+        'sessions': sessions,
+        'auto_refresh_sessions': sum(1 for client in clients if client.profile.get('refresh')),
+        'seconds': round(elapsed, 1),
+        'runs': runs,
+        'auto_runs': recorder.auto_runs,
+        'throughput_rps': round(runs / elapsed, 2),
+        'latency_ms': _percentiles(recorder.latencies),
+        'response_ms': _percentiles(recorder.responses),
+        'script_errors': recorder.errors,
+        'failed_sessions': recorder.failures,
+        'rss_baseline_mb': round(baseline_rss, 1) if baseline_rss is not None else None,
+        'rss_peak_mb': round(peak_rss, 1) if peak_rss is not None else None,
+        'mb_per_session': round((peak_rss - baseline_rss) / sessions, 2) if baseline_rss is not None else None,
+        'threads_peak': peak_threads,
+        'upstream_calls': int(upstream),
+        'upstream_per_run': round(upstream / runs, 2) if runs else None,
+        'distinct_symbols': len(recorder.symbols),
+        'upstream_per_symbol': round(upstream / len(recorder.symbols), 2) if recorder.symbols else None,
+        'cache_hit_ratio': round(hits / (hits + misses), 3) if hits + misses else None,
+        'server_rerun_ms': {
+            q: round(after.get(f'tracker_span_seconds{{span="rerun",quantile="{v}"}}', 0.0) * 1000, 1)
+            for q, v in (('p50', '0.5'), ('p95', '0.95'), ('p99', '0.99'))
+        },
+    }
+
+
+def _print_table(levels):
+    print(f"{'sessions':>8}{'exéc.':>7}{'exéc./s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'réponse p95':>13}{'Mo/session':>12}{'threads':>9}{'amont/exéc.':>13}{'amont/symb.':>13}{'erreurs':>9}")
+    for r in levels:
+        latency = r['latency_ms']
+        print(f"{r['sessions']:>8}{r['runs']:>7}{r['throughput_rps']:>9.2f}"
+              f"{latency['p50'] or 0:>9.0f}{latency['p95'] or 0:>9.0f}{latency['p99'] or 0:>9.0f}"
+              f"{r['response_ms']['p95'] or 0:>13.0f}{r['mb_per_session'] or 0:>12.2f}{r['threads_peak']:>9}"
+              f"{r['upstream_per_run'] or 0:>13.2f}{r['upstream_per_symbol'] or 0:>13.2f}"
+              f"{r['script_errors'] + len(r['failed_sessions']):>9}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Test de charge du Dashboard (sessions simultanées)")
+    parser.add_argument('--sessions', type=int, nargs='+', default=list(SIZES), help="paliers de sessions simultanées")
+    parser.add_argument('--duration', type=float, default=60, help="durée de chaque palier (secondes)")
+    parser.add_argument('--ramp', type=float, default=10, help="étalement des arrivées (secondes)")
+    parser.add_argument('--think', type=float, default=5, help="temps de réflexion moyen entre deux actions (secondes)")
+    parser.add_argument('--auto-share', type=float, default=0.3, help="part des sessions en actualisation automatique")
+    parser.add_argument('--refresh', type=int, default=5, help="fréquence d'actualisation automatique (secondes)")
+    parser.add_argument('--positions', type=int, default=10, help="positions des sessions Portefeuille")
+    parser.add_argument('--latency', type=float, default=0.2, help="latence amont simulée (secondes)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data', default=DEFAULT_DIRECTORY, help="répertoire des données enregistrées")
+    parser.add_argument('--output', help="fichier JSON des résultats")
+    args = parser.parse_args(argv)
+
+    args.data = os.path.abspath(args.data)
+    if not os.path.exists(os.path.join(args.data, MANIFEST)):
+        print(f"Pas de données dans {args.data} : génération des données synthétiques")
+        record_synthetic(args.data, SYMBOL_POOL)
+    symbols = read_manifest(args.data)['symbols'][:SYMBOL_POOL]
+
+    levels = []
+    for sessions in args.sessions:
+        print(f"… {sessions} session(s)", file=sys.stderr)
+        levels.append(run_level(args, symbols, sessions, args.seed + sessions))
+    _print_table(levels)
+    for level in levels:
+        for failure in level['failed_sessions'][:3]:
+            print(f"Session en échec ({level['sessions']}) : {failure}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as sink:
+            json.dump({'parameters': {k: v for k, v in vars(args).items() if k != 'output'}, 'levels': levels},
+                      sink, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
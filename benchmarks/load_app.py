@@ -0,0 +1,21 @@
+"""Dashboard.py servi sur le fournisseur hors ligne, pour le test de charge.
+
+Lancé par benchmarks.load (streamlit run benchmarks/load_app.py). Le profil
+de chaque session (section, symbole, période, actualisation, portefeuille)
+est passé dans l'URL et appliqué avant le script à chaque changement d'URL.
+"""
+import os
+import runpy
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import streamlit as st  # noqa: E402
+
+from benchmarks import load  # noqa: E402
+
+load.install_provider()
+load.apply_profile(st.session_state, st.query_params.to_dict())
+runpy.run_path(os.path.join(ROOT, 'Dashboard.py'), run_name='__main__')
@@ -0,0 +1,227 @@
+"""Fournisseur hors ligne : rejoue des barres enregistrées à la place de Yahoo.
+
+Seules les fonctions brutes de tracker.upstream (_history, _info, _quotes)
+sont remplacées : les appels passent toujours par l'intermédiaire `yahoo`
+(limitation, disjoncteur, compteurs), seul le réseau disparaît. Les
+horodatages sont décalés d'un nombre entier de semaines pour que la dernière
+barre enregistrée tombe juste avant maintenant (jours et heures de séance
+conservés), ce qui rend les résultats indépendants de la date d'exécution.
+
+Format du répertoire : manifest.json + <intervalle>/<symbole>.arrow
+"""
+import json
+import os
+import threading
+import time
+from collections import Counter
+from urllib.parse import quote
+
+import pandas as pd
+import pyarrow as pa
+
+from tracker import upstream
+from tracker.resampling import can_derive, parse_interval, period_start, resample_bars
+from tracker.sessions import market_for
+from tracker.shared_cache import from_arrow, to_arrow
+
+MANIFEST = 'manifest.json'
+DEFAULT_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+# Sections du menu du Dashboard (libellés exacts)
+MENUS = {
+    'tableau_de_bord': "📈 Tableau de bord",
+    'portefeuille': "💰 Portefeuille virtuel",
+    'alertes': "🔔 Alertes de prix",
+    'notifications': "📧 Notifications email",
+    'export': "📤 Export des données",
+    'predictions_ml': "🤖 Prédictions ML",
+    'indices': "🏢 Indices Chine",
+}
+
+
+def _path(directory, symbol, interval):
+    return os.path.join(directory, interval, f"{quote(symbol, safe='')}.arrow")
+
+
+def save_frame(directory, symbol, interval, bars):
+    """Enregistre des barres (index UTC) pour (symbole, intervalle)"""
+    path = _path(directory, symbol, interval)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    table = to_arrow(bars, {'symbol': symbol, 'interval': interval})
+    with pa.OSFile(path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def load_frame(directory, symbol, interval):
+    """Barres enregistrées, ou None"""
+    try:
+        table = pa.ipc.open_file(pa.memory_map(_path(directory, symbol, interval), 'r')).read_all()
+    except FileNotFoundError:
+        return None
+    return from_arrow(table)[0]
+
+
+def read_manifest(directory):
+    with open(os.path.join(directory, MANIFEST), encoding='utf-8') as source:
+        return json.load(source)
+
+
+def write_manifest(directory, manifest):
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, MANIFEST), 'w', encoding='utf-8') as sink:
+        json.dump(manifest, sink, indent=2)
+
+
+def _minutes(interval):
+    kind, minutes = parse_interval(interval)
+    return minutes if kind == 'minutes' else {'day': 1440, 'week': 10080, 'month': 43200}.get(kind, 1440)
+
+
+class OfflineProvider:
+    """Rejoue un répertoire enregistré ; `latency` simule le temps de réponse amont"""
+
+    def __init__(self, directory=DEFAULT_DIRECTORY, latency=0.0):
+        self.directory = directory
+        manifest = read_manifest(directory)
+        self.symbols = manifest['symbols']
+        self.intervals = manifest['intervals']
+        self.names = manifest.get('names', {})
+        self.latency = latency
+        self.calls = Counter()
+        self._frames = {}
+        self._lock = threading.Lock()
+        self._originals = None
+
+    def _shifted(self, symbol, bars):
+        """Décale d'un nombre entier de semaines (en heure locale de la place) pour finir avant maintenant"""
+        if bars.empty:
+            return bars
+        weeks = (pd.Timestamp.now(tz='UTC') - bars.index[-1]) // pd.Timedelta(weeks=1)
+        zone = market_for(symbol).timezone
+        local = bars.index.tz_convert(zone).tz_localize(None) + pd.Timedelta(weeks=int(weeks))
+        index = local.tz_localize(zone, ambiguous=False, nonexistent='shift_forward').tz_convert('UTC')
+        return bars.set_axis(index.rename(bars.index.name))
+
+    def _frame(self, symbol, interval):
+        key = (symbol, interval)
+        with self._lock:
+            if key in self._frames:
+                return self._frames[key]
+        bars = load_frame(self.directory, symbol, interval)
+        if bars is None:
+            # Intervalle non enregistré : agrégé depuis le plus grossier qui le permet
+            bases = sorted((i for i in self.intervals if i != interval and can_derive(i, interval)),
+                           key=_minutes, reverse=True)
+            for base in bases:
+                recorded = load_frame(self.directory, symbol, base)
+                if recorded is not None:
+                    bars = resample_bars(recorded, interval, market_for(symbol))
+                    break
+        if bars is not None:
+            bars = self._shifted(symbol, bars)
+        with self._lock:
+            self._frames[key] = bars
+        return bars
+
+    def preload(self):
+        """Charge toutes les barres enregistrées (hors mesures)"""
+        for symbol in self.symbols:
+            for interval in self.intervals:
+                self._frame(symbol, interval)
+
+    def _call(self, kind):
+        with self._lock:
+            self.calls[kind] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def history(self, symbol, interval, period, start, end):
+        """Même contrat que tracker.upstream._history"""
+        self._call('history')
+        return self._window(symbol, interval, period, start, end)
+
+    def histories(self, symbols, interval, period):
+        """Même contrat que tracker.upstream._histories (un seul appel amont)"""
+        self._call('history')
+        histories = {}
+        for symbol in symbols:
+            bars = self._window(symbol, interval, period, None, None)
+            if not bars.empty:
+                histories[symbol] = bars
+        if not histories:
+            raise RuntimeError(f"Aucun historique reçu pour {len(symbols)} symbole(s)")
+        return histories
+
+    def _window(self, symbol, interval, period, start, end):
+        bars = self._frame(symbol, interval)
+        if bars is None:
+            return pd.DataFrame()  # comme yfinance pour un symbole inconnu
+        now = pd.Timestamp.now(tz='UTC')
+        if period is not None:
+            start, end = period_start(period, now), None
+        if start is not None:
+            bars = bars[bars.index >= pd.Timestamp(start)]
+        if end is not None:
+            bars = bars[bars.index < pd.Timestamp(end)]
+        return bars.copy()
+
+    def info(self, symbol):
+        self._call('info')
+        if self._frame(symbol, '1d') is None:
+            return {}
+        return {'longName': self.names.get(symbol, symbol), 'symbol': symbol}
+
+    def quotes(self, symbols):
+        """Même contrat que tracker.upstream._quotes"""
+        self._call('quotes')
+        quotes = {}
+        for symbol in symbols:
+            daily = self._frame(symbol, '1d')
+            if daily is None or daily.empty:
+                continue
+            closes = daily['Close']
+            quotes[symbol] = {
+                'price': float(closes.iloc[-1]),
+                'previous_close': float(closes.iloc[-2]) if len(closes) > 1 else float(closes.iloc[-1]),
+                'time': daily.index[-1].timestamp(),
+            }
+        if not quotes:
+            raise RuntimeError(f"Aucune cotation reçue pour {len(symbols)} symbole(s)")
+        return quotes
+
+    def install(self):
+        """Remplace l'accès réseau de tracker.upstream par ce fournisseur"""
+        if self._originals is None:
+            self._originals = (upstream._history, upstream._histories, upstream._info, upstream._quotes)
+            upstream._history, upstream._histories, upstream._info, upstream._quotes = (
+                self.history, self.histories, self.info, self.quotes)
+        return self
+
+    def uninstall(self):
+        if self._originals is not None:
+            upstream._history, upstream._histories, upstream._info, upstream._quotes = self._originals
+            self._originals = None
+
+    def __enter__(self):
+        return self.install()
+
+    def __exit__(self, *exc):
+        self.uninstall()
+
+
+def reset_caches():
+    """Vide tous les caches du processus (exécution « à froid »)"""
+    import streamlit as st
+
+    from tracker import metrics
+    from tracker.bars import store
+    from tracker.cache import frame_cache
+    from tracker.quotes import quote_book
+    from tracker.storage import storage
+
+    store.clear()
+    frame_cache.clear()
+    quote_book.clear()
+    storage.invalidate()
+    metrics.registry.clear()
+    st.cache_data.clear()
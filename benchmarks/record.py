@@ -0,0 +1,137 @@
+"""Enregistre les données rejouées par les benchmarks et les tests de charge.
+
+    python -m benchmarks.record --synthetic                 # déterministe, sans réseau
+    python -m benchmarks.record 600519.SS 0700.HK BABA      # capture Yahoo Finance
+
+Données synthétiques : marche aléatoire dont la graine dépend du symbole,
+sur les vraies séances de chaque place, jusqu'à une date fixe. L'univers
+contient la watchlist initiale, les indices, puis des symboles de
+remplissage jusqu'à --symbols.
+"""
+import argparse
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.offline import DEFAULT_DIRECTORY, save_frame, write_manifest
+from tracker import upstream
+from tracker.sessions import market_for
+from tracker.universe import CHINESE_INDICES, DEFAULT_WATCHLIST
+
+# Dernier jour enregistré des données synthétiques (un vendredi)
+SYNTHETIC_END = '2026-01-02'
+DAILY_YEARS = 2
+# (intervalle, nombre de jours) enregistrés pour les symboles principaux
+INTRADAY = (('5m', 60), ('1m', 7))
+# Captures Yahoo : (intervalle, période) dans les limites de l'API
+YAHOO_INTERVALS = (('1d', '2y'), ('5m', '60d'), ('1m', '7d'))
+
+
+def synthetic_universe(count):
+    """Watchlist initiale, indices, puis symboles de remplissage (toutes places)"""
+    core = list(dict.fromkeys(DEFAULT_WATCHLIST + list(CHINESE_INDICES)))
+    symbols = list(core)
+    i = 0
+    while len(symbols) < count:
+        kind = i % 10
+        if kind < 4:
+            candidate = f"{601000 + i}.SS"
+        elif kind < 7:
+            candidate = f"{2000 + i:06d}.SZ"
+        elif kind < 9:
+            candidate = f"{1000 + i:04d}.HK"
+        else:
+            candidate = f"SYN{i:04d}"
+        if candidate not in symbols:
+            symbols.append(candidate)
+        i += 1
+    return symbols[:max(count, len(core))], core
+
+
+def _walk(symbol, n, salt):
+    rng = np.random.default_rng(zlib.crc32(f"{symbol}/{salt}".encode()))
+    start = 5 + 195 * rng.random()
+    close = start * np.exp(np.cumsum(rng.normal(0.0002, 0.015 if salt == '1d' else 0.002, n)))
+    spread = np.abs(rng.normal(0, 0.006, n))
+    open_ = close * (1 + rng.normal(0, 0.004, n))
+    high = np.maximum(open_, close) * (1 + spread)
+    low = np.minimum(open_, close) * (1 - spread)
+    volume = rng.integers(10_000, 5_000_000, n).astype(np.int64)
+    return open_, high, low, close, volume
+
+
+def synthetic_bars(symbol, interval, days):
+    """Barres déterministes de `symbol` sur les `days` derniers jours calendaires"""
+    market = market_for(symbol)
+    end = pd.Timestamp(SYNTHETIC_END)
+    dates = pd.bdate_range(end - pd.Timedelta(days=days), end)
+    if interval == '1d':
+        index = dates.tz_localize(market.timezone)
+    else:
+        step = {'1m': 1, '5m': 5}[interval]
+        offsets = np.concatenate([np.arange(start, stop, step) for start, stop in market.sessions])
+        local = (dates.values[:, None] + offsets[None, :].astype('timedelta64[m]')).ravel()
+        index = pd.DatetimeIndex(local).tz_localize(market.timezone)
+    index = index.tz_convert('UTC').rename('Date' if interval == '1d' else 'Datetime')
+    open_, high, low, close, volume = _walk(symbol, len(index), interval)
+    return pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume}, index=index)
+
+
+def record_synthetic(directory, count):
+    symbols, core = synthetic_universe(count)
+    for symbol in symbols:
+        save_frame(directory, symbol, '1d', synthetic_bars(symbol, '1d', 365 * DAILY_YEARS))
+    for symbol in core:
+        for interval, days in INTRADAY:
+            save_frame(directory, symbol, interval, synthetic_bars(symbol, interval, days))
+    write_manifest(directory, {
+        'source': 'synthetic',
+        'recorded_until': SYNTHETIC_END,
+        'symbols': symbols,
+        'core': core,
+        'intervals': ['1d'] + [interval for interval, _ in INTRADAY],
+        'names': dict(CHINESE_INDICES),
+    })
+    return symbols
+
+
+def record_yahoo(directory, symbols):
+    recorded = []
+    for symbol in symbols:
+        for interval, period in YAHOO_INTERVALS:
+            bars = upstream.fetch_history(symbol, interval, period=period)
+            if bars is not None and not bars.empty:
+                save_frame(directory, symbol, interval, bars[['Open', 'High', 'Low', 'Close', 'Volume']])
+        recorded.append(symbol)
+        print(f"  {symbol} enregistré")
+    write_manifest(directory, {
+        'source': 'yahoo',
+        'recorded_until': pd.Timestamp.now(tz='UTC').isoformat(),
+        'symbols': recorded,
+        'core': recorded,
+        'intervals': [interval for interval, _ in YAHOO_INTERVALS],
+        'names': dict(CHINESE_INDICES),
+    })
+    return recorded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Enregistre les données des benchmarks")
+    parser.add_argument('symbols', nargs='*', help="symboles à capturer sur Yahoo (défaut : watchlist et indices)")
+    parser.add_argument('--synthetic', action='store_true', help="données synthétiques déterministes")
+    parser.add_argument('--symbols-count', dest='count', type=int, default=1000,
+                        help="taille de l'univers synthétique")
+    parser.add_argument('--output', default=DEFAULT_DIRECTORY)
+    args = parser.parse_args(argv)
+
+    if args.synthetic:
+        symbols = record_synthetic(args.output, args.count)
+    else:
+        symbols = record_yahoo(args.output, [s.upper() for s in args.symbols]
+                               or list(dict.fromkeys(DEFAULT_WATCHLIST + list(CHINESE_INDICES))))
+    print(f"{len(symbols)} symboles enregistrés dans {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,257 @@
+"""Benchmarks du Dashboard, exécuté sans navigateur sur données enregistrées.
+
+    python -m benchmarks.run                        # compare à benchmarks/baseline.json
+    python -m benchmarks.run --update-baseline      # enregistre la référence
+    python -m benchmarks.run --threshold 0.3 --sizes 10 100 --only watchlist
+
+Scénarios : chacune des sept sections du menu, le pied de page (watchlist
+de 10, 100 et 1000 symboles) et le portefeuille (10, 100 et 1000 positions).
+La première exécution du processus (imports compris) est mesurée à part
+(startup/first_run). Chaque scénario est exécuté à froid (caches vidés,
+nouvelle session) puis à chaud (nouvelle exécution de la même session) ; on
+mesure la latence puis, dans une seconde passe sous tracemalloc, le pic de
+mémoire. Le code de sortie est 1 si un scénario dépasse la référence de plus
+de --threshold.
+
+La latence retenue est la meilleure de --repeat exécutions ; la référence
+n'a de sens que sur la machine (et la charge) où elle a été enregistrée.
+"""
+import os
+
+# Environnement reproductible : pas de passerelle ni de cache partagé,
+# pas de limitation de débit vers le fournisseur hors ligne
+os.environ.pop('TRACKER_GATEWAY_URL', None)
+os.environ.pop('TRACKER_METRICS_PORT', None)
+os.environ.pop('TRACKER_ADMIN_TOKEN', None)
+os.environ['TRACKER_SHARED_CACHE'] = '0'
+os.environ['TRACKER_UPSTREAM_RATE'] = '1000000'
+os.environ['TRACKER_UPSTREAM_BURST'] = '1000000'
+os.environ['TRACKER_DB'] = ':memory:'
+
+import argparse  # noqa: E402
+import json  # noqa: E402
+import platform  # noqa: E402
+import statistics  # noqa: E402
+import sys  # noqa: E402
+import time  # noqa: E402
+import tracemalloc  # noqa: E402
+from datetime import datetime  # noqa: E402
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from benchmarks.offline import DEFAULT_DIRECTORY, MANIFEST, MENUS, OfflineProvider, reset_caches  # noqa: E402
+from benchmarks.record import record_synthetic  # noqa: E402
+from tracker import metrics  # noqa: E402
+from tracker.storage import storage  # noqa: E402
+from tracker.universe import DEFAULT_WATCHLIST  # noqa: E402
+
+# Utilisateur des scénarios (sa watchlist et son portefeuille vivent dans le stockage)
+USER = 'benchmark'
+
+DASHBOARD = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Dashboard.py')
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+SIZES = (10, 100, 1000)
+# Écarts absolus ignorés (bruit de mesure)
+MIN_DELTA_MS = 5.0
+MIN_DELTA_MB = 1.0
+METRICS = (('cold_ms', MIN_DELTA_MS), ('warm_ms', MIN_DELTA_MS),
+           ('cold_peak_mb', MIN_DELTA_MB), ('warm_peak_mb', MIN_DELTA_MB))
+
+
+class BenchmarkError(RuntimeError):
+    """Le script a levé une exception pendant un scénario"""
+
+
+def scenarios(symbols, sizes):
+    """{nom: état de session initial}"""
+    defined = {}
+    for slug, menu in MENUS.items():
+        defined[f"section/{slug}"] = {'menu': menu}
+    # Une période d'un an pour que la section ML ait assez de données
+    defined['section/predictions_ml']['period'] = '1y'
+    for size in sizes:
+        defined[f"watchlist/{size}"] = {'menu': MENUS['notifications'], 'watchlist': symbols[:size]}
+        defined[f"portfolio/{size}"] = {
+            'menu': MENUS['portefeuille'],
+            'portfolio': {
+                symbol: [{'shares': 100, 'buy_price': 10.0, 'date': '2026-01-02 09:30:00 (UTC+1)'}]
+                for symbol in symbols[:size]
+            },
+        }
+    return defined
+
+
+def _app(state, timeout):
+    state = dict(state)
+    storage.set_watchlist(USER, state.pop('watchlist', DEFAULT_WATCHLIST))
+    storage.clear_portfolio(USER)
+    for symbol, positions in state.pop('portfolio', {}).items():
+        for position in positions:
+            storage.add_position(USER, symbol, position)
+    app = AppTest.from_file(DASHBOARD, default_timeout=timeout)
+    app.query_params['user'] = USER
+    for key, value in state.items():
+        app.session_state[key] = value
+    return app
+
+
+def _run(app):
+    started = time.perf_counter()
+    app.run()
+    elapsed = (time.perf_counter() - started) * 1000
+    if app.exception:
+        raise BenchmarkError(app.exception[0].value)
+    return elapsed
+
+
+def measure(name, state, provider, repeat, memory, timeout):
+    """Latences (et pics mémoire) à froid et à chaud d'un scénario.
+
+    La latence retenue est le minimum des exécutions, comme timeit : c'est
+    l'estimateur le moins sensible aux interruptions de la machine.
+    """
+    cold_runs = []
+    for _ in range(repeat):
+        reset_caches()
+        calls_before = sum(provider.calls.values())
+        app = _app(state, timeout)
+        cold_runs.append(_run(app))
+        upstream_cold = sum(provider.calls.values()) - calls_before
+        spans = {n: row['sum'] * 1000 for n, row in metrics.registry.summary().items() if n != 'rerun'}
+    warm_runs = []
+    calls_before = sum(provider.calls.values())
+    for _ in range(repeat):
+        warm_runs.append(_run(app))
+    result = {
+        'cold_ms': round(min(cold_runs), 1),
+        'warm_ms': round(min(warm_runs), 1),
+        'cold_median_ms': round(statistics.median(cold_runs), 1),
+        'warm_median_ms': round(statistics.median(warm_runs), 1),
+        'upstream_calls_cold': upstream_cold,
+        'upstream_calls_warm': (sum(provider.calls.values()) - calls_before) // repeat,
+        'cold_spans_ms': {n: round(v, 1) for n, v in spans.items()},
+    }
+    if memory:
+        reset_caches()
+        tracemalloc.start()
+        try:
+            app = _app(state, timeout)
+            _run(app)
+            result['cold_peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 1e6, 2)
+            tracemalloc.reset_peak()
+            _run(app)
+            result['warm_peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 1e6, 2)
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def compare(results, baseline, threshold):
+    """Liste des régressions (scénario, mesure, référence, valeur)"""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        for key, min_delta in METRICS:
+            if key not in result or not reference.get(key):
+                continue
+            if result[key] > reference[key] * (1 + threshold) and result[key] - reference[key] > min_delta:
+                regressions.append((name, key, reference[key], result[key]))
+    return regressions
+
+
+def _print_table(results, baseline):
+    print(f"{'scénario':<26}{'froid ms':>10}{'chaud ms':>10}{'pic froid Mo':>14}{'pic chaud Mo':>14}{'appels':>8}  réf. froid/chaud")
+    for name, r in results.items():
+        ref = baseline.get(name, {})
+        reference = f"{ref.get('cold_ms', '-')}/{ref.get('warm_ms', '-')}" if ref else '-'
+        print(f"{name:<26}{r['cold_ms']:>10.1f}{r['warm_ms']:>10.1f}"
+              f"{r.get('cold_peak_mb', float('nan')):>14.2f}{r.get('warm_peak_mb', float('nan')):>14.2f}"
+              f"{r['upstream_calls_cold']:>8}  {reference}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks du Dashboard sur données enregistrées")
+    parser.add_argument('--data', default=DEFAULT_DIRECTORY, help="répertoire des données enregistrées")
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--threshold', type=float, default=0.3, help="dépassement toléré (0.3 = +30 %%)")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES))
+    parser.add_argument('--repeat', type=int, default=5, help="exécutions à froid et à chaud (minimum retenu)")
+    parser.add_argument('--only', help="ne garder que les scénarios contenant ce texte")
+    parser.add_argument('--no-memory', dest='memory', action='store_false', help="sans la passe tracemalloc")
+    parser.add_argument('--timeout', type=float, default=300)
+    parser.add_argument('--output', help="fichier JSON des résultats")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(os.path.join(args.data, MANIFEST)):
+        print(f"Pas de données dans {args.data} : génération des données synthétiques")
+        record_synthetic(args.data, max(args.sizes))
+
+    provider = OfflineProvider(args.data).install()
+    selected = {name: state for name, state in scenarios(provider.symbols, args.sizes).items()
+                if not args.only or args.only in name}
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as source:
+            baseline = json.load(source)['results']
+
+    # Première exécution du processus (imports compris), mesurée à part :
+    # les scénarios suivants n'en supportent plus le coût
+    provider.preload()
+    results = {}
+    if not args.only or args.only in 'startup/first_run':
+        reset_caches()
+        app = _app({}, args.timeout)
+        first = _run(app)
+        results['startup/first_run'] = {
+            'cold_ms': round(first, 1), 'warm_ms': round(_run(app), 1),
+            'upstream_calls_cold': 0, 'upstream_calls_warm': 0, 'cold_spans_ms': {},
+        }
+    else:
+        _run(_app({}, args.timeout))
+    for name, state in selected.items():
+        print(f"… {name}", file=sys.stderr)
+        results[name] = measure(name, state, provider, args.repeat, args.memory, args.timeout)
+    provider.uninstall()
+
+    _print_table(results, baseline)
+    document = {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'processor': platform.processor(),
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as sink:
+            json.dump(document, sink, indent=2, ensure_ascii=False)
+    if args.update_baseline:
+        if baseline:
+            # Les scénarios non exécutés gardent leur référence
+            document['results'] = dict(baseline, **results)
+        with open(args.baseline, 'w', encoding='utf-8') as sink:
+            json.dump(document, sink, indent=2, ensure_ascii=False)
+        print(f"Référence enregistrée dans {args.baseline}")
+        return 0
+
+    if not baseline:
+        print("Aucune référence : lancer avec --update-baseline sur la machine de référence")
+        return 0
+    regressions = compare(results, baseline, args.threshold)
+    for name, key, reference, value in regressions:
+        print(f"RÉGRESSION {name} {key} : {reference} -> {value} (+{(value / reference - 1) * 100:.0f} %)")
+    if regressions:
+        return 1
+    print(f"Aucune régression au-delà de {args.threshold * 100:.0f} %")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""Budget de démarrage à froid et de surcoût par exécution du Dashboard.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --cold-budget 4000 --rerun-budget 200
+
+Chaque section est ouverte dans un interpréteur neuf (comme un conteneur qui
+démarre) sur les données enregistrées : on mesure la durée totale jusqu'au
+premier rendu (interpréteur, imports, première exécution), puis la meilleure
+de --repeat exécutions suivantes, et on relève les dépendances lourdes
+chargées. Le code de sortie est 1 si une section dépasse un budget ou charge
+une dépendance lourde qui ne la concerne pas (imports différés cassés).
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.offline import DEFAULT_DIRECTORY, MANIFEST, MENUS
+from benchmarks.record import record_synthetic
+
+DASHBOARD = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Dashboard.py')
+
+# Dépendances lourdes et sections autorisées à les charger
+HEAVY = {
+    'sklearn': {'predictions_ml'},
+    'plotly.express': {'portefeuille'},
+    'smtplib': {'notifications'},
+    'tracker.report': {'export'},
+    'yfinance': set(),  # jamais hors ligne : aucun accès réseau
+}
+# Budgets par défaut (ms), sur la machine de référence ; la section ML paie
+# l'import de scikit-learn (plus d'une seconde) et a son propre budget
+COLD_START_BUDGET_MS = 3500
+SECTION_COLD_START_BUDGET_MS = {'predictions_ml': 5500}
+RERUN_BUDGET_MS = 250
+
+
+def child(slug, data, repeat):
+    """Exécuté dans l'interpréteur neuf : mesure une section et écrit le résultat en JSON"""
+    started = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+
+    from benchmarks.offline import OfflineProvider
+
+    OfflineProvider(data).install()
+    app = AppTest.from_file(DASHBOARD, default_timeout=300)
+    app.session_state['menu'] = MENUS[slug]
+    if slug == 'predictions_ml':
+        app.session_state['period'] = '1y'
+    app.run()
+    first_render = time.perf_counter()
+    reruns = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        app.run()
+        reruns.append(time.perf_counter() - began)
+    print(json.dumps({
+        'first_render_ms': round((first_render - started) * 1000, 1),
+        'rerun_ms': round(min(reruns) * 1000, 1),
+        'heavy': [name for name in HEAVY if name in sys.modules],
+        'errors': [str(e.value)[:300] for e in app.exception],
+    }))
+
+
+def measure(slug, data, repeat):
+    env = dict(os.environ, TRACKER_SHARED_CACHE='0', TRACKER_DB=':memory:',
+               TRACKER_UPSTREAM_RATE='1000000', TRACKER_UPSTREAM_BURST='1000000')
+    for name in ('TRACKER_GATEWAY_URL', 'TRACKER_METRICS_PORT', 'TRACKER_ADMIN_TOKEN'):
+        env.pop(name, None)
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.startup', '--child', slug, '--data', data, '--repeat', str(repeat)],
+        env=env, capture_output=True, text=True, check=False,
+    )
+    elapsed = (time.perf_counter() - started) * 1000
+    if completed.returncode != 0:
+        raise RuntimeError(f"{slug} : échec de la mesure\n{completed.stderr[-2000:]}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    # Durée vue de l'extérieur : démarrage de l'interpréteur compris, sortie non comprise
+    result['cold_start_ms'] = round(elapsed - (result['rerun_ms'] * repeat), 1)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Budget de démarrage à froid du Dashboard")
+    parser.add_argument('--data', default=DEFAULT_DIRECTORY, help="répertoire des données enregistrées")
+    parser.add_argument('--repeat', type=int, default=5, help="exécutions suivantes (minimum retenu)")
+    parser.add_argument('--cold-budget', type=float, default=COLD_START_BUDGET_MS,
+                        help="ms jusqu'au premier rendu (hors sections à budget propre)")
+    parser.add_argument('--rerun-budget', type=float, default=RERUN_BUDGET_MS, help="ms par exécution suivante")
+    parser.add_argument('--only', help="ne garder que les sections contenant ce texte")
+    parser.add_argument('--output', help="fichier JSON des résultats")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child(args.child, args.data, args.repeat)
+        return 0
+
+    if not os.path.exists(os.path.join(args.data, MANIFEST)):
+        print(f"Pas de données dans {args.data} : génération des données synthétiques")
+        record_synthetic(args.data, len(MENUS))
+
+    results, failures = {}, []
+    print(f"{'section':<18}{'froid ms':>10}{'rendu ms':>10}{'exéc. ms':>10}  dépendances lourdes")
+    for slug in MENUS:
+        if args.only and args.only not in slug:
+            continue
+        result = results[slug] = measure(slug, args.data, args.repeat)
+        print(f"{slug:<18}{result['cold_start_ms']:>10.0f}{result['first_render_ms']:>10.0f}"
+              f"{result['rerun_ms']:>10.0f}  {', '.join(result['heavy']) or '-'}")
+        for name in result['heavy']:
+            if slug not in HEAVY[name]:
+                failures.append(f"{slug} charge {name}")
+        cold_budget = SECTION_COLD_START_BUDGET_MS.get(slug, args.cold_budget)
+        if result['cold_start_ms'] > cold_budget:
+            failures.append(f"{slug} : démarrage {result['cold_start_ms']:.0f} ms > {cold_budget:.0f} ms")
+        if result['rerun_ms'] > args.rerun_budget:
+            failures.append(f"{slug} : exécution {result['rerun_ms']:.0f} ms > {args.rerun_budget:.0f} ms")
+        failures.extend(f"{slug} : {error}" for error in result['errors'])
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as sink:
+            json.dump({'budgets': {'cold_start_ms': args.cold_budget, 'rerun_ms': args.rerun_budget,
+                                   'sections': SECTION_COLD_START_BUDGET_MS},
+                       'results': results}, sink, indent=2, ensure_ascii=False)
+    for failure in failures:
+        print(f"HORS BUDGET {failure}")
+    if failures:
+        return 1
+    print("Toutes les sections respectent les budgets")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
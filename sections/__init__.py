@@ -0,0 +1,24 @@
+"""Sections du Dashboard, une par entrée du menu.
+
+Chaque module expose render(page), où `page` est le contexte commun préparé
+par Dashboard.py (symbole, période, intervalle, barres, fiche, cours, fuseau).
+Un module n'est importé, avec ses dépendances lourdes (scikit-learn,
+plotly.express, smtplib…), qu'à la première sélection de son entrée ; il
+reste ensuite en mémoire pour les exécutions suivantes.
+"""
+import importlib
+
+MODULES = {
+    "📈 Tableau de bord": 'dashboard',
+    "💰 Portefeuille virtuel": 'portfolio',
+    "🔔 Alertes de prix": 'alerts',
+    "📧 Notifications email": 'notifications',
+    "📤 Export des données": 'exports',
+    "🤖 Prédictions ML": 'predictions',
+    "🏢 Indices Chine": 'indices',
+}
+
+
+def render(menu, page):
+    """Affiche la section `menu` (importée à la demande)"""
+    importlib.import_module(f"{__name__}.{MODULES[menu]}").render(page)
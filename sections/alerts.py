@@ -0,0 +1,202 @@
+"""🔔 Alertes de prix : création et liste des alertes actives."""
+from datetime import datetime
+
+import plotly.graph_objs as go
+import pytz
+import streamlit as st
+
+from tracker import conditions, feed, metrics, replay, timezones
+from tracker.storage import storage
+from tracker.symbols import symbol_master
+from tracker.universe import format_currency, get_exchange
+
+INTERVAL_LABELS = {'1d': "1 jour", '1h': "1 heure", '30m': "30 minutes", '15m': "15 minutes", '5m': "5 minutes"}
+# Au-delà, le graphique du rejeu passe en WebGL
+WEBGL_POINTS = 5000
+SYNTAX_HELP = """
+**Séries** : `close` (ou `price`), `open`, `high`, `low`, `volume`  
+**Fonctions** : `ma(n)`, `change(n)` (% sur n barres), `rsi(n)`, `avg_volume(n)`,
+`volume_ratio(n)` (volume / moyenne des n barres précédentes),
+`premium()` (prime A/H en %, sociétés cotées à Shanghai/Shenzhen et Hong Kong),
+`cross_above(a, b)`, `cross_below(a, b)`  
+**Opérateurs** : `<` `<=` `>` `>=`, `+ - * /`, `and`, `or`, `not`, parenthèses
+
+Exemples : `change(5) > 8 and volume_ratio(20) > 3` ·
+`cross_above(ma(20), ma(50))` · `rsi(14) < 30 or premium() > 40`
+
+L'alerte se déclenche quand la condition devient vraie, puis attend qu'elle
+redevienne nettement fausse avant de pouvoir se déclencher à nouveau.
+"""
+
+
+def render(page):
+    symbol, current_price, tz, user = page['symbol'], page['current_price'], page['tz'], page['user']
+    st.subheader("🔔 Gestion des alertes de prix")
+    
+    col1, col2 = st.columns([1, 1])
+    
+    with col1:
+        st.markdown("### ➕ Créer une nouvelle alerte")
+        mode = st.radio("Type de condition", ["Prix cible", "Expression"], horizontal=True, key='alert_mode')
+        with st.form("new_alert"):
+            entry = st.text_input("Symbole", value=symbol if symbol else "600519.SS",
+                                  help="Ticker, code, initiales pinyin ou nom chinois")
+            # Validé dans le référentiel avant tout téléchargement
+            alert_symbol, known = symbol_master.resolve(entry)
+            if alert_symbol is None:
+                alert_symbol = entry.strip().upper()
+                st.caption("⚠️ Symbole invalide")
+            else:
+                st.caption(f"Marché: {get_exchange(alert_symbol)}" + ("" if known else " · absent du référentiel"))
+            
+            default_price = float(current_price * 1.05) if current_price > 0 else 100.0
+            expression = None
+            alert_interval = '1d'
+            if mode == "Prix cible":
+                alert_price = st.number_input(
+                    f"Prix cible ({format_currency(0, alert_symbol).split('0')[0]})", 
+                    min_value=0.01, 
+                    step=0.01, 
+                    value=default_price
+                )
+            else:
+                expression = st.text_input("Condition", value="change(5) > 8 and volume_ratio(20) > 3",
+                                           key='alert_expression')
+                alert_interval = st.selectbox("Barres", list(INTERVAL_LABELS),
+                                              format_func=INTERVAL_LABELS.get, key='alert_interval')
+                alert_price = float(current_price) if current_price > 0 else 0.0
+            
+            col_cond, col_type = st.columns(2)
+            with col_cond:
+                condition = st.selectbox("Condition", ["above", "below"], disabled=mode != "Prix cible")
+            with col_type:
+                alert_type = st.selectbox("Type", ["Permanent", "Une fois"])
+            
+            one_time = alert_type == "Une fois"
+
+            col_history, col_scope = st.columns(2)
+            with col_history:
+                replay_period = st.selectbox("Historique du rejeu", list(replay.HISTORY_PERIODS), index=3,
+                                             key='replay_period')
+            with col_scope:
+                replay_watchlist = st.checkbox("Rejouer sur toute la watchlist", key='replay_watchlist')
+            
+            col_create, col_replay = st.columns(2)
+            with col_create:
+                create = st.form_submit_button("Créer l'alerte")
+            with col_replay:
+                simulate = st.form_submit_button("🔁 Simuler sur l'historique")
+
+            if (create or simulate) and not symbol_master.resolve(entry)[0]:
+                st.error(f"❌ Symbole invalide : {entry}")
+                create = simulate = False
+
+            if simulate:
+                text = expression if expression is not None else ('close >= target' if condition == 'above'
+                                                                   else 'close <= target')
+                # Profondeur intraday limitée par Yahoo : historique le plus long disponible
+                allowed = replay.periods_for(alert_interval)
+                period = replay_period if replay_period in allowed else allowed[-1]
+                symbols = [alert_symbol] + (list(st.session_state.watchlist) if replay_watchlist else [])
+                with metrics.span('alert_replay'):
+                    try:
+                        result = replay.run(text, symbols, alert_interval, period,
+                                            alert_price if expression is None else None)
+                    except conditions.ConditionError as error:
+                        st.error(f"❌ {error}")
+                        result = None
+                    except Exception as e:
+                        st.warning(f"Rejeu impossible: {str(e)}")
+                        result = None
+                if result is not None:
+                    st.session_state.replay_result = {
+                        'label': text if expression is not None else f"{text.replace('target', f'{alert_price:g}')}",
+                        'symbol': alert_symbol,
+                        'interval': alert_interval,
+                        'period': period,
+                        'target': alert_price if expression is None else None,
+                        'result': result,
+                    }
+
+            if create:
+                try:
+                    if expression is not None:
+                        expression = conditions.compile_condition(expression).text
+                except conditions.ConditionError as error:
+                    st.error(f"❌ {error}")
+                else:
+                    storage.add_alert(user, {
+                        'symbol': alert_symbol,
+                        'price': alert_price,
+                        'condition': condition if expression is None else 'expression',
+                        'one_time': one_time,
+                        'created': timezones.format_time(datetime.now(pytz.UTC), tz),
+                        'expression': expression,
+                        'interval': alert_interval,
+                    })
+                    st.session_state.price_alerts = storage.alerts(user)
+                    if expression is None:
+                        st.success(f"✅ Alerte créée pour {alert_symbol} à {format_currency(alert_price, alert_symbol)}")
+                    else:
+                        st.success(f"✅ Alerte créée pour {alert_symbol} : {expression}")
+        if mode == "Expression":
+            with st.expander("📖 Syntaxe des conditions"):
+                st.markdown(SYNTAX_HELP)
+    
+    with col2:
+        st.markdown("### 📋 Alertes actives")
+        if st.session_state.price_alerts:
+            for alert in st.session_state.price_alerts:
+                with st.container():
+                    st.markdown(f"""
+                    <div class='alert-box alert-warning'>
+                        <b>{alert['symbol']}</b> - {conditions.describe(alert)}<br>
+                        <small>Créée: {alert['created']} | {('Usage unique' if alert['one_time'] else 'Permanent')}</small>
+                    </div>
+                    """, unsafe_allow_html=True)
+                    
+                    if st.button(f"Supprimer", key=f"del_alert_{alert['id']}"):
+                        storage.remove_alert(user, alert['id'])
+                        st.rerun()
+        else:
+            st.info("Aucune alerte active")
+
+    if st.session_state.get('replay_result'):
+        render_replay(st.session_state.replay_result, tz)
+
+
+def render_replay(replayed, tz):
+    """Déclenchements historiques : fréquence, rendements suivants et repères sur le graphique"""
+    result, symbol = replayed['result'], replayed['symbol']
+    triggers, summary = result['triggers'], result['summary']
+    st.markdown(f"### 🔁 Rejeu : `{replayed['label']}` ({INTERVAL_LABELS.get(replayed['interval'])}, "
+                f"{replayed['period']})")
+    col_1, col_2, col_3 = st.columns(3)
+    col_1.metric("Déclenchements", int(summary['Déclenchements'].sum()))
+    col_2.metric("Par mois (moyenne)", f"{summary['Par mois'].mean():.2f}")
+    forward = [column for column in triggers.columns if column.endswith('barres %')]
+    if len(triggers) and forward:
+        col_3.metric(f"Rendement moyen {forward[-1].replace(' %', '')}", f"{triggers[forward[-1]].mean():+.2f}%")
+
+    bars = feed.get_bars(symbol, replayed['period'], replayed['interval'])
+    if not bars.empty:
+        marks = triggers[triggers['Symbole'] == symbol]
+        scatter = go.Scattergl if len(bars) > WEBGL_POINTS else go.Scatter
+        fig = go.Figure()
+        fig.add_trace(scatter(x=bars.index.tz_convert(tz), y=bars['Close'], mode='lines', name=symbol,
+                              line=dict(color='#c41e3a', width=1.5)))
+        fig.add_trace(scatter(x=marks['Date'].dt.tz_convert(tz), y=marks['Clôture'], mode='markers',
+                              name='Déclenchement', marker=dict(symbol='triangle-up', size=11, color='#ff9900',
+                                                                 line=dict(color='black', width=1))))
+        if replayed['target'] is not None:
+            fig.add_hline(y=replayed['target'], line_dash='dash', line_color='gray', annotation_text="Cible")
+        fig.update_layout(title=f"{symbol} : déclenchements simulés", yaxis_title="Prix", height=450,
+                          hovermode='x unified', template='plotly_white')
+        st.plotly_chart(fig, use_container_width=True)
+
+    st.markdown("#### Par symbole")
+    st.dataframe(summary.round(2), use_container_width=True)
+    if len(triggers):
+        st.markdown("#### Déclenchements")
+        table = triggers.assign(Date=[timezones.format_time(when, tz) for when in triggers['Date']])
+        st.dataframe(table.round(2), use_container_width=True, hide_index=True)
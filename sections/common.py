@@ -0,0 +1,52 @@
+"""Utilitaires partagés par Dashboard.py et les sections."""
+from datetime import datetime
+
+import pytz
+
+CHINA_TIMEZONE = pytz.timezone('Asia/Shanghai')
+
+
+def format_large_number(num):
+    """Formate les grands nombres (pour la capitalisation en RMB/USD)"""
+    if num > 1e12:
+        return f"{num/1e12:.2f} T"
+    elif num > 1e9:
+        return f"{num/1e9:.2f} B"
+    elif num > 1e6:
+        return f"{num/1e6:.2f} M"
+    else:
+        return f"{num:.2f}"
+
+
+def get_market_status():
+    """Détermine le statut des marchés chinois en heure locale"""
+    china_now = datetime.now(CHINA_TIMEZONE)
+    china_hour = china_now.hour
+    china_minute = china_now.minute
+    china_weekday = china_now.weekday()
+    
+    # Weekend
+    if china_weekday >= 5:
+        return "Fermé (weekend)", "🔴"
+    
+    # Horaires de trading
+    # Matin: 09:30 - 11:30
+    # Après-midi: 13:00 - 15:00
+    if (9 <= china_hour < 11) or (china_hour == 11 and china_minute <= 30):
+        return "Ouvert (session matin)", "🟢"
+    elif (13 <= china_hour < 15):
+        return "Ouvert (session après-midi)", "🟢"
+    elif (11 < china_hour < 13) or (china_hour == 11 and china_minute > 30) or (china_hour == 13 and china_minute == 0):
+        return "Pause déjeuner", "🟡"
+    else:
+        return "Fermé", "🔴"
+
+
+def safe_get_metric(hist, metric, index=-1):
+    """Récupère une métrique en toute sécurité"""
+    try:
+        if hist is not None and not hist.empty and len(hist) > abs(index):
+            return hist[metric].iloc[index]
+        return 0
+    except:
+        return 0
@@ -0,0 +1,298 @@
+"""📈 Tableau de bord : cours, graphique principal et fiche de l'entreprise."""
+import plotly.graph_objs as go
+import streamlit as st
+
+from sections.common import format_large_number, get_market_status, safe_get_metric
+from tracker import comparison, feed, metrics, patterns, timezones
+from tracker.sessions import market_for
+from tracker.universe import CHINESE_INDICES, format_currency, get_exchange
+
+
+def render(page):
+    symbol, period, interval, tz = page['symbol'], page['period'], page['interval'], page['tz']
+    hist, info, current_price = page['hist'], page['info'], page['current_price']
+    # Note sur les marchés chinois
+    st.markdown(f"""
+    <div class='chinese-market-note'>
+        <b>🏮 Marchés chinois :</b> Les données incluent les actions A (Shanghai/Shenzhen), 
+        actions H (Hong Kong) et ADRs (US). Les horaires sont affichés en heure {tz.zone}.
+    </div>
+    """, unsafe_allow_html=True)
+    
+    if hist is None or hist.empty:
+        st.warning(f"Aucune donnée disponible pour {symbol}. Veuillez vérifier le symbole.")
+    else:
+        # Statut du marché
+        market_status, market_icon = get_market_status()
+        st.info(f"{market_icon} Marché {symbol}: {market_status}")
+        
+        # Métriques principales
+        exchange = get_exchange(symbol)
+        st.subheader(f"📊 Aperçu en temps réel - {symbol} ({exchange})")
+        
+        col1, col2, col3, col4 = st.columns(4)
+        
+        previous_close = safe_get_metric(hist, 'Close', -2) if len(hist) > 1 else current_price
+        change = current_price - previous_close
+        change_pct = (change / previous_close * 100) if previous_close != 0 else 0
+        
+        with col1:
+            st.metric(
+                label="Prix actuel",
+                value=format_currency(current_price, symbol),
+                delta=f"{change:.2f} ({change_pct:.2f}%)"
+            )
+        
+        with col2:
+            day_high = safe_get_metric(hist, 'High')
+            st.metric("Plus haut", format_currency(day_high, symbol))
+        
+        with col3:
+            day_low = safe_get_metric(hist, 'Low')
+            st.metric("Plus bas", format_currency(day_low, symbol))
+        
+        with col4:
+            volume = safe_get_metric(hist, 'Volume')
+            volume_formatted = f"{volume/1e6:.1f}M" if volume > 1e6 else f"{volume/1e3:.1f}K"
+            st.metric("Volume", volume_formatted)
+        
+        # Dernière mise à jour avec fuseau horaire
+        if not hist.empty:
+            st.caption(f"Dernière mise à jour: {timezones.format_time(hist.index[-1], tz)}")
+        
+        # Graphique principal
+        st.subheader("📉 Évolution du prix")
+        
+        figure_span = metrics.span('figure_build').start()
+        fig = go.Figure()
+        # Heures locales d'affichage (plotly ignore les fuseaux)
+        chart_x = timezones.chart_times(hist.index, tz)
+        
+        # Chandeliers ou ligne selon l'intervalle
+        if interval in ["1m", "2m", "5m", "15m", "30m", "1h", "session"]:
+            fig.add_trace(go.Candlestick(
+                x=chart_x,
+                open=hist['Open'],
+                high=hist['High'],
+                low=hist['Low'],
+                close=hist['Close'],
+                name='Prix',
+                increasing_line_color='#00cc96',
+                decreasing_line_color='#ef553b'
+            ))
+        else:
+            fig.add_trace(go.Scatter(
+                x=chart_x,
+                y=hist['Close'],
+                mode='lines',
+                name='Prix',
+                line=dict(color='#c41e3a', width=2)
+            ))
+        
+        # Ajouter les moyennes mobiles si assez de données
+        if len(hist) >= 20:
+            ma_20 = hist['Close'].rolling(window=20).mean()
+            fig.add_trace(go.Scatter(
+                x=chart_x,
+                y=ma_20,
+                mode='lines',
+                name='MA 20',
+                line=dict(color='orange', width=1, dash='dash')
+            ))
+        
+        if len(hist) >= 50:
+            ma_50 = hist['Close'].rolling(window=50).mean()
+            fig.add_trace(go.Scatter(
+                x=chart_x,
+                y=ma_50,
+                mode='lines',
+                name='MA 50',
+                line=dict(color='purple', width=1, dash='dash')
+            ))
+        
+        # Figures en chandeliers : haussières sous le plus bas, baissières au-dessus du plus haut
+        marks = patterns.chart_marks(hist, symbol, daily=interval == '1d')
+        if not marks.empty:
+            marks_x = timezones.chart_times(marks.index, tz)
+            for direction, marker, y, color in ((1, 'triangle-up', marks['Low'] * 0.99, '#00cc96'),
+                                                (-1, 'triangle-down', marks['High'] * 1.01, '#ef553b'),
+                                                (0, 'circle-open', marks['Close'], 'gray')):
+                chosen = (marks['Sens'] == direction).to_numpy()
+                if chosen.any():
+                    fig.add_trace(go.Scatter(
+                        x=marks_x[chosen],
+                        y=y[chosen],
+                        mode='markers',
+                        name=f"Figures ({patterns.DIRECTIONS[direction].lower()})",
+                        text=marks['Figures'][chosen],
+                        hovertemplate='%{text}<extra></extra>',
+                        marker=dict(symbol=marker, size=9, color=color)
+                    ))
+        
+        # Volume
+        fig.add_trace(go.Bar(
+            x=chart_x,
+            y=hist['Volume'],
+            name='Volume',
+            yaxis='y2',
+            marker=dict(color='lightgray', opacity=0.3)
+        ))
+        
+        # Ajouter des lignes verticales pour les heures de trading
+        if interval in ["1m", "5m", "15m", "30m", "1h", "session"] and not hist.empty:
+            # Séances du dernier jour de cotation, converties dans le fuseau d'affichage
+            market = market_for(symbol)
+            last_date = hist.index[-1].tz_convert(market.timezone).date()
+            try:
+                sessions = timezones.session_hours(market, tz, last_date)
+                labels = ["Session matin", "Session après-midi"] if len(sessions) == 2 else ["Séance"]
+                
+                # Ajouter des annotations pour les périodes de trading
+                for (session_start, session_end), label in zip(sessions, labels):
+                    fig.add_vrect(
+                        x0=session_start.replace(tzinfo=None),
+                        x1=session_end.replace(tzinfo=None),
+                        fillcolor="green",
+                        opacity=0.1,
+                        layer="below",
+                        line_width=0,
+                        annotation_text=label
+                    )
+            except:
+                pass  # Ignorer les erreurs d'annotation
+        
+        fig.update_layout(
+            title=f"{symbol} - {period} - {exchange} (heure {tz.zone})",
+            yaxis_title="Prix",
+            yaxis2=dict(
+                title="Volume",
+                overlaying='y',
+                side='right',
+                showgrid=False
+            ),
+            xaxis_title=f"Date ({tz.zone})",
+            height=600,
+            hovermode='x unified',
+            template='plotly_white'
+        )
+        
+        figure_span.stop()
+        
+        with metrics.span('chart_render'):
+            st.plotly_chart(fig, use_container_width=True)
+
+        render_comparison(page)
+        render_signals(tz)
+        
+        # Informations sur l'entreprise
+        with st.expander("ℹ️ Informations sur l'entreprise"):
+            if info:
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    st.write(f"**Nom :** {info.get('longName', 'N/A')}")
+                    st.write(f"**Secteur :** {info.get('sector', 'N/A')}")
+                    st.write(f"**Industrie :** {info.get('industry', 'N/A')}")
+                    st.write(f"**Site web :** {info.get('website', 'N/A')}")
+                    
+                    # Informations spécifiques Chine
+                    st.write(f"**Place de cotation :** {exchange}")
+                    if 'currency' in info:
+                        st.write(f"**Devise :** {info.get('currency', 'N/A')}")
+                
+                with col2:
+                    market_cap = info.get('marketCap', 0)
+                    if market_cap > 0:
+                        st.write(f"**Capitalisation :** {format_large_number(market_cap)}")
+                    else:
+                        st.write("**Capitalisation :** N/A")
+                    
+                    st.write(f"**P/E :** {info.get('trailingPE', 'N/A')}")
+                    st.write(f"**Dividende :** {info.get('dividendYield', 0)*100:.2f}%" if info.get('dividendYield') else "**Dividende :** N/A")
+                    st.write(f"**Beta :** {info.get('beta', 'N/A')}")
+            else:
+                st.write("Informations non disponibles")
+
+
+def render_comparison(page):
+    """Symboles superposés sur une base commune, à partir d'un seul téléchargement groupé"""
+    symbol, period, interval, tz = page['symbol'], page['period'], page['interval'], page['tz']
+    st.subheader("📊 Comparaison")
+    options = list(dict.fromkeys([symbol] + list(st.session_state.watchlist) + list(CHINESE_INDICES)))
+    col_symbols, col_mode = st.columns([3, 1])
+    with col_symbols:
+        chosen = st.multiselect(
+            "Symboles comparés",
+            options,
+            default=[symbol],
+            max_selections=comparison.MAX_SYMBOLS,
+            format_func=lambda s: f"{s} · {CHINESE_INDICES[s]}" if s in CHINESE_INDICES else s
+        )
+    with col_mode:
+        mode = st.radio("Échelle", list(comparison.MODES), format_func=comparison.MODES.get, key='compare_mode')
+    if len(chosen) < 2:
+        st.caption("Ajouter au moins un symbole ou un indice pour comparer")
+        return
+
+    with metrics.span('comparison'):
+        try:
+            bars = feed.get_bars_many(chosen, period, interval)
+            compared = comparison.compare(bars, chosen, interval, mode)
+        except Exception as e:
+            st.warning(f"Comparaison indisponible: {str(e)}")
+            return
+    if compared is None:
+        st.info("Aucune période commune aux symboles choisis")
+        return
+    missing = [s for s in chosen if s not in compared['symbols']]
+    if missing:
+        st.caption(f"Sans données : {', '.join(missing)}")
+
+    # Journalier : jours calendaires, communs à toutes les places ; intraday : heure d'affichage
+    daily = interval in comparison.DAILY_INTERVALS
+    chart_x = compared['index'] if daily else timezones.chart_times(compared['index'], tz)
+    fig = go.Figure()
+    for row, name in enumerate(compared['symbols']):
+        kept = compared['points'][row]
+        fig.add_trace(go.Scattergl(
+            x=chart_x[kept],
+            y=compared['values'][row, kept],
+            mode='lines',
+            name=name,
+            line=dict(width=2 if name == symbol else 1.5)
+        ))
+    fig.add_hline(y=100 if mode == 'base100' else 0, line_dash='dot', line_color='gray')
+    fig.update_layout(
+        title=f"Comparaison - {period} - {comparison.MODES[mode]}",
+        yaxis_title=comparison.MODES[mode],
+        xaxis_title="Date" if daily else f"Date ({tz.zone})",
+        height=450,
+        hovermode='x unified',
+        template='plotly_white'
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+
+def render_signals(tz):
+    """Figures en chandeliers de la dernière séance sur toute la watchlist (tableau triable)"""
+    st.subheader("🕯️ Signaux du jour (watchlist)")
+    with metrics.span('pattern_scan'):
+        try:
+            watchlist = list(st.session_state.watchlist)
+            signals = patterns.signals_today(feed.get_bars_many(watchlist, '1mo', '1d'), watchlist)
+        except Exception as e:
+            st.warning(f"Signaux indisponibles: {str(e)}")
+            return
+    if signals.empty:
+        st.info("Aucune figure sur la dernière séance")
+        return
+    signals['Date'] = [timezones.format_time(when, tz) for when in signals['Date']]
+    st.dataframe(
+        signals,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            'Clôture': st.column_config.NumberColumn(format="%.2f"),
+            'Variation %': st.column_config.NumberColumn(format="%+.2f%%"),
+        }
+    )
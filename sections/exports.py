@@ -0,0 +1,133 @@
+"""📤 Export des données : fichiers, rapports HTML/PDF et archive de la watchlist."""
+from datetime import datetime
+
+import streamlit as st
+
+from tracker import export, feed, metrics, report, timezones
+from tracker.universe import format_currency, get_exchange
+
+
+def export_metadata(symbol, tz):
+    """Métadonnées accompagnant un export JSON"""
+    return {
+        'symbol': symbol,
+        'exchange': get_exchange(symbol),
+        'last_update': datetime.now(tz).isoformat(),
+        'timezone': tz.zone,
+        'currency': 'HKD' if symbol.endswith('.HK') else 'CNY' if symbol.endswith(('.SS', '.SZ')) else 'USD',
+    }
+
+
+def load_export_bars(symbol, period, interval, tz):
+    """Historique d'un symbole pour l'export groupé (None si indisponible)"""
+    try:
+        bars = feed.get_bars(symbol, period, interval)
+    except Exception:
+        return None
+    return bars.set_axis(timezones.to_display(bars.index, tz))
+
+
+def render(page):
+    symbol, period, interval, tz = page['symbol'], page['period'], page['interval'], page['tz']
+    hist, current_price = page['hist'], page['current_price']
+    st.subheader("📤 Export des données")
+    
+    if hist is not None and not hist.empty:
+        # Statistiques (les colonnes du cache sont en float32)
+        stats = {
+            'Moyenne': float(hist['Close'].mean()),
+            'Écart-type': float(hist['Close'].std()),
+            'Min': float(hist['Close'].min()),
+            'Max': float(hist['Close'].max()),
+            'Variation totale': f"{(hist['Close'].iloc[-1] / hist['Close'].iloc[0] - 1) * 100:.2f}%" if len(hist) > 1 else "N/A"
+        }
+        export_stamp = datetime.now(tz).strftime('%Y%m%d_%H%M%S')
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown("### 📊 Données historiques")
+            # Seules les lignes affichées sont converties dans le fuseau d'affichage
+            display_hist = hist.tail(20)
+            display_hist.index = timezones.format_times(display_hist.index, tz)
+            st.dataframe(display_hist)
+            
+            export_format = st.selectbox(
+                "Format d'export",
+                options=export.available_formats(),
+                format_func=lambda f: export.FORMATS[f][0]
+            )
+            format_label, format_extension, format_mime = export.FORMATS[export_format]
+            
+            # Le fichier n'est produit qu'au clic, hors du script principal
+            json_meta = dict(
+                export_metadata(symbol, tz),
+                current_price=float(current_price) if current_price else 0,
+                statistics=stats
+            )
+            st.download_button(
+                label=f"📥 Télécharger ({format_label})",
+                data=lambda frame=hist, fmt=export_format, meta=json_meta: metrics.timed(
+                    'export_serialization', export.export_frame,
+                    frame.set_axis(timezones.to_display(frame.index, tz)), fmt, meta
+                ),
+                file_name=f"{symbol}_data_{export_stamp}.{format_extension}",
+                mime=format_mime
+            )
+        
+        with col2:
+            st.markdown("### 📈 Rapport")
+            report_scope = st.radio(
+                "Contenu du rapport",
+                options=["Symbole courant", "Watchlist"],
+                horizontal=True
+            )
+            report_symbols = [symbol] if report_scope == "Symbole courant" else list(st.session_state.watchlist)
+            report_name = "symbole" if report_scope == "Symbole courant" else "watchlist"
+            # Rapport généré au clic ; les symboles sont rendus en parallèle
+            st.download_button(
+                label="📥 Rapport HTML",
+                data=lambda symbols=tuple(report_symbols), p=period, i=interval: metrics.timed(
+                    'report_build', report.generate_html, symbols, p, i
+                ).encode('utf-8'),
+                file_name=f"rapport_{report_name}_{export_stamp}.html",
+                mime="text/html"
+            )
+            st.download_button(
+                label="📥 Rapport PDF",
+                data=lambda symbols=tuple(report_symbols), p=period, i=interval: metrics.timed(
+                    'report_build', report.generate_pdf, symbols, p, i
+                ),
+                file_name=f"rapport_{report_name}_{export_stamp}.pdf",
+                mime="application/pdf"
+            )
+            st.caption("PDF : nécessite les paquets optionnels kaleido et weasyprint. "
+                       "Hors du Dashboard : `python -m tracker.report --output rapport.html`")
+
+            st.markdown("**Statistiques:**")
+            for key, value in stats.items():
+                if isinstance(value, float):
+                    st.write(f"{key}: {format_currency(value, symbol)}")
+                else:
+                    st.write(f"{key}: {value}")
+            
+            # Export groupé : un fichier par symbole dans une archive ZIP
+            st.markdown("### 📦 Export groupé")
+            archive_symbols = st.multiselect(
+                "Symboles à exporter",
+                options=st.session_state.watchlist,
+                default=st.session_state.watchlist
+            )
+            st.download_button(
+                label=f"📥 Archive ZIP ({len(archive_symbols)} symboles, {format_label})",
+                data=lambda symbols=tuple(archive_symbols), fmt=export_format, p=period, i=interval: metrics.timed(
+                    'export_serialization', export.export_archive,
+                    symbols, lambda s: load_export_bars(s, p, i, tz), fmt,
+                    meta=lambda s: export_metadata(s, tz)
+                ),
+                file_name=f"watchlist_{period}_{interval}_{export_stamp}.zip",
+                mime="application/zip",
+                disabled=not archive_symbols
+            )
+    else:
+        st.warning(f"Aucune donnée à exporter pour {symbol}")
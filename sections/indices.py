@@ -0,0 +1,259 @@
+"""🏢 Indices Chine : indice sélectionné, comparaison, largeur du marché et horaires."""
+import pandas as pd
+import plotly.graph_objs as go
+import streamlit as st
+
+from sections.common import CHINA_TIMEZONE
+from tracker import breadth, feed, metrics, timezones
+from tracker.sessions import CHINA
+from tracker.universe import CHINESE_INDICES
+
+
+def render(page):
+    tz, TZ_LABEL = page['tz'], page['tz_label']
+    st.subheader("🏢 Indices boursiers chinois")
+    
+    # Liste des indices chinois
+    chinese_indices = CHINESE_INDICES
+    
+    col1, col2 = st.columns([2, 1])
+    
+    with col2:
+        st.markdown("### 🇨🇳 Sélection d'indice")
+        selected_index = st.selectbox(
+            "Choisir un indice",
+            options=list(chinese_indices.keys()),
+            format_func=lambda x: f"{chinese_indices[x]} ({x})",
+            index=0
+        )
+        
+        st.markdown("### 📊 Performance des indices")
+        
+        # Période de comparaison
+        perf_period = st.selectbox(
+            "Période de comparaison",
+            options=["1d", "5d", "1mo", "3mo", "6mo", "1y"],
+            index=0
+        )
+    
+    with col1:
+        # Charger et afficher l'indice sélectionné
+        try:
+            index_hist = feed.get_bars(selected_index, perf_period, '1d')
+            
+            if not index_hist.empty:
+                current_index = index_hist['Close'].iloc[-1]
+                prev_index = index_hist['Close'].iloc[-2] if len(index_hist) > 1 else current_index
+                index_change = current_index - prev_index
+                index_change_pct = (index_change / prev_index) * 100 if prev_index != 0 else 0
+                
+                st.markdown(f"### {chinese_indices[selected_index]}")
+                
+                col_i1, col_i2, col_i3 = st.columns(3)
+                col_i1.metric("Valeur", f"{current_index:.2f}")
+                col_i2.metric("Variation", f"{index_change:.2f}")
+                col_i3.metric("Variation %", f"{index_change_pct:.2f}%", delta=f"{index_change_pct:.2f}%")
+                
+                st.caption(f"Dernière mise à jour: {timezones.format_time(index_hist.index[-1], tz)}")
+                
+                # Graphique de l'indice
+                figure_span = metrics.span('figure_build').start()
+                fig_index = go.Figure()
+                fig_index.add_trace(go.Scatter(
+                    x=timezones.chart_times(index_hist.index, tz),
+                    y=index_hist['Close'],
+                    mode='lines',
+                    name=chinese_indices[selected_index],
+                    line=dict(color='#c41e3a', width=2)
+                ))
+                
+                fig_index.update_layout(
+                    title=f"Évolution - {perf_period} (heure {tz.zone})",
+                    xaxis_title=f"Date ({tz.zone})",
+                    yaxis_title="Points",
+                    height=400,
+                    template='plotly_white'
+                )
+                
+                figure_span.stop()
+                
+                with metrics.span('chart_render'):
+                    st.plotly_chart(fig_index, use_container_width=True)
+                
+                # Statistiques de l'indice
+                st.markdown("### 📈 Statistiques")
+                col_s1, col_s2, col_s3, col_s4 = st.columns(4)
+                col_s1.metric("Plus haut", f"{index_hist['High'].max():.2f}")
+                col_s2.metric("Plus bas", f"{index_hist['Low'].min():.2f}")
+                col_s3.metric("Moyenne", f"{index_hist['Close'].mean():.2f}")
+                col_s4.metric("Volatilité", f"{index_hist['Close'].pct_change().std()*100:.2f}%")
+                
+        except Exception as e:
+            st.error(f"Erreur lors du chargement de l'indice: {str(e)}")
+    
+    # Tableau de comparaison des indices
+    st.markdown("### 📊 Comparaison des indices")
+    
+    comparison_data = []
+    for idx, name in list(chinese_indices.items())[:6]:  # Limiter à 6 indices pour la performance
+        try:
+            hist = feed.get_bars(idx, "5d", "1d")
+            if not hist.empty:
+                current = hist['Close'].iloc[-1]
+                prev = hist['Close'].iloc[0]
+                change_pct = ((current - prev) / prev) * 100 if prev != 0 else 0
+                
+                comparison_data.append({
+                    'Indice': name,
+                    'Symbole': idx,
+                    'Valeur': f"{current:.2f}",
+                    'Variation 5j': f"{change_pct:.2f}%",
+                    'Direction': '📈' if change_pct > 0 else '📉' if change_pct < 0 else '➡️'
+                })
+        except:
+            pass
+    
+    if comparison_data:
+        df_comparison = pd.DataFrame(comparison_data)
+        st.dataframe(df_comparison, use_container_width=True)
+    
+    render_breadth()
+
+    # Notes sur les indices chinois
+    with st.expander("ℹ️ À propos des indices chinois"):
+        # Séances du jour converties dans le fuseau d'affichage (heure d'été comprise)
+        morning, afternoon = [
+            f"{start.strftime('%H:%M')}-{end.strftime('%H:%M')}"
+            for start, end in timezones.session_hours(CHINA, tz)
+        ]
+        st.markdown(f"""
+        **Principaux indices chinois:**
+        
+        - **Shanghai Composite (SSE)** : Toutes les actions A de la bourse de Shanghai
+        - **Shenzhen Composite (SZSE)** : Toutes les actions A de la bourse de Shenzhen
+        - **Hang Seng Index (HSI)** : Principales actions de Hong Kong
+        - **CSI 300** : 300 plus grandes actions A (Shanghai et Shenzhen)
+        - **ChiNext** : Actions de croissance et startups à Shenzhen
+        - **HSCE** (H-shares) : Entreprises chinoises cotées à Hong Kong
+        
+        **Horaires de trading (heure locale Chine - {timezones.offset_label(CHINA_TIMEZONE)}):**
+        - Shanghai/Shenzhen: 09:30-11:30, 13:00-15:00
+        - Hong Kong: 09:30-12:00, 13:00-16:00
+        
+        **Correspondance en heure {tz.zone} ({TZ_LABEL}):**
+        - Session matin: {morning}
+        - Session après-midi: {afternoon}
+        """)
+
+
+def render_breadth():
+    """Carte de chaleur des membres et largeur du marché, chargées à la demande"""
+    st.markdown("### 🗺️ Composition et largeur du marché")
+    # Seuls les indices dont la liste des membres est assez complète sont proposés
+    offered = breadth.available()
+    if not offered:
+        st.info("ℹ️ Aucune composition d'indice chargée (TRACKER_CONSTITUENTS_CSV)")
+        return
+    col_b1, col_b2 = st.columns([2, 1])
+    with col_b2:
+        breadth_index = st.selectbox(
+            "Indice",
+            options=list(offered),
+            format_func=lambda x: f"{offered[x]} ({x})",
+            key='breadth_index'
+        )
+    with col_b1:
+        # Plusieurs centaines de membres : rien n'est téléchargé sans demande
+        show = st.toggle("Afficher la carte des membres", value=False, key='breadth_show')
+    if not show:
+        return
+
+    try:
+        with metrics.span('breadth'):
+            result = breadth.run(breadth_index)
+    except Exception as e:
+        st.error(f"Erreur lors du chargement des membres: {str(e)}")
+        return
+    if result is None:
+        st.info("ℹ️ Aucune donnée disponible pour les membres de cet indice")
+        return
+
+    day = result['breadth']
+    official = breadth.MEMBER_COUNTS.get(breadth_index)
+    col_m0, col_m1, col_m2, col_m3, col_m4 = st.columns(5)
+    col_m0.metric("Membres couverts", f"{day['Membres']} / {official}" if official else day['Membres'])
+    col_m1.metric("Hausses / Baisses", f"{day['Hausses']} / {day['Baisses']}")
+    col_m2.metric("Nouveaux plus hauts 52s", day['Nouveaux plus hauts'])
+    col_m3.metric("Nouveaux plus bas 52s", day['Nouveaux plus bas'])
+    col_m4.metric("% > MA50", f"{day['% > MA50']:.1f}%")
+    if official and day['Membres'] < official:
+        # Liste indicative : la largeur ne vaut que pour les membres listés
+        st.caption(f"⚠️ Liste partielle : largeur calculée sur {day['Membres']} des {official} membres du "
+                   f"{breadth.INDICES[breadth_index]}, pas sur l'indice entier. La composition officielle "
+                   f"se charge avec TRACKER_CONSTITUENTS_CSV.")
+
+    members = result['members']
+    figure_span = metrics.span('figure_build').start()
+    fig_map = go.Figure(go.Treemap(
+        labels=[f"{name}<br>{change:+.2f}%" for name, change in zip(members['Nom'], members['Variation %'].fillna(0))],
+        parents=[""] * len(members),
+        values=members['Taille'],
+        customdata=members['Symbole'],
+        marker=dict(
+            colors=members['Variation %'].fillna(0).clip(-5, 5),
+            colorscale=[[0, '#ef553b'], [0.5, '#f2f2f2'], [1, '#00cc96']],
+            cmid=0, cmin=-5, cmax=5,
+            colorbar=dict(title="Var. %")
+        ),
+        hovertemplate="%{customdata}<br>%{label}<extra></extra>"
+    ))
+    fig_map.update_layout(
+        title=f"{breadth.INDICES[breadth_index]} - variation du jour (taille : {result['sizing'].lower()})",
+        height=500,
+        margin=dict(t=50, l=10, r=10, b=10)
+    )
+
+    history = result['history']
+    fig_breadth = go.Figure()
+    fig_breadth.add_trace(go.Scatter(
+        x=history.index, y=history['Avance/déclin cumulé'],
+        mode='lines', name="Avance/déclin cumulé",
+        line=dict(color='#1f77b4', width=2)
+    ))
+    fig_breadth.add_trace(go.Scatter(
+        x=history.index, y=history['% > MA50'],
+        mode='lines', name="% > MA50", yaxis='y2',
+        line=dict(color='#ff7f0e', width=1.5)
+    ))
+    fig_breadth.update_layout(
+        title="Largeur du marché",
+        xaxis_title="Date",
+        yaxis=dict(title="Avance/déclin cumulé"),
+        yaxis2=dict(title="% > MA50", overlaying='y', side='right', range=[0, 100]),
+        height=350,
+        template='plotly_white'
+    )
+    figure_span.stop()
+
+    with metrics.span('chart_render'):
+        st.plotly_chart(fig_map, use_container_width=True)
+        st.plotly_chart(fig_breadth, use_container_width=True)
+
+    with st.expander(f"📋 Membres ({day['Membres']})"):
+        st.dataframe(
+            members.sort_values('Variation %', ascending=False),
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                'Cours': st.column_config.NumberColumn(format="%.2f"),
+                'Variation %': st.column_config.NumberColumn(format="%+.2f%%"),
+                'Taille': st.column_config.NumberColumn(format="%.3e"),
+            }
+        )
+
+    caption = f"Séance du {result['date'].strftime('%Y-%m-%d')} · taille des cases : {result['sizing'].lower()}"
+    if result['missing']:
+        caption += f" · sans données : {', '.join(result['missing'][:10])}"
+        if len(result['missing']) > 10:
+            caption += f" (+{len(result['missing']) - 10})"
+    st.caption(caption)
@@ -0,0 +1,111 @@
+"""📧 Notifications email : configuration SMTP et envoi des alertes.
+
+smtplib et les modules MIME ne sont chargés qu'à l'import de ce module
+(ouverture de la section, ou première alerte à envoyer). Le mot de passe
+SMTP n'est jamais enregistré : il vient de st.secrets["smtp"]["password"]
+ou de TRACKER_SMTP_PASSWORD, sinon de la saisie, gardée dans la session.
+"""
+import os
+import smtplib
+from datetime import datetime
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+import pytz
+import streamlit as st
+
+from tracker import timezones
+from tracker.storage import storage
+
+
+def smtp_password():
+    """Mot de passe SMTP : secrets du déploiement, sinon saisi pendant la session"""
+    try:
+        return st.secrets["smtp"]["password"]
+    except Exception:
+        pass  # pas de secrets configurés
+    return os.environ.get('TRACKER_SMTP_PASSWORD') or st.session_state.get('smtp_password', '')
+
+
+def send_email_alert(subject, body, to_email):
+    """Envoie une notification par email"""
+    if not st.session_state.email_config['enabled']:
+        return False
+    
+    try:
+        msg = MIMEMultipart()
+        msg['From'] = st.session_state.email_config['email']
+        msg['To'] = to_email
+        msg['Subject'] = subject
+        msg.attach(MIMEText(body, 'html'))
+        
+        server = smtplib.SMTP(
+            st.session_state.email_config['smtp_server'], 
+            st.session_state.email_config['smtp_port']
+        )
+        server.starttls()
+        server.login(st.session_state.email_config['email'], smtp_password())
+        server.send_message(msg)
+        server.quit()
+        return True
+    except Exception as e:
+        st.error(f"Erreur d'envoi: {e}")
+        return False
+
+
+def render(page):
+    tz = page['tz']
+    st.subheader("📧 Configuration des notifications email")
+    
+    with st.form("email_config_form"):
+        enabled = st.checkbox("Activer les notifications email", value=st.session_state.email_config['enabled'])
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            smtp_server = st.text_input("Serveur SMTP", value=st.session_state.email_config['smtp_server'])
+            smtp_port = st.number_input("Port SMTP", value=st.session_state.email_config['smtp_port'])
+        
+        with col2:
+            email = st.text_input("Adresse email", value=st.session_state.email_config['email'])
+            password = st.text_input(
+                "Mot de passe", type="password",
+                placeholder="••••••••" if smtp_password() else "",
+                help="Jamais enregistré : gardé pour cette session seulement"
+            )
+        
+        test_email = st.text_input("Email de test (optionnel)")
+        
+        col_btn1, col_btn2 = st.columns(2)
+        with col_btn1:
+            if st.form_submit_button("💾 Sauvegarder"):
+                st.session_state.email_config = {
+                    'enabled': enabled,
+                    'smtp_server': smtp_server,
+                    'smtp_port': smtp_port,
+                    'email': email
+                }
+                if password:
+                    st.session_state.smtp_password = password
+                if page['authenticated']:
+                    storage.set_email_config(page['user'], st.session_state.email_config)
+                    st.success("Configuration sauvegardée !")
+                else:
+                    st.success("Configuration gardée pour cette session (connectez-vous pour l'enregistrer)")
+        
+        with col_btn2:
+            if st.form_submit_button("📨 Tester"):
+                if test_email:
+                    if send_email_alert(
+                        "Test de notification",
+                        f"<h2>Ceci est un test</h2><p>Votre configuration email fonctionne correctement !</p><p>Heure d'envoi : {timezones.format_time(datetime.now(pytz.UTC), tz)}</p>",
+                        test_email
+                    ):
+                        st.success("Email de test envoyé !")
+                    else:
+                        st.error("Échec de l'envoi")
+    
+    # Aperçu de la configuration
+    with st.expander("📋 Aperçu de la configuration"):
+        st.json(st.session_state.email_config)
+        st.caption("Mot de passe SMTP : " + ("défini" if smtp_password() else "non défini") +
+                   " (st.secrets, TRACKER_SMTP_PASSWORD ou saisie de la session, jamais enregistré)")
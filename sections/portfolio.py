@@ -0,0 +1,383 @@
+"""💰 Portefeuille virtuel : positions, performance, risque, allocation et répartition."""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objs as go
+import pytz
+import streamlit as st
+
+from tracker import allocation, feed, metrics, performance, risk, timezones
+from tracker.storage import storage
+from tracker.symbols import symbol_master
+from tracker.universe import REPORTING_CURRENCY, get_exchange
+
+
+def _has_bars(symbol):
+    """Vrai si des barres journalières récentes existent pour `symbol`"""
+    try:
+        bars = feed.get_bars(symbol, '1mo', '1d')
+    except Exception:
+        return False
+    return bars is not None and not bars.empty
+
+
+def render(page):
+    tz = page['tz']
+    st.subheader("💰 Gestion de portefeuille virtuel - Actions Chine")
+    
+    col1, col2 = st.columns([2, 1])
+    
+    with col2:
+        st.markdown("### ➕ Ajouter une position")
+        with st.form("add_position"):
+            symbol_pf = st.text_input("Symbole", value="600519.SS").upper()
+            
+            # Aide sur les suffixes
+            st.caption("""
+            Suffixes valides:
+            - .SS (Shanghai)
+            - .SZ (Shenzhen) 
+            - .HK (Hong Kong)
+            """)
+            
+            shares = st.number_input("Nombre d'actions", min_value=0.01, step=0.01, value=1.0)
+            buy_price = st.number_input("Prix d'achat", min_value=0.01, step=0.01, value=100.0)
+            
+            if st.form_submit_button("Ajouter au portefeuille"):
+                resolved, known = symbol_master.resolve(symbol_pf)
+                if resolved is None:
+                    st.error(f"❌ Symbole invalide : {symbol_pf}")
+                elif shares > 0:
+                    symbol_pf = resolved
+                    if not known:
+                        st.warning(f"⚠️ {symbol_pf} absent du référentiel")
+                    # Hors référentiel : ajouté seulement si Yahoo renvoie des cours
+                    if known or _has_bars(symbol_pf):
+                        storage.add_position(page['user'], symbol_pf, {
+                            'shares': shares,
+                            'buy_price': buy_price,
+                            'date': timezones.format_time(datetime.now(pytz.UTC), tz)
+                        })
+                        st.session_state.portfolio = storage.portfolio(page['user'])
+                        st.success(f"✅ {shares} actions {symbol_pf} ajoutées")
+                    else:
+                        st.error(f"❌ Aucune donnée pour {symbol_pf} : position non ajoutée")
+    
+    with col1:
+        st.markdown("### 📊 Performance du portefeuille")
+        
+        if st.session_state.portfolio:
+            portfolio_data = []
+            total_value = 0
+            total_cost = 0
+            
+            portfolio_span = metrics.span('portfolio_loop').start()
+            # Un seul appel groupé pour toutes les positions
+            try:
+                pf_quotes = feed.get_quotes(list(st.session_state.portfolio))
+            except Exception as e:
+                st.warning(f"Impossible de charger les cours: {str(e)}")
+                pf_quotes = {}
+            
+            for symbol_pf, positions in st.session_state.portfolio.items():
+                try:
+                    current = pf_quotes[symbol_pf]['price'] if symbol_pf in pf_quotes else 0
+                    
+                    exchange = get_exchange(symbol_pf)
+                    
+                    for pos in positions:
+                        shares = pos['shares']
+                        buy_price = pos['buy_price']
+                        cost = shares * buy_price
+                        value = shares * current
+                        profit = value - cost
+                        profit_pct = (profit / cost * 100) if cost > 0 else 0
+                        
+                        total_cost += cost
+                        total_value += value
+                        
+                        # Formater selon la devise
+                        if symbol_pf.endswith('.HK'):
+                            currency = 'HK$'
+                        elif symbol_pf.endswith(('.SS', '.SZ')):
+                            currency = '¥'
+                        else:
+                            currency = '$'
+                        
+                        portfolio_data.append({
+                            'Symbole': symbol_pf,
+                            'Marché': exchange,
+                            'Actions': shares,
+                            "Prix d'achat": f"{currency}{buy_price:.2f}",
+                            'Prix actuel': f"{currency}{current:.2f}",
+                            'Valeur': f"{currency}{value:,.2f}",
+                            'Profit': f"{currency}{profit:,.2f}",
+                            'Profit %': f"{profit_pct:.1f}%"
+                        })
+                except Exception as e:
+                    st.warning(f"Impossible de charger {symbol_pf}: {str(e)}")
+            portfolio_span.stop()
+            
+            if portfolio_data:
+                # Métriques globales
+                total_profit = total_value - total_cost
+                total_profit_pct = (total_profit / total_cost * 100) if total_cost > 0 else 0
+                
+                col1_1, col1_2, col1_3 = st.columns(3)
+                col1_1.metric("Valeur totale", f"${total_value:,.2f}")
+                col1_2.metric("Coût total", f"${total_cost:,.2f}")
+                col1_3.metric(
+                    "Profit total",
+                    f"${total_profit:,.2f}",
+                    delta=f"{total_profit_pct:.1f}%"
+                )
+                
+                # Tableau des positions
+                st.markdown("### 📋 Positions détaillées")
+                df_portfolio = pd.DataFrame(portfolio_data)
+                st.dataframe(df_portfolio, use_container_width=True)
+                
+                render_history(st.session_state.portfolio)
+                render_risk(st.session_state.portfolio)
+                render_allocation(st.session_state.portfolio, st.session_state.watchlist)
+                
+                # Graphique de répartition
+                try:
+                    fig_pie = px.pie(
+                        names=[p['Symbole'] for p in portfolio_data],
+                        values=[float(p['Valeur'].split('$')[-1].replace(',', '')) if '$' in p['Valeur'] 
+                                else float(p['Valeur'].split('¥')[-1].replace(',', '')) for p in portfolio_data],
+                        title="Répartition du portefeuille"
+                    )
+                    st.plotly_chart(fig_pie)
+                    
+                    # Répartition par marché
+                    st.markdown("### 🏢 Répartition par marché")
+                    market_dist = {}
+                    for p in portfolio_data:
+                        market = p['Marché']
+                        value = float(p['Valeur'].split('$')[-1].replace(',', '')) if '$' in p['Valeur'] \
+                                else float(p['Valeur'].split('¥')[-1].replace(',', ''))
+                        market_dist[market] = market_dist.get(market, 0) + value
+                    
+                    if market_dist:
+                        fig_market = px.bar(
+                            x=list(market_dist.keys()),
+                            y=list(market_dist.values()),
+                            title="Valeur par marché",
+                            labels={'x': 'Marché', 'y': 'Valeur (USD)'}
+                        )
+                        st.plotly_chart(fig_market)
+                except:
+                    st.warning("Impossible de générer les graphiques")
+                
+                # Bouton pour vider le portefeuille
+                if st.button("🗑️ Vider le portefeuille"):
+                    storage.clear_portfolio(page['user'])
+                    st.rerun()
+            else:
+                st.info("Aucune donnée de performance disponible")
+        else:
+            st.info("Aucune position dans le portefeuille. Ajoutez des actions chinoises pour commencer !")
+
+
+def render_history(portfolio):
+    """Courbe de valeur, P&L quotidien, drawdown et apports depuis chaque achat"""
+    st.markdown("### 📈 Performance historique")
+    with metrics.span('portfolio_history'):
+        try:
+            # Un seul téléchargement groupé pour les symboles absents du cache
+            bars = feed.get_bars_many(list(portfolio) + performance.fx_symbols(portfolio),
+                                      performance.history_period(portfolio), '1d')
+            history = performance.portfolio_history(portfolio, bars)
+        except Exception as e:
+            st.warning(f"Historique indisponible: {str(e)}")
+            return
+    if history is None:
+        st.info("Aucun historique disponible pour ces positions")
+        return
+    curve = history['curve']
+    missing = [symbol for symbol in portfolio if symbol not in history['symbols'].index]
+    if missing:
+        st.caption(f"Sans historique : {', '.join(missing)}")
+    st.caption(f"Valeur, P&L et drawdown en {REPORTING_CURRENCY} (cours au taux de change du jour, achats au taux "
+               "du jour d'achat) ; apports par marché et par symbole dans la devise de chaque place")
+    if history['unconverted']:
+        st.warning(f"⚠️ Taux de change indisponible, exclus de la courbe : {', '.join(history['unconverted'])}")
+
+    figure_span = metrics.span('figure_build').start()
+    fig_equity = go.Figure()
+    fig_equity.add_trace(go.Scatter(x=curve.index, y=curve['equity'], mode='lines', name='Valeur',
+                                    line=dict(color='#c41e3a', width=2)))
+    fig_equity.add_trace(go.Scatter(x=curve.index, y=curve['invested'], mode='lines', name='Investi',
+                                    line=dict(color='gray', width=1, dash='dash')))
+    fig_equity.update_layout(title="Valeur du portefeuille", yaxis_title=f"Valeur ({REPORTING_CURRENCY})", height=400,
+                             hovermode='x unified', template='plotly_white')
+
+    fig_pnl = go.Figure()
+    fig_pnl.add_trace(go.Bar(x=curve.index, y=curve['daily_pnl'], name='P&L du jour',
+                             marker_color=['#00cc96' if v >= 0 else '#ef553b' for v in curve['daily_pnl']]))
+    fig_pnl.add_trace(go.Scatter(x=curve.index, y=curve['drawdown'], mode='lines', name='Drawdown %',
+                                 yaxis='y2', fill='tozeroy', line=dict(color='purple', width=1)))
+    fig_pnl.update_layout(title="P&L quotidien et drawdown", yaxis_title=f"P&L ({REPORTING_CURRENCY})",
+                          yaxis2=dict(title="Drawdown %", overlaying='y', side='right', showgrid=False),
+                          height=350, hovermode='x unified', template='plotly_white')
+
+    markets = history['markets']
+    fig_markets = go.Figure()
+    for market in markets.columns:
+        fig_markets.add_trace(go.Scatter(x=markets.index, y=markets[market], mode='lines', name=market))
+    fig_markets.update_layout(title="Apport au P&L par marché", yaxis_title="P&L", height=350,
+                              hovermode='x unified', template='plotly_white')
+
+    contributions = history['symbols'].sort_values()
+    fig_symbols = px.bar(x=contributions.to_numpy(), y=contributions.index, orientation='h',
+                         title="Apport au P&L par symbole", labels={'x': 'P&L', 'y': 'Symbole'})
+    fig_symbols.update_layout(height=max(300, 22 * len(contributions)), template='plotly_white')
+    figure_span.stop()
+
+    col_1, col_2, col_3 = st.columns(3)
+    col_1.metric(f"P&L cumulé ({REPORTING_CURRENCY})", f"{curve['pnl'].iloc[-1]:,.2f}")
+    col_2.metric(f"P&L du jour ({REPORTING_CURRENCY})", f"{curve['daily_pnl'].iloc[-1]:,.2f}")
+    col_3.metric("Drawdown max", f"{curve['drawdown'].min():.1f}%")
+    with metrics.span('chart_render'):
+        st.plotly_chart(fig_equity, use_container_width=True)
+        st.plotly_chart(fig_pnl, use_container_width=True)
+        col_m, col_s = st.columns(2)
+        with col_m:
+            st.plotly_chart(fig_markets, use_container_width=True)
+        with col_s:
+            st.plotly_chart(fig_symbols, use_container_width=True)
+
+
+RISK_METHODS = {
+    "Bootstrap historique": 'bootstrap',
+    "Gaussien corrélé": 'gaussian',
+    "Student-t corrélé": 'student',
+}
+
+
+def render_risk(portfolio):
+    """VaR et Expected Shortfall par marché (simulation Monte Carlo à la demande)"""
+    st.markdown("### ⚠️ Risque (VaR / Expected Shortfall)")
+    with st.form("risk_form"):
+        col_1, col_2, col_3 = st.columns(3)
+        with col_1:
+            method = st.selectbox("Modèle", list(RISK_METHODS))
+            lookback = st.selectbox("Historique des rendements", ["6mo", "1y", "2y", "5y"], index=1)
+        with col_2:
+            horizon = st.number_input("Horizon (jours de bourse)", min_value=1, max_value=60, value=1)
+            confidence = st.selectbox("Niveau de confiance", [0.95, 0.99, 0.995], index=1)
+        with col_3:
+            paths = st.selectbox("Trajectoires", [10_000, 100_000, 1_000_000], index=1)
+            seed = st.number_input("Graine aléatoire", min_value=0, value=42, step=1)
+        if st.form_submit_button("🎲 Lancer la simulation"):
+            with metrics.span('risk_simulation'):
+                try:
+                    bars = feed.get_bars_many(list(portfolio) + performance.fx_symbols(portfolio), lookback, '1d')
+                    result = risk.risk_report(portfolio, bars, int(horizon), paths, RISK_METHODS[method],
+                                              confidence, int(seed))
+                except Exception as e:
+                    st.warning(f"Simulation impossible: {str(e)}")
+                    result = None
+            if result is not None:
+                st.session_state.risk_result = {
+                    'portfolio': portfolio,
+                    'label': f"{method}, {int(horizon)} j, {confidence:.1%}, {paths:,} trajectoires, "
+                             f"historique {lookback}, graine {int(seed)}",
+                    'report': result[0],
+                    # Histogramme calculé une fois : les P&L simulés ne sont pas conservés
+                    'histogram': np.histogram(result[1], bins=100) if result[1] is not None else None,
+                    'var': result[0].loc[risk.TOTAL, 'VaR'] if result[1] is not None else None,
+                }
+
+    result = st.session_state.get('risk_result')
+    if result is None or result['portfolio'] != portfolio:
+        st.caption("Choisir les paramètres puis lancer la simulation")
+        return
+    st.caption(result['label'] + f" — montants dans la devise de chaque place, total en {REPORTING_CURRENCY} "
+               "au dernier taux de change")
+    st.dataframe(result['report'].style.format({
+        'Valeur': '{:,.2f}', 'VaR': '{:,.2f}', 'ES': '{:,.2f}', 'VaR %': '{:.2f}%', 'ES %': '{:.2f}%',
+    }), use_container_width=True)
+    if result['histogram'] is None:
+        st.warning(f"⚠️ Taux de change indisponible : pas de total en {REPORTING_CURRENCY}, risque par marché seulement")
+        return
+    counts, edges = result['histogram']
+    fig_risk = go.Figure(go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, name='Trajectoires',
+                                marker_color='lightgray'))
+    fig_risk.add_vline(x=-result['var'], line_color='#ef553b', line_dash='dash', annotation_text="VaR")
+    fig_risk.update_layout(title=f"Distribution du P&L simulé (total, {REPORTING_CURRENCY})",
+                           xaxis_title=f"P&L ({REPORTING_CURRENCY})", yaxis_title="Trajectoires",
+                           height=350, template='plotly_white', bargap=0)
+    st.plotly_chart(fig_risk, use_container_width=True)
+
+
+MARKETS = ['Shanghai', 'Shenzhen', 'Hong Kong', 'US Listed']
+
+
+def render_allocation(portfolio, watchlist):
+    """Allocations optimales (variance minimale, Sharpe maximal, parité de risque) et frontière efficiente"""
+    st.markdown("### 🧮 Optimisation de l'allocation")
+    with st.form("allocation_form"):
+        col_1, col_2 = st.columns(2)
+        with col_1:
+            include_watchlist = st.checkbox("Inclure la watchlist", value=True)
+            lookback = st.selectbox("Historique", ["6mo", "1y", "2y", "5y"], index=1, key='allocation_lookback')
+            risk_free = st.number_input("Taux sans risque (%/an)", min_value=0.0, max_value=20.0, value=2.0, step=0.25)
+        with col_2:
+            st.caption("Poids maximal par marché (%)")
+            caps = {market: st.number_input(market, min_value=0, max_value=100, value=100, step=5,
+                                            key=f"cap_{market}") / 100
+                    for market in MARKETS}
+        submitted = st.form_submit_button("🧮 Optimiser")
+    if submitted:
+        symbols = list(dict.fromkeys(list(portfolio) + (list(watchlist) if include_watchlist else [])))
+        with metrics.span('allocation'):
+            try:
+                bars = feed.get_bars_many(symbols, lookback, '1d')
+                current = {symbol: sum(p['shares'] for p in portfolio[symbol]) * float(bars[symbol]['Close'].iloc[-1])
+                           for symbol in portfolio if symbol in bars}
+                result = allocation.optimize(bars, symbols, caps, risk_free / 100, current)
+            except ValueError as e:
+                st.warning(str(e))
+                result = None
+            except Exception as e:
+                st.warning(f"Optimisation impossible: {str(e)}")
+                result = None
+        if result is None:
+            st.session_state.pop('allocation_result', None)
+        else:
+            st.session_state.allocation_result = dict(result, portfolio=portfolio)
+
+    result = st.session_state.get('allocation_result')
+    if result is None or result['portfolio'] != portfolio:
+        st.caption("Au moins deux symboles avec historique sont nécessaires ; lancer l'optimisation")
+        return
+    st.caption(f"Covariance rétrécie (Ledoit-Wolf, intensité {result['shrinkage']:.2f}) ; "
+               "rendements et volatilités annualisés")
+    st.dataframe(result['stats'].style.format({'Rendement': '{:.1%}', 'Volatilité': '{:.1%}', 'Sharpe': '{:.2f}'}),
+                 use_container_width=True)
+
+    fig_frontier = go.Figure()
+    curve = result['frontier']
+    fig_frontier.add_trace(go.Scatter(x=curve['Volatilité'] * 100, y=curve['Rendement'] * 100, mode='lines',
+                                      name='Frontière efficiente', line=dict(color='#c41e3a', width=2)))
+    stats = result['stats']
+    fig_frontier.add_trace(go.Scatter(x=stats['Volatilité'] * 100, y=stats['Rendement'] * 100, mode='markers+text',
+                                      text=stats.index, textposition='top center', name='Portefeuilles',
+                                      marker=dict(size=10, color='#636efa')))
+    fig_frontier.update_layout(title="Frontière efficiente", xaxis_title="Volatilité (%/an)",
+                               yaxis_title="Rendement (%/an)", height=400, template='plotly_white')
+    st.plotly_chart(fig_frontier, use_container_width=True)
+
+    col_m, col_s = st.columns([1, 2])
+    with col_m:
+        st.markdown("**Poids par marché**")
+        st.dataframe(result['markets'].style.format('{:.1%}'), use_container_width=True)
+    with col_s:
+        st.markdown("**Poids par symbole**")
+        weights = result['weights']
+        st.dataframe(weights[weights.max(axis=1) > 0.0005].style.format('{:.1%}'), use_container_width=True)
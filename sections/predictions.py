@@ -0,0 +1,184 @@
+"""🤖 Prédictions ML : régression polynomiale sur l'historique.
+
+scikit-learn (l'import le plus lourd de l'application) n'est chargé qu'à la
+première ouverture de cette section.
+"""
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objs as go
+import streamlit as st
+from sklearn.linear_model import LinearRegression
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import PolynomialFeatures
+
+from sections.common import CHINA_TIMEZONE
+from tracker import metrics, timezones
+from tracker.universe import format_currency
+
+
+def render(page):
+    symbol, hist, current_price = page['symbol'], page['hist'], page['current_price']
+    tz, TZ_LABEL = page['tz'], page['tz_label']
+    st.subheader("🤖 Prédictions avec Machine Learning - Actions Chine")
+    
+    if hist is not None and not hist.empty and len(hist) > 30:
+        st.markdown("### Modèle de prédiction (Régression polynomiale)")
+        
+        # Note sur les marchés chinois
+        st.info(f"""
+        ⚠️ Les prédictions pour les actions chinoises doivent tenir compte des spécificités du marché:
+        - Vacances chinoises (Nouvel An, Fête nationale, etc.)
+        - Régulations gouvernementales
+        - Volatilité des marchés émergents
+        - Décalage horaire ({TZ_LABEL} vs {timezones.offset_label(CHINA_TIMEZONE)})
+        """)
+        
+        # Préparation des données
+        df_pred = hist[['Close']].reset_index()
+        df_pred['Days'] = (df_pred['Date'] - df_pred['Date'].min()).dt.days
+        
+        X = df_pred['Days'].values.reshape(-1, 1)
+        y = df_pred['Close'].values
+        
+        # Configuration de la prédiction
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            days_to_predict = st.slider("Jours à prédire", min_value=1, max_value=30, value=7)
+            degree = st.slider("Degré du polynôme", min_value=1, max_value=5, value=2)
+        
+        with col2:
+            st.markdown("### Options")
+            show_confidence = st.checkbox("Afficher l'intervalle de confiance", value=True)
+        
+        # Entraînement du modèle
+        model = make_pipeline(
+            PolynomialFeatures(degree=degree),
+            LinearRegression()
+        )
+        with metrics.span('model_fit'):
+            model.fit(X, y)
+        
+        # Prédictions
+        last_day = X[-1][0]
+        future_days = np.arange(last_day + 1, last_day + days_to_predict + 1).reshape(-1, 1)
+        predictions = model.predict(future_days)
+        
+        # Dates futures, affichées dans le fuseau de l'utilisateur
+        last_date = df_pred['Date'].iloc[-1]
+        future_dates = list(timezones.chart_times(
+            [last_date + timedelta(days=i+1) for i in range(days_to_predict)], tz
+        ))
+        
+        # Visualisation
+        figure_span = metrics.span('figure_build').start()
+        fig_pred = go.Figure()
+        
+        # Données historiques
+        fig_pred.add_trace(go.Scatter(
+            x=timezones.chart_times(df_pred['Date'], tz),
+            y=y,
+            mode='lines',
+            name='Historique',
+            line=dict(color='blue')
+        ))
+        
+        # Prédictions
+        fig_pred.add_trace(go.Scatter(
+            x=future_dates,
+            y=predictions,
+            mode='lines+markers',
+            name='Prédictions',
+            line=dict(color='red', dash='dash'),
+            marker=dict(size=8)
+        ))
+        
+        # Intervalle de confiance (simulé)
+        if show_confidence:
+            residuals = y - model.predict(X)
+            std_residuals = np.std(residuals)
+            
+            upper_bound = predictions + 2 * std_residuals
+            lower_bound = predictions - 2 * std_residuals
+            
+            fig_pred.add_trace(go.Scatter(
+                x=future_dates + future_dates[::-1],
+                y=np.concatenate([upper_bound, lower_bound[::-1]]),
+                fill='toself',
+                fillcolor='rgba(255,0,0,0.2)',
+                line=dict(color='rgba(255,0,0,0)'),
+                name='Intervalle de confiance (95%)'
+            ))
+        
+        fig_pred.update_layout(
+            title=f"Prédictions pour {symbol} - {days_to_predict} jours (heure {tz.zone})",
+            xaxis_title=f"Date ({tz.zone})",
+            yaxis_title="Prix",
+            hovermode='x unified',
+            template='plotly_white'
+        )
+        
+        figure_span.stop()
+        
+        with metrics.span('chart_render'):
+            st.plotly_chart(fig_pred, use_container_width=True)
+        
+        # Tableau des prédictions
+        st.markdown("### 📋 Prédictions détaillées")
+        pred_df = pd.DataFrame({
+            f'Date ({tz.zone})': [d.strftime('%Y-%m-%d') for d in future_dates],
+            'Prix prédit': [format_currency(p, symbol) for p in predictions],
+            'Variation %': [f"{(p/current_price - 1)*100:.2f}%" for p in predictions]
+        })
+        st.dataframe(pred_df, use_container_width=True)
+        
+        # Métriques de performance
+        st.markdown("### 📊 Performance du modèle")
+        residuals = y - model.predict(X)
+        mse = np.mean(residuals**2)
+        rmse = np.sqrt(mse)
+        mae = np.mean(np.abs(residuals))
+        
+        col_m1, col_m2, col_m3 = st.columns(3)
+        col_m1.metric("RMSE", f"{format_currency(rmse, symbol)}")
+        col_m2.metric("MAE", f"{format_currency(mae, symbol)}")
+        col_m3.metric("R²", f"{model.score(X, y):.3f}")
+        
+        # Analyse des tendances
+        st.markdown("### 📈 Analyse des tendances")
+        last_price = current_price
+        last_pred = predictions[-1]
+        trend = "HAUSSIÈRE 📈" if last_pred > last_price else "BAISSIÈRE 📉" if last_pred < last_price else "NEUTRE ➡️"
+        
+        if last_pred > last_price * 1.05:
+            strength = "Forte tendance haussière 🚀"
+        elif last_pred > last_price:
+            strength = "Légère tendance haussière 📈"
+        elif last_pred < last_price * 0.95:
+            strength = "Forte tendance baissière 🔻"
+        elif last_pred < last_price:
+            strength = "Légère tendance baissière 📉"
+        else:
+            strength = "Tendance latérale ⏸️"
+        
+        st.info(f"**Tendance prévue:** {trend} - {strength}")
+        
+        # Facteurs spécifiques Chine
+        with st.expander("🇨🇳 Facteurs influençant les marchés chinois"):
+            st.markdown("""
+            **Facteurs macroéconomiques:**
+            - Politique monétaire de la PBOC
+            - Régulations gouvernementales (technologie, éducation, immobilier)
+            - Tensions commerciales US-Chine
+            - Données économiques (PIB, PMI, exportations)
+            
+            **Calendrier des résultats:**
+            - Saison des résultats: avril, août, octobre
+            - Vacances chinoises importantes
+            - Congrès du Parti (tous les 5 ans)
+            """)
+        
+    else:
+        st.warning(f"Pas assez de données historiques pour {symbol} (minimum 30 points)")
@@ -0,0 +1 @@
+"""Moteur de données du Tracker Bourse Chine (séances, barres, cache)."""
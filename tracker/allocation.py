@@ -0,0 +1,235 @@
+"""Optimisation de l'allocation : variance minimale, Sharpe maximal, parité de risque.
+
+Rendements espérés et covariance viennent des clôtures journalières alignées
+(performance.align_closes) ; la covariance est rétrécie vers une matrice
+identité mise à l'échelle (Ledoit-Wolf), ce qui la garde bien conditionnée
+quand il y a presque autant de symboles que de jours.
+
+Contraintes : positions longues uniquement, somme des poids à 1, et plafond
+de poids par marché. Tous les problèmes moyenne-variance sont résolus par
+gradient projeté accéléré (FISTA) sur un lot de portefeuilles à la fois :
+chaque ligne de la matrice des poids est un point de la frontière, et une
+itération coûte un seul produit matriciel pour tout le lot.
+"""
+import numpy as np
+import pandas as pd
+
+from tracker.performance import align_closes
+from tracker.universe import get_exchange
+
+TRADING_DAYS = 252
+# Points de la frontière efficiente
+FRONTIER_POINTS = 50
+# Itérations maximales et tolérance du gradient projeté
+MAX_ITERATIONS = 2000
+TOLERANCE = 1e-9
+# Itérations de bissection de la projection, avant le pas de Newton final
+_BISECTIONS = 20
+
+
+def shrunk_covariance(returns):
+    """(covariance de Ledoit-Wolf, intensité du rétrécissement) de rendements jours × symboles"""
+    centered = returns - returns.mean(axis=0)
+    days, symbols = centered.shape
+    sample = centered.T @ centered / days
+    target = np.trace(sample) / symbols
+    distance = np.sum((sample - target * np.eye(symbols)) ** 2)
+    # Dispersion de l'estimateur : moyenne des ||x x' - S||² sur les jours
+    norms = np.sum(centered ** 2, axis=1)
+    spread = (np.sum(norms ** 2) / days - np.sum(sample ** 2)) / days
+    shrinkage = 0.0 if distance == 0 else min(spread, distance) / distance
+    return shrinkage * target * np.eye(symbols) + (1 - shrinkage) * sample, shrinkage
+
+
+def estimate(closes, periods=TRADING_DAYS):
+    """Rendements espérés et covariance annualisés (log-rendements) de clôtures jours × symboles"""
+    returns = np.diff(np.log(closes), axis=0)
+    covariance, shrinkage = shrunk_covariance(returns)
+    return returns.mean(axis=0) * periods, covariance * periods, shrinkage
+
+
+class Constraints:
+    """Poids positifs, de somme 1, et somme par groupe (marché) plafonnée"""
+
+    def __init__(self, groups, caps):
+        self.groups = [np.flatnonzero(groups[:, g]) for g in range(groups.shape[1])]
+        self.caps = np.asarray(caps, dtype=np.float64)
+        self._group_of = np.argmax(groups, axis=1)
+        if self.caps.sum() < 1 - 1e-12:
+            raise ValueError("Les plafonds par marché doivent totaliser au moins 100 %")
+
+    def project(self, values):
+        """Projection euclidienne de chaque ligne de `values` sur l'ensemble admissible.
+
+        Chaque groupe reçoit max(v - seuil, 0) avec un seuil commun θ, relevé
+        dans les groupes qui dépasseraient leur plafond au seuil propre qui
+        les ramène exactement au plafond. θ s'obtient par bissection, puis un
+        pas de Newton exact sur le morceau linéaire atteint.
+        """
+        values = np.atleast_2d(values)
+        thresholds = np.full((values.shape[0], len(self.groups)), -np.inf)
+        for g, (members, cap) in enumerate(zip(self.groups, self.caps)):
+            if cap < 1:
+                thresholds[:, g] = _simplex_threshold(values[:, members], cap)
+        # Seuil propre de chaque symbole (celui de son groupe)
+        floors = thresholds[:, self._group_of]
+        low = values.min(axis=1) - 1
+        high = values.max(axis=1)
+        for _ in range(_BISECTIONS):
+            theta = (low + high) / 2
+            above = np.maximum(values - np.maximum(theta[:, None], floors), 0).sum(axis=1) > 1
+            low = np.where(above, theta, low)
+            high = np.where(above, high, theta)
+        theta = (low + high) / 2
+        # Symboles dont le poids suit θ : la somme y décroît d'autant par unité de θ
+        moving = (values > theta[:, None]) & (theta[:, None] > floors)
+        excess = np.maximum(values - np.maximum(theta[:, None], floors), 0).sum(axis=1) - 1
+        theta = np.clip(theta + excess / np.maximum(moving.sum(axis=1), 1), low, high)
+        return np.maximum(values - np.maximum(theta[:, None], floors), 0)
+
+    def feasible(self, weights, tolerance=1e-6):
+        return all(weights[..., members].sum(axis=-1).max() <= cap + tolerance
+                   for members, cap in zip(self.groups, self.caps))
+
+
+def _simplex_threshold(values, total):
+    """Seuil τ par ligne tel que sum(max(v - τ, 0)) = total (projection sur le simplexe)"""
+    ordered = -np.sort(-values, axis=1)
+    cumulative = np.cumsum(ordered, axis=1) - total
+    ranks = np.arange(1, values.shape[1] + 1)
+    active = ordered - cumulative / ranks > 0
+    last = values.shape[1] - 1 - np.argmax(active[:, ::-1], axis=1)
+    return cumulative[np.arange(len(values)), last] / (last + 1)
+
+
+def solve_batch(mu, covariance, constraints, aversion):
+    """Poids minimisant w'Σw - a·μ'w pour chaque aversion `a` (une ligne par valeur)"""
+    aversion = np.asarray(aversion, dtype=np.float64)[:, None]
+    step = 1 / (2 * np.linalg.eigvalsh(covariance)[-1])
+    weights = constraints.project(np.full((len(aversion), len(mu)), 1 / len(mu)))
+    momentum, k = weights.copy(), np.ones((len(aversion), 1))
+    for _ in range(MAX_ITERATIONS):
+        gradient = 2 * momentum @ covariance - aversion * mu
+        updated = constraints.project(momentum - step * gradient)
+        change = updated - weights
+        if np.abs(change).max() < TOLERANCE:
+            return updated
+        # Redémarrage adaptatif : l'élan est remis à zéro sur les lignes où il va contre la descente
+        k = np.where(np.sum((momentum - updated) * change, axis=1, keepdims=True) > 0, 1.0, k)
+        k_next = (1 + np.sqrt(1 + 4 * k * k)) / 2
+        momentum = updated + ((k - 1) / k_next) * change
+        weights, k = updated, k_next
+    return weights
+
+
+def _aversions(mu, covariance, points):
+    """Grille d'aversions couvrant la frontière, de la variance minimale au rendement maximal"""
+    spread = np.ptp(mu) or 1.0
+    scale = 2 * np.trace(covariance) / len(mu) / spread
+    return np.concatenate([[0.0], scale * np.logspace(-2, 2.5, points - 1)])
+
+
+def statistics(weights, mu, covariance, risk_free=0.0):
+    """(rendements, volatilités, ratios de Sharpe) d'un lot de portefeuilles"""
+    weights = np.atleast_2d(weights)
+    returns = weights @ mu
+    volatility = np.sqrt(np.einsum('ij,jk,ik->i', weights, covariance, weights))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(volatility > 0, (returns - risk_free) / volatility, 0.0)
+    return returns, volatility, sharpe
+
+
+def frontier(mu, covariance, constraints, points=FRONTIER_POINTS):
+    """Frontière efficiente : (aversions, poids points × symboles), variance minimale en tête"""
+    aversion = _aversions(mu, covariance, points)
+    return aversion, solve_batch(mu, covariance, constraints, aversion)
+
+
+def max_sharpe(mu, covariance, constraints, aversion, weights, risk_free=0.0, points=16):
+    """Portefeuille de Sharpe maximal : meilleur point de la frontière, affiné entre ses voisins"""
+    best = int(np.argmax(statistics(weights, mu, covariance, risk_free)[2]))
+    low = aversion[max(best - 1, 0)]
+    high = aversion[min(best + 1, len(aversion) - 1)]
+    refined = np.vstack([weights[best], solve_batch(mu, covariance, constraints, np.linspace(low, high, points))])
+    return refined[int(np.argmax(statistics(refined, mu, covariance, risk_free)[2]))]
+
+
+def _equal_risk(covariance, budgets):
+    """Poids dont les contributions au risque sont proportionnelles à `budgets` (Newton)"""
+    y = budgets / np.sqrt(budgets @ covariance @ budgets)
+    for _ in range(100):
+        gradient = covariance @ y - budgets / y
+        if np.abs(gradient).max() < 1e-12:
+            break
+        direction = np.linalg.solve(covariance + np.diag(budgets / y ** 2), gradient)
+        step = 1.0
+        while np.any(y - step * direction <= 0):
+            step /= 2
+        y = y - step * direction
+    return y / y.sum()
+
+
+def risk_parity(covariance, constraints, iterations=50):
+    """Contributions au risque égales ; le budget des marchés qui dépassent leur plafond est réduit"""
+    budgets = np.full(len(covariance), 1 / len(covariance))
+    weights = _equal_risk(covariance, budgets)
+    for _ in range(iterations):
+        over = [(members, cap) for members, cap in zip(constraints.groups, constraints.caps)
+                if weights[members].sum() > cap + 1e-6]
+        if not over:
+            return weights
+        for members, cap in over:
+            budgets[members] *= (cap / weights[members].sum()) ** 2
+        budgets /= budgets.sum()
+        weights = _equal_risk(covariance, budgets)
+    return constraints.project(weights)[0]
+
+
+def risk_contributions(weights, covariance):
+    """Part de chaque symbole dans la variance du portefeuille"""
+    variance = weights @ covariance @ weights
+    return weights * (covariance @ weights) / variance if variance > 0 else np.zeros_like(weights)
+
+
+def optimize(bars, symbols, caps=None, risk_free=0.0, current=None, points=FRONTIER_POINTS):
+    """Allocations optimales des `symbols` à partir de leurs barres journalières.
+
+    `caps` : {marché: poids maximal} (1 par défaut) ; `current` : {symbole:
+    valeur détenue}, pour situer le portefeuille actuel. Retourne un dict :
+    'weights' (DataFrame symboles × portefeuilles), 'stats' (rendement,
+    volatilité, Sharpe), 'frontier' (DataFrame), 'shrinkage', ou None.
+    """
+    symbols = [symbol for symbol in dict.fromkeys(symbols) if symbol in bars and len(bars[symbol]) > 2]
+    if len(symbols) < 2:
+        return None
+    _, closes = align_closes(bars, symbols)
+    mu, covariance, shrinkage = estimate(closes)
+    exchanges = [get_exchange(symbol) for symbol in symbols]
+    markets = list(dict.fromkeys(exchanges))
+    groups = np.zeros((len(symbols), len(markets)))
+    groups[np.arange(len(symbols)), [markets.index(e) for e in exchanges]] = 1.0
+    caps = caps or {}
+    constraints = Constraints(groups, [caps.get(market, 1.0) for market in markets])
+
+    aversion, curve = frontier(mu, covariance, constraints, points)
+    portfolios = {
+        'Variance minimale': curve[0],
+        'Sharpe maximal': max_sharpe(mu, covariance, constraints, aversion, curve, risk_free),
+        'Parité de risque': risk_parity(covariance, constraints),
+    }
+    if current:
+        held = np.array([current.get(symbol, 0.0) for symbol in symbols])
+        if held.sum() > 0:
+            portfolios['Actuel'] = held / held.sum()
+    names = list(portfolios)
+    matrix = np.vstack([portfolios[name] for name in names])
+    returns, volatility, sharpe = statistics(matrix, mu, covariance, risk_free)
+    curve_returns, curve_volatility, curve_sharpe = statistics(curve, mu, covariance, risk_free)
+    return {
+        'weights': pd.DataFrame(matrix.T, index=pd.Index(symbols, name='Symbole'), columns=names),
+        'markets': pd.DataFrame(groups.T @ matrix.T, index=pd.Index(markets, name='Marché'), columns=names),
+        'stats': pd.DataFrame({'Rendement': returns, 'Volatilité': volatility, 'Sharpe': sharpe}, index=names),
+        'frontier': pd.DataFrame({'Rendement': curve_returns, 'Volatilité': curve_volatility,
+                                  'Sharpe': curve_sharpe}),
+        'shrinkage': shrinkage,
+    }
@@ -0,0 +1,344 @@
+"""Magasin de barres : un téléchargement sert plusieurs périodes et intervalles.
+
+Pour chaque symbole, le magasin conserve les barres téléchargées à un
+intervalle de base. Une demande (période, intervalle) est servie localement
+dès qu'une base compatible couvre la fenêtre ; seules les portions manquantes
+(début d'historique, dernières barres expirées) sont redemandées au réseau.
+
+Niveaux consultés : cache mémoire du processus, cache partagé de l'hôte
+(fichiers Arrow mappés), puis Yahoo Finance.
+"""
+import contextlib
+import threading
+import time
+
+import pandas as pd
+
+from tracker import upstream
+from tracker.cache import frame_cache
+from tracker.resilience import UpstreamError
+from tracker.resampling import (
+    NATIVE_INTERVALS, NATIVE_MINUTES, can_derive, parse_interval, period_start,
+    resample_bars, slice_period,
+)
+from tracker.sessions import market_for
+from tracker.shared_cache import shared_cache
+
+# Durée de validité des dernières barres avant rafraîchissement (secondes)
+DATA_TTL = 300
+
+# Profondeur d'historique maximale servie par Yahoo par intervalle intraday (jours)
+INTRADAY_LIMITS = {'1m': 7, '2m': 60, '5m': 60, '15m': 60, '30m': 60, '60m': 730, '90m': 60, '1h': 730}
+
+
+def _base_rank(interval):
+    """Ordre de préférence des bases : les plus grossières d'abord"""
+    kind, minutes = parse_interval(interval)
+    return {'month': 4, 'week': 3, 'day': 2}.get(kind, 0), minutes or 0
+
+
+def _within_limit(interval, start, now):
+    limit = INTRADAY_LIMITS.get(interval)
+    return limit is None or (now - start) <= pd.Timedelta(days=limit)
+
+
+def fetch_interval_for(target, start, now):
+    """Intervalle natif à télécharger pour construire `target`"""
+    if target in NATIVE_INTERVALS:
+        return target
+    kind, minutes = parse_interval(target)
+    if kind != 'minutes' and kind != 'session':
+        return {'day': '1d', 'week': '1wk', 'month': '1mo'}[kind]
+    candidates = [
+        name for name, size in sorted(NATIVE_MINUTES.items(), key=lambda item: -item[1])
+        if kind == 'session' or minutes % size == 0
+    ]
+    for name in candidates:
+        if _within_limit(name, start, now):
+            return name
+    return candidates[-1]
+
+
+class _Coverage:
+    """Fenêtre couverte par les barres d'un symbole à un intervalle de base.
+
+    Les barres elles-mêmes vivent dans le cache mémoire ; si elles en ont été
+    évincées, la couverture est considérée comme perdue.
+    """
+
+    def __init__(self, symbol, interval, start, fetched_at):
+        self.symbol = symbol
+        self.interval = interval
+        self.start = start
+        self.fetched_at = fetched_at
+        # Dernière version écrite, gardée jusqu'à sa lecture : le cache peut
+        # l'avoir refusée (plus grande que son budget) ou évincée entre-temps
+        self.latest = None
+
+    @property
+    def key(self):
+        return ('bars', self.symbol, self.interval)
+
+    @property
+    def version(self):
+        return (self.start, self.fetched_at)
+
+    def covers(self, start):
+        return self.start <= start
+
+    def is_stale(self, ttl):
+        return time.time() - self.fetched_at > ttl
+
+
+class BarStore:
+    """Cache de barres par symbole, agrégées à la demande"""
+
+    def __init__(self, fetch=upstream.fetch_history, fetch_many=upstream.fetch_histories,
+                 cache=frame_cache, shared=shared_cache, ttl=DATA_TTL):
+        self._fetch = fetch
+        self._fetch_many = fetch_many
+        self._cache = cache
+        self._shared = shared
+        self._ttl = ttl
+        self._entries = {}
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def _lock_for(self, symbol):
+        with self._guard:
+            return self._locks.setdefault(symbol, threading.Lock())
+
+    def get_bars(self, symbol, period, interval):
+        """Barres de `symbol` sur `period` à l'intervalle `interval` (index UTC).
+
+        Le DataFrame renvoyé est une vue en lecture seule sur le cache.
+        """
+        market = market_for(symbol)
+        now = pd.Timestamp.now(tz='UTC')
+        start = period_start(period, now)
+
+        with self._lock_for(symbol):
+            entry = self._covering(symbol, interval, start)
+            if entry is None or entry.is_stale(self._ttl):
+                # Un autre réplica a peut-être déjà publié ces barres
+                self._adopt_shared(symbol)
+                entry = self._covering(symbol, interval, start)
+            if entry is None or entry.is_stale(self._ttl):
+                entry = self._fetch_missing(symbol, period, interval, start, now)
+            if entry is None:
+                return pd.DataFrame()
+
+            # Résultat déjà agrégé pour cette version des barres de base
+            view_key = ('view', symbol, period, interval)
+            view, version = self._cache.lookup(view_key)
+            if view is not None and version == (entry.key, entry.version):
+                return view
+            bars = self._bars(entry)
+            if bars is None:
+                # Barres évincées depuis la recherche : téléchargées à nouveau
+                entry = self._fetch_missing(symbol, period, interval, start, now)
+                bars = self._bars(entry) if entry is not None else None
+            if bars is None:
+                return pd.DataFrame()
+            entry.latest = None
+
+        bars = slice_period(bars, period, market, now)
+        if entry.interval != interval:
+            bars = resample_bars(bars, interval, market)
+        return self._cache.put(view_key, bars, meta=(entry.key, entry.version))
+
+    def get_many(self, symbols, period, interval):
+        """Barres de plusieurs symboles : {symbole: DataFrame} (symboles sans données absents).
+
+        Les symboles absents du cache (ou expirés) sont téléchargés ensemble,
+        en un seul appel amont ; ceux que l'appel groupé n'a pas servis sont
+        ensuite demandés un par un.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        now = pd.Timestamp.now(tz='UTC')
+        start = period_start(period, now)
+        missing = []
+        for symbol in symbols:
+            with self._lock_for(symbol):
+                entry = self._covering(symbol, interval, start)
+                if entry is None or entry.is_stale(self._ttl):
+                    self._adopt_shared(symbol)
+                    entry = self._covering(symbol, interval, start)
+                if entry is None or entry.is_stale(self._ttl):
+                    missing.append(symbol)
+        if len(missing) > 1:
+            base = fetch_interval_for(interval, start, now)
+            try:
+                fetched = self._fetch_many(missing, base, period)
+            except UpstreamError:
+                fetched = {}
+            for symbol, bars in fetched.items():
+                with self._lock_for(symbol):
+                    self._publish(self._store(symbol, base, start, bars))
+        found = {}
+        for symbol in symbols:
+            bars = self.get_bars(symbol, period, interval)
+            if not bars.empty:
+                found[symbol] = bars
+        return found
+
+    def _fetch_missing(self, symbol, period, interval, start, now):
+        """Complète les barres par le réseau, un seul réplica à la fois par symbole"""
+        lock = self._shared.writer_lock(symbol) if self._shared else contextlib.nullcontext()
+        with lock:
+            # Le réplica qui détenait le verrou a pu télécharger entre-temps
+            self._adopt_shared(symbol)
+            entry = self._find(symbol, interval, start, now)
+            if entry is not None and entry.is_stale(self._ttl):
+                try:
+                    refreshed = self._refresh_tail(entry, now)
+                except UpstreamError:
+                    # Amont indisponible : on sert les dernières barres valides
+                    return entry
+                if not refreshed:
+                    self._drop(entry)
+                    entry = None
+            if entry is None:
+                entry = self._download(symbol, period, interval, start, now)
+            if entry is not None:
+                self._publish(entry)
+        return entry
+
+    def _adopt_shared(self, symbol):
+        """Reprend les barres publiées par les autres processus si elles sont plus récentes"""
+        if self._shared is None:
+            return
+        entries = self._entries.setdefault(symbol, {})
+        for interval in self._shared.intervals(symbol):
+            local = entries.get(interval)
+            bars, meta = self._shared.read(symbol, interval)
+            if bars is None:
+                continue
+            if local is not None and local.key in self._cache and meta['fetched_at'] <= local.fetched_at:
+                continue
+            entry = _Coverage(symbol, interval, pd.Timestamp(meta['start']), meta['fetched_at'])
+            self._keep(entry, bars)
+            entries[interval] = entry
+
+    def _publish(self, entry):
+        """Écrit les barres dans le cache partagé puis les relit mappées en mémoire"""
+        if self._shared is None:
+            return
+        bars = self._bars(entry)
+        if bars is None:
+            return
+        meta = {'start': entry.start.isoformat(), 'fetched_at': entry.fetched_at}
+        try:
+            self._shared.write(entry.symbol, entry.interval, bars, meta)
+        except OSError:
+            return
+        mapped, _ = self._shared.read(entry.symbol, entry.interval)
+        if mapped is not None:
+            self._keep(entry, mapped)
+
+    def _keep(self, entry, bars):
+        """Met en cache les barres de `entry` et garde leur vue jusqu'à la prochaine lecture"""
+        entry.latest = self._cache.put(entry.key, bars)
+
+    def _bars(self, entry):
+        bars = self._cache.get(entry.key)
+        return entry.latest if bars is None else bars
+
+    def _drop(self, entry):
+        self._entries.get(entry.symbol, {}).pop(entry.interval, None)
+        self._cache.pop(entry.key)
+
+    def _candidates(self, symbol, interval):
+        entries = [entry for entry in self._entries.get(symbol, {}).values()
+                   if can_derive(entry.interval, interval)]
+        for entry in entries:
+            if entry.key not in self._cache:
+                self._drop(entry)
+        entries = [entry for entry in entries if entry.key in self._cache]
+        entries.sort(key=lambda entry: (entry.interval != interval, [-r for r in _base_rank(entry.interval)]))
+        return entries
+
+    def _covering(self, symbol, interval, start):
+        """Base en cache couvrant déjà la fenêtre, sans accès réseau"""
+        for entry in self._candidates(symbol, interval):
+            if entry.covers(start):
+                return entry
+        return None
+
+    def _find(self, symbol, interval, start, now):
+        """Cherche une base couvrant la fenêtre, en l'étendant si possible"""
+        entry = self._covering(symbol, interval, start)
+        if entry is not None:
+            return entry
+        for entry in self._candidates(symbol, interval):
+            if _within_limit(entry.interval, start, now) and self._extend_head(entry, start):
+                return entry
+        return None
+
+    def _download(self, symbol, period, interval, start, now):
+        base = fetch_interval_for(interval, start, now)
+        bars = self._fetch(symbol, base, period=period)
+        if bars is None or bars.empty:
+            return None
+        return self._store(symbol, base, start, bars)
+
+    def _store(self, symbol, base, start, bars):
+        """Enregistre des barres téléchargées, fusionnées avec celles déjà connues"""
+        entries = self._entries.setdefault(symbol, {})
+        previous = entries.get(base)
+        known = self._bars(previous) if previous is not None else None
+        if known is not None:
+            bars = _merge(known, bars)
+            start = min(start, previous.start)
+        entry = _Coverage(symbol, base, start, time.time())
+        self._keep(entry, bars.sort_index())
+        entries[base] = entry
+        return entry
+
+    def _extend_head(self, entry, start):
+        """Télécharge uniquement le début d'historique manquant.
+
+        Retourne False si les barres connues ont été évincées entre-temps.
+        """
+        bars = self._bars(entry)
+        if bars is None:
+            return False
+        head = self._fetch(entry.symbol, entry.interval, start=start, end=bars.index[0])
+        if head is not None and not head.empty:
+            self._keep(entry, _merge(head, bars))
+        entry.start = start
+        return True
+
+    def _refresh_tail(self, entry, now):
+        """Télécharge uniquement les barres postérieures à la dernière barre connue.
+
+        Retourne False si ces barres ne sont plus disponibles à cet intervalle.
+        """
+        bars = self._bars(entry)
+        if bars is None:
+            return False
+        last = bars.index[-1]
+        if not _within_limit(entry.interval, last, now):
+            return False
+        tail = self._fetch(entry.symbol, entry.interval, start=last, end=now)
+        if tail is not None and not tail.empty:
+            self._keep(entry, _merge(bars, tail))
+        entry.fetched_at = time.time()
+        return True
+
+    def clear(self):
+        with self._guard:
+            for entries in self._entries.values():
+                for entry in entries.values():
+                    self._cache.pop(entry.key)
+            self._entries.clear()
+
+
+def _merge(older, newer):
+    """Fusionne deux blocs de barres ; les barres récentes remplacent les anciennes"""
+    merged = pd.concat([older, newer])
+    return merged[~merged.index.duplicated(keep='last')].sort_index()
+
+
+# Magasin partagé par toutes les sessions du processus
+store = BarStore()
@@ -0,0 +1,204 @@
+"""Membres des indices CSI 300, CSI 500 et Hang Seng : carte de chaleur et largeur du marché.
+
+Composition : tracker/data/constituents.csv (colonnes index, symbol, name,
+shares), liste indicative des principaux membres, complétée ou remplacée
+par la composition officielle avec TRACKER_CONSTITUENTS_CSV (même format ;
+pour un indice, le dernier fichier qui le cite l'emporte). `shares` :
+nombre d'actions en millions (ordre de grandeur dans la liste fournie), qui
+donne la capitalisation au dernier cours ; s'il manque pour un membre,
+toutes les cases sont dimensionnées par la valeur moyenne échangée sur
+TURNOVER_BARS séances. Un indice dont la liste couvre moins de MIN_COVERAGE
+de ses membres officiels n'est pas proposé (CSI 500 de la liste fournie).
+
+Les barres journalières des membres arrivent par lots de CHUNK_SIZE
+symboles téléchargés en parallèle (un appel amont par lot, publié dans le
+cache partagé). La largeur du marché se calcule d'un bloc sur la matrice
+membres × séances (comparison.align) : hausses et baisses, ligne
+avance/déclin, nouveaux plus hauts et plus bas sur 52 semaines, part des
+membres au-dessus de leur moyenne mobile 50 jours.
+"""
+import csv
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from tracker import feed
+from tracker.cache import source
+from tracker.comparison import align
+from tracker.conditions import Frame
+
+INDICES = {'000300.SS': "CSI 300", '000905.SS': "CSI 500", '^HSI': "Hang Seng"}
+# Nombre officiel de membres (fixé par le règlement de l'indice ; celui du
+# Hang Seng varie à chaque revue trimestrielle)
+MEMBER_COUNTS = {'000300.SS': 300, '000905.SS': 500}
+# Part minimale des membres officiels listés pour proposer un indice
+MIN_COVERAGE = 0.2
+SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'constituents.csv')
+PERIOD = '1y'
+# Symboles par appel amont, et appels simultanés
+CHUNK_SIZE = 50
+WORKERS = 4
+MA_WINDOW = 50
+# Plus hauts et plus bas : 52 semaines de séances, au moins HIGH_LOW_MIN connues
+HIGH_LOW_WINDOW = 250
+HIGH_LOW_MIN = 60
+TURNOVER_BARS = 20
+# Séances des courbes de largeur
+HISTORY_BARS = 120
+
+
+def _read(path):
+    with open(path, newline='', encoding='utf-8') as handle:
+        return [row for row in csv.DictReader(handle) if (row.get('symbol') or '').strip()]
+
+
+def constituents(sources=None):
+    """{indice: [{'symbol', 'name', 'shares'}]} ; `shares` en millions, ou None"""
+    if sources is None:
+        sources = [SOURCE, os.environ.get('TRACKER_CONSTITUENTS_CSV')]
+    found = {}
+    for path in sources:
+        if not path or not os.path.exists(path):
+            continue
+        listed = {}
+        for row in _read(path):
+            shares = (row.get('shares') or '').strip()
+            listed.setdefault(row['index'].strip(), {})[row['symbol'].strip().upper()] = {
+                'symbol': row['symbol'].strip().upper(),
+                'name': (row.get('name') or '').strip(),
+                'shares': float(shares) if shares else None,
+            }
+        found.update({index: list(members.values()) for index, members in listed.items()})
+    return found
+
+
+def available(listed=None):
+    """{indice: nom} des indices proposés : liste assez complète (MIN_COVERAGE)"""
+    if listed is None:
+        listed = constituents()
+    return {index: name for index, name in INDICES.items()
+            if listed.get(index) and len(listed[index]) >= MIN_COVERAGE * MEMBER_COUNTS.get(index, 0)}
+
+
+def fetch_bars(symbols, period=PERIOD, interval='1d', fetch=None):
+    """Barres de `symbols` par lots de CHUNK_SIZE téléchargés en parallèle : {symbole: DataFrame}"""
+    fetch = fetch or feed.get_bars_many
+    symbols = list(dict.fromkeys(symbols))
+    chunks = [symbols[first:first + CHUNK_SIZE] for first in range(0, len(symbols), CHUNK_SIZE)]
+
+    def load(chunk):
+        try:
+            return fetch(chunk, period, interval)
+        except Exception:
+            # Un lot en échec n'empêche pas d'afficher les autres
+            return {}
+
+    bars = {}
+    if not chunks:
+        return bars
+    with ThreadPoolExecutor(max_workers=min(WORKERS, len(chunks)), thread_name_prefix='breadth') as pool:
+        for loaded in pool.map(load, chunks):
+            bars.update(loaded)
+    return bars
+
+
+def _rolling(matrix, window, minimum, how):
+    """Statistique glissante le long des séances (une colonne pandas par membre)"""
+    rolling = pd.DataFrame(matrix.T).rolling(window, min_periods=minimum)
+    return getattr(rolling, how)().to_numpy().T
+
+
+def compute(bars, members):
+    """Carte et largeur du marché des `members` : dict ou None sans barres.
+
+    'members' : DataFrame (une ligne par membre) ; 'breadth' : chiffres du
+    jour ; 'history' : courbes de largeur par séance ; 'sizing' : mesure de
+    la taille des cases ; 'missing' : membres sans barres.
+    """
+    listed = [member for member in members if member['symbol'] in bars and not bars[member['symbol']].empty]
+    if not listed:
+        return None
+    symbols = [member['symbol'] for member in listed]
+    days, closes = align(bars, symbols)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = closes[:, 1:] / closes[:, :-1] - 1
+        ma = _rolling(closes, MA_WINDOW, MA_WINDOW, 'mean')
+        above = closes > ma
+        # Plus haut (bas) atteint par la clôture du jour sur la fenêtre qui l'inclut
+        highs = closes >= _rolling(closes, HIGH_LOW_WINDOW, HIGH_LOW_MIN, 'max')
+        lows = closes <= _rolling(closes, HIGH_LOW_WINDOW, HIGH_LOW_MIN, 'min')
+    advancing, declining = (returns > 0).sum(axis=0), (returns < 0).sum(axis=0)
+    measured = (~np.isnan(ma)).sum(axis=0)
+    percent_above = np.divide(above.sum(axis=0) * 100.0, measured, out=np.full(measured.shape, np.nan),
+                              where=measured > 0)
+    history = pd.DataFrame({
+        'Avance/déclin cumulé': np.concatenate([[0], np.cumsum(advancing - declining)]),
+        '% > MA50': percent_above,
+        'Nouveaux plus hauts': highs.sum(axis=0),
+        'Nouveaux plus bas': lows.sum(axis=0),
+    }, index=days).iloc[-HISTORY_BARS:]
+
+    last = closes[:, -1]
+    change = returns[:, -1] * 100 if returns.shape[1] else np.full(len(symbols), np.nan)
+    shares = np.array([member['shares'] if member['shares'] is not None else np.nan for member in listed])
+    if not np.isnan(shares).any():
+        sizes, sizing = shares * 1e6 * last, "Capitalisation"
+    else:
+        recent = Frame(bars, symbols, TURNOVER_BARS)
+        with np.errstate(invalid='ignore'):
+            sizes = np.nanmean(recent.series('close') * recent.series('volume'), axis=1)
+        sizing = f"Valeur échangée ({TURNOVER_BARS} séances)"
+    table = pd.DataFrame({
+        'Symbole': symbols,
+        'Nom': [member['name'] or member['symbol'] for member in listed],
+        'Cours': last,
+        'Variation %': change,
+        'Taille': np.nan_to_num(sizes),
+        '> MA50': above[:, -1],
+        'Plus haut 52s': highs[:, -1],
+        'Plus bas 52s': lows[:, -1],
+    })
+    return {
+        'members': table,
+        'breadth': {
+            'Membres': len(symbols),
+            'Hausses': int((change > 0).sum()),
+            'Baisses': int((change < 0).sum()),
+            'Inchangés': int((change == 0).sum()),
+            'Nouveaux plus hauts': int(highs[:, -1].sum()),
+            'Nouveaux plus bas': int(lows[:, -1].sum()),
+            '% > MA50': float(percent_above[-1]),
+        },
+        'history': history,
+        'sizing': sizing,
+        'date': days[-1],
+        'missing': [member['symbol'] for member in members if member['symbol'] not in bars],
+    }
+
+
+_lock = threading.Lock()
+# Dernier résultat par (indice, période), avec l'identité des barres utilisées
+_results = {}
+
+
+def run(index, period=PERIOD):
+    """Carte et largeur du marché de l'indice `index` (voir compute), ou None.
+
+    Recalculée seulement quand les barres en cache des membres ont changé.
+    """
+    members = constituents().get(index, [])
+    bars = fetch_bars([member['symbol'] for member in members], period)
+    sources = tuple(source(bars[member['symbol']]) if member['symbol'] in bars else None
+                    for member in members)
+    with _lock:
+        cached = _results.get((index, period))
+    if cached is not None and len(cached[0]) == len(sources) and all(a is b for a, b in zip(cached[0], sources)):
+        return cached[1]
+    result = compute(bars, members)
+    with _lock:
+        _results[(index, period)] = (sources, result)
+    return result
@@ -0,0 +1,243 @@
+"""Cache mémoire des DataFrames OHLCV, partagé par tout le processus.
+
+Les colonnes sont stockées sous forme compacte (float32/int32) dans des
+tableaux NumPy en lecture seule ; chaque lecture renvoie un DataFrame qui
+référence ces tableaux sans copie. Le cache est borné en octets et évince
+selon une politique LRU ou ARC.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+import numpy as np
+import pandas as pd
+
+from tracker import metrics
+
+DEFAULT_BUDGET_MB = 256
+INT32_MAX = np.iinfo(np.int32).max
+INT32_MIN = np.iinfo(np.int32).min
+
+
+def _read_only(values):
+    values = np.ascontiguousarray(values)
+    values.setflags(write=False)
+    return values
+
+
+def _compact(values):
+    """Réduit un tableau numérique à float32/int32 quand c'est sans perte notable"""
+    if values.dtype == np.float64:
+        return values.astype(np.float32)
+    if values.dtype.kind in 'iu' and values.dtype.itemsize > 4:
+        if values.size == 0 or (values.min() >= INT32_MIN and values.max() <= INT32_MAX):
+            return values.astype(np.int32)
+    return values
+
+
+class _Stored:
+    """Colonnes compactes d'un DataFrame et métadonnées associées"""
+
+    __slots__ = ('columns', 'index', 'index_name', 'is_datetime', 'tz', 'nbytes', 'meta')
+
+    def __init__(self, frame, meta):
+        index = frame.index
+        self.is_datetime = isinstance(index, pd.DatetimeIndex)
+        if self.is_datetime:
+            # Horodatages conservés en epoch UTC (int64, nanosecondes)
+            self.tz = index.tz
+            self.index = _read_only(index.as_unit('ns').asi8)
+        else:
+            self.tz = None
+            self.index = _read_only(index.to_numpy())
+        self.index_name = index.name
+        self.columns = {
+            name: _read_only(_compact(frame[name].to_numpy()))
+            for name in frame.columns
+        }
+        self.nbytes = self.index.nbytes + sum(values.nbytes for values in self.columns.values())
+        self.meta = meta
+
+    def view(self):
+        """DataFrame en lecture seule, sans copie des tableaux"""
+        if self.is_datetime:
+            index = pd.DatetimeIndex(self.index.view('M8[ns]'), name=self.index_name)
+            if self.tz is not None:
+                index = index.tz_localize('UTC').tz_convert(self.tz)
+        else:
+            index = pd.Index(self.index, name=self.index_name, copy=False)
+        return pd.DataFrame(self.columns, index=index, copy=False)
+
+
+def source(frame):
+    """Tableau des clôtures sous-jacent d'une vue : le même tant que l'entrée du cache n'a pas changé"""
+    closes = frame['Close'].to_numpy()
+    return closes if closes.base is None else closes.base
+
+
+class FrameCache:
+    """Cache de DataFrames borné en octets (politique 'lru' ou 'arc')"""
+
+    def __init__(self, max_bytes, policy='lru'):
+        if policy not in ('lru', 'arc'):
+            raise ValueError(f"Politique d'éviction inconnue : {policy}")
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self._lock = threading.Lock()
+        # LRU : seul _recent est utilisé. ARC : _recent (T1), _frequent (T2)
+        # et les listes fantômes (clés évincées et leur taille) B1 et B2.
+        self._recent = OrderedDict()
+        self._frequent = OrderedDict()
+        self._ghost_recent = OrderedDict()
+        self._ghost_frequent = OrderedDict()
+        self._target_recent = 0
+        self._recent_bytes = 0
+        self._resident = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._eviction_times = deque(maxlen=10000)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._recent or key in self._frequent
+
+    def get(self, key):
+        """DataFrame en lecture seule associé à `key`, ou None"""
+        return self.lookup(key)[0]
+
+    def lookup(self, key):
+        """Couple (DataFrame, métadonnées), ou (None, None) si absent"""
+        with self._lock:
+            stored = self._touch(key)
+            if stored is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if stored is None:
+            metrics.count('cache_misses')
+            return None, None
+        metrics.count('cache_hits')
+        return stored.view(), stored.meta
+
+    def put(self, key, frame, meta=None):
+        """Stocke `frame` sous forme compacte et renvoie sa vue en lecture seule"""
+        stored = _Stored(frame, meta)
+        if stored.nbytes > self.max_bytes:
+            return stored.view()
+        with self._lock:
+            self._remove(key)
+            if self.policy == 'arc' and (key in self._ghost_recent or key in self._ghost_frequent):
+                self._adapt(key, stored.nbytes)
+                self._frequent[key] = stored
+            else:
+                self._recent[key] = stored
+                self._recent_bytes += stored.nbytes
+            self._resident += stored.nbytes
+            self._evict()
+        return stored.view()
+
+    def pop(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            for table in (self._recent, self._frequent, self._ghost_recent, self._ghost_frequent):
+                table.clear()
+            self._resident = 0
+            self._recent_bytes = 0
+            self._target_recent = 0
+
+    def stats(self):
+        """Occupation et activité du cache (pour dimensionner les conteneurs)"""
+        now = time.time()
+        with self._lock:
+            recent_evictions = sum(1 for stamp in self._eviction_times if now - stamp <= 60)
+            lookups = self.hits + self.misses
+            return {
+                'policy': self.policy,
+                'max_bytes': self.max_bytes,
+                'resident_bytes': self._resident,
+                'entries': len(self._recent) + len(self._frequent),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'evictions_per_minute': recent_evictions,
+            }
+
+    def _touch(self, key):
+        """Marque `key` comme récemment utilisée et renvoie son entrée"""
+        if key in self._recent:
+            stored = self._recent[key]
+            if self.policy == 'arc':
+                # Deuxième accès : l'entrée passe dans la liste "fréquente"
+                del self._recent[key]
+                self._recent_bytes -= stored.nbytes
+                self._frequent[key] = stored
+            else:
+                self._recent.move_to_end(key)
+            return stored
+        if key in self._frequent:
+            self._frequent.move_to_end(key)
+            return self._frequent[key]
+        return None
+
+    def _remove(self, key):
+        stored = self._recent.pop(key, None)
+        if stored is not None:
+            self._recent_bytes -= stored.nbytes
+        else:
+            stored = self._frequent.pop(key, None)
+        if stored is not None:
+            self._resident -= stored.nbytes
+
+    def _adapt(self, key, nbytes):
+        """Ajuste la cible ARC après un accès à une clé récemment évincée"""
+        recent_ghost = sum(self._ghost_recent.values())
+        frequent_ghost = sum(self._ghost_frequent.values())
+        if key in self._ghost_recent:
+            delta = nbytes * max(frequent_ghost / max(recent_ghost, 1), 1)
+            self._target_recent = min(self.max_bytes, self._target_recent + delta)
+            del self._ghost_recent[key]
+        else:
+            delta = nbytes * max(recent_ghost / max(frequent_ghost, 1), 1)
+            self._target_recent = max(0, self._target_recent - delta)
+            del self._ghost_frequent[key]
+
+    def _evict(self):
+        while self._resident > self.max_bytes:
+            if self.policy == 'lru':
+                _, stored = self._recent.popitem(last=False)
+                self._recent_bytes -= stored.nbytes
+            else:
+                if self._recent and (self._recent_bytes > self._target_recent or not self._frequent):
+                    key, stored = self._recent.popitem(last=False)
+                    self._recent_bytes -= stored.nbytes
+                    self._ghost_recent[key] = stored.nbytes
+                else:
+                    key, stored = self._frequent.popitem(last=False)
+                    self._ghost_frequent[key] = stored.nbytes
+                self._trim_ghosts()
+            self._resident -= stored.nbytes
+            self.evictions += 1
+            self._eviction_times.append(time.time())
+
+    def _trim_ghosts(self):
+        for ghosts in (self._ghost_recent, self._ghost_frequent):
+            total = sum(ghosts.values())
+            while ghosts and total > self.max_bytes:
+                _, nbytes = ghosts.popitem(last=False)
+                total -= nbytes
+
+
+def _from_environment():
+    budget_mb = float(os.environ.get('TRACKER_CACHE_MB', DEFAULT_BUDGET_MB))
+    policy = os.environ.get('TRACKER_CACHE_POLICY', 'lru').lower()
+    return FrameCache(int(budget_mb * 1024 * 1024), policy=policy)
+
+
+# Cache partagé par toutes les sessions du processus
+frame_cache = _from_environment()
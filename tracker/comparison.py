@@ -0,0 +1,99 @@
+"""Comparaison de plusieurs symboles sur une base commune (calcul vectorisé).
+
+Les clôtures de chaque symbole sont reportées sur une chronologie commune
+par jointure « as-of » (np.searchsorted) : à chaque instant, le dernier
+cours connu de chaque symbole, jamais un cours futur. En barres
+journalières ou plus longues, la chronologie est le jour calendaire local
+de chaque place (la séance du 3 mars à Shanghai et celle du 3 mars à New
+York tombent sur la même ligne) ; en intraday, l'instant UTC des barres.
+
+Les séries partent toutes de la première date où chacune a un cours, base
+100 ou rendement cumulé, puis sont réduites (minimum et maximum de chaque
+paquet de barres) pour garder un graphique léger quel que soit l'historique.
+"""
+import numpy as np
+import pandas as pd
+
+from tracker.performance import DAY_NS
+from tracker.sessions import market_for
+
+# Symboles comparés au plus
+MAX_SYMBOLS = 20
+# Points tracés au plus par série après réduction
+MAX_POINTS = 2000
+MODES = {'base100': "Base 100", 'returns': "Rendement cumulé %"}
+DAILY_INTERVALS = ('1d', '1wk', '1mo')
+
+
+def _keys(index, symbol, daily):
+    """Clé de jointure de chaque barre : jour local (journalier) ou instant UTC en ns"""
+    if daily:
+        return index.tz_convert(market_for(symbol).timezone).tz_localize(None).as_unit('ns').asi8 // DAY_NS
+    return index.as_unit('ns').asi8
+
+
+def align(bars, symbols, daily=True):
+    """(chronologie, clôtures symboles × instants) par jointure as-of, NaN avant la première barre"""
+    keys = [_keys(bars[symbol].index, symbol, daily) for symbol in symbols]
+    timeline = np.unique(np.concatenate(keys))
+    closes = np.full((len(symbols), len(timeline)), np.nan)
+    for row, (symbol, key) in enumerate(zip(symbols, keys)):
+        values = bars[symbol]['Close'].to_numpy(dtype=np.float64)
+        # Dernière barre à cette date ou avant (plusieurs barres le même jour : la dernière)
+        position = np.searchsorted(key, timeline, side='right') - 1
+        known = position >= 0
+        closes[row, known] = values[position[known]]
+    # Cours manquants dans une série (NaN amont) : dernier cours connu
+    filled = np.where(np.isnan(closes), 0, np.arange(len(timeline)))
+    closes = np.take_along_axis(closes, np.maximum.accumulate(filled, axis=1), axis=1)
+    index = pd.DatetimeIndex(timeline * DAY_NS) if daily else pd.DatetimeIndex(timeline, tz='UTC')
+    return index, closes
+
+
+def rebase(closes, mode='base100'):
+    """Séries ramenées à 100 (ou à 0 %) au premier instant où toutes ont un cours.
+
+    Retourne (premier instant retenu, séries), ou (None, None) sans instant commun.
+    """
+    complete = np.flatnonzero(~np.isnan(closes).any(axis=0))
+    if not len(complete):
+        return None, None
+    start = complete[0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratios = closes[:, start:] / closes[:, start:start + 1]
+    return start, ratios * 100 if mode == 'base100' else (ratios - 1) * 100
+
+
+def decimate(values, points=MAX_POINTS):
+    """Indices gardés par ligne : minimum et maximum de chaque paquet, premier et dernier point"""
+    rows, count = values.shape
+    if count <= points:
+        return np.broadcast_to(np.arange(count), values.shape)
+    buckets = max((points - 2) // 2, 1)
+    size = -(-count // buckets)
+    padded = np.full((rows, buckets * size), np.nan)
+    padded[:, :count] = values
+    blocks = padded.reshape(rows, buckets, size)
+    offsets = np.arange(buckets) * size
+    low = np.where(np.isnan(blocks), np.inf, blocks).argmin(axis=2) + offsets
+    high = np.where(np.isnan(blocks), -np.inf, blocks).argmax(axis=2) + offsets
+    kept = np.sort(np.concatenate([low, high], axis=1), axis=1)
+    ends = np.broadcast_to([[0, count - 1]], (rows, 2))
+    return np.minimum(np.concatenate([ends[:, :1], kept, ends[:, 1:]], axis=1), count - 1)
+
+
+def compare(bars, symbols, interval='1d', mode='base100', points=MAX_POINTS):
+    """Séries comparées des `symbols` : {'index', 'symbols', 'values', 'points'} ou None.
+
+    `values` : symboles × instants sur toute la chronologie commune ; `points` :
+    indices réduits par symbole, pour le tracé.
+    """
+    symbols = [symbol for symbol in dict.fromkeys(symbols) if symbol in bars and not bars[symbol].empty]
+    symbols = symbols[:MAX_SYMBOLS]
+    if not symbols:
+        return None
+    index, closes = align(bars, symbols, interval in DAILY_INTERVALS)
+    start, values = rebase(closes, mode)
+    if start is None:
+        return None
+    return {'index': index[start:], 'symbols': symbols, 'values': values, 'points': decimate(values, points)}
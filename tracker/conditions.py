@@ -0,0 +1,465 @@
+"""Conditions d'alerte compilées, évaluées sur les tableaux de barres.
+
+Une condition est une expression, par exemple :
+
+    change(5) > 8 and volume_ratio(20) > 3
+    cross_above(ma(20), ma(50)) or rsi(14) < 30
+    premium() > 40
+
+- séries : open, high, low, close (ou price), volume ; target = prix cible de l'alerte
+- fonctions : ma(n), change(n) (% sur n barres), rsi(n), avg_volume(n),
+  volume_ratio(n) (volume / moyenne des n barres précédentes), premium()
+  (prime des actions A sur les actions H, en %), cross_above(a, b), cross_below(a, b)
+- comparaisons <, <=, >, >=, opérations + - * /, and, or, not, parenthèses
+  (`not` inverse les comparaisons ; not cross_above(a, b) = cross_below(a, b))
+
+Le texte est compilé une fois (arbre syntaxique Python, liste blanche de
+noeuds) en un évaluateur NumPy qui traite toute une fenêtre de barres
+(lignes = alertes, colonnes = barres) en une passe, pour tous les symboles
+des alertes qui partagent la même expression.
+
+Hystérésis : une alerte se déclenche quand sa condition devient vraie, puis
+ne se réarme qu'une fois la condition nettement fausse (chaque comparaison
+repassée de l'autre côté de son seuil d'au moins HYSTERESIS). L'état armé se
+déduit des barres écoulées depuis la création de l'alerte, il n'est donc pas
+stocké et survit aux redémarrages ; seul un déclenchement sur la dernière
+barre est notifié, une fois par barre.
+"""
+import ast
+import functools
+import math
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import pandas as pd
+
+from tracker import feed, indicators, timezones
+from tracker.bars import INTRADAY_LIMITS
+from tracker.cache import source
+from tracker.universe import HKD_CNY, ah_pair, format_currency
+
+# Marge de réarmement des comparaisons (fraction du seuil)
+HYSTERESIS = 0.01
+# Barres rejouées pour reconstituer l'état armé, au-delà de l'historique des indicateurs
+REPLAY_BARS = 60
+# Intervalles d'évaluation et nombre minimal de barres par séance
+INTERVALS = {'1d': 1, '1h': 4, '30m': 8, '15m': 16, '5m': 48}
+# Périodes Yahoo candidates et leur durée calendaire (jours)
+_PERIODS = [('1mo', 30), ('3mo', 91), ('6mo', 182), ('1y', 365), ('2y', 730), ('5y', 1826)]
+# Paramètre n maximal des fonctions
+MAX_WINDOW = 500
+# Déclenchements notifiés et évaluations gardés en mémoire
+MAX_FIRED = 10000
+MAX_CACHED = 256
+
+SERIES = {'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close', 'volume': 'Volume'}
+_ARITHMETIC = {ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply, ast.Div: np.divide}
+_COMPARISONS = (ast.Gt, ast.GtE, ast.Lt, ast.LtE)
+# Comparaison contraire, pour `not`
+_NEGATIONS = {ast.Gt: ast.LtE, ast.GtE: ast.Lt, ast.Lt: ast.GtE, ast.LtE: ast.Gt}
+
+# Noeud compilé : evaluate(frame), barres d'historique nécessaires, usage de la prime A/H
+_Node = namedtuple('_Node', 'evaluate lookback premium')
+
+
+class ConditionError(ValueError):
+    """Expression d'alerte invalide"""
+
+
+# --- Indicateurs ---
+
+def _rolling_mean(values, window):
+    """Moyenne mobile, NaN dès qu'une valeur manque dans la fenêtre"""
+    missing = np.isnan(values)
+    sums = np.cumsum(np.where(missing, 0.0, values), axis=-1)
+    gaps = np.cumsum(missing, axis=-1)
+    out = np.full(values.shape, np.nan)
+    if values.shape[-1] < window:
+        return out
+    sums = np.concatenate([np.zeros(values.shape[:-1] + (1,)), sums], axis=-1)
+    gaps = np.concatenate([np.zeros(values.shape[:-1] + (1,), dtype=gaps.dtype), gaps], axis=-1)
+    complete = (gaps[..., window:] - gaps[..., :-window]) == 0
+    out[..., window - 1:] = np.where(complete, (sums[..., window:] - sums[..., :-window]) / window, np.nan)
+    return out
+
+
+def _shift(values):
+    """Valeurs de la barre précédente (NaN sur la première)"""
+    return np.concatenate([np.full(values.shape[:-1] + (1,), np.nan), values[..., :-1]], axis=-1)
+
+
+def _volume_ratio(frame, n):
+    return frame.series('volume') / _shift(_rolling_mean(frame.series('volume'), n))
+
+
+# nom : (calcul(frame, n), n par défaut, historique nécessaire(n))
+_FUNCTIONS = {
+    'ma': (lambda frame, n: _rolling_mean(frame.series('close'), n), None, lambda n: n),
+    'change': (lambda frame, n: indicators.pct_change(frame.series('close'), n), 1, lambda n: n + 1),
+    'rsi': (lambda frame, n: indicators.rsi(frame.series('close'), n), 14, lambda n: 5 * n),
+    'avg_volume': (lambda frame, n: _rolling_mean(frame.series('volume'), n), 20, lambda n: n),
+    'volume_ratio': (_volume_ratio, 20, lambda n: n + 1),
+}
+
+
+# --- Compilation ---
+
+def _describe(node):
+    return ast.unparse(node)
+
+
+def _window_argument(call, default):
+    """Paramètre n (entier) d'un appel de fonction"""
+    if call.keywords or len(call.args) > 1:
+        raise ConditionError(f"{call.func.id}() prend un seul paramètre entier")
+    if not call.args:
+        if default is None:
+            raise ConditionError(f"{call.func.id}() demande un nombre de barres")
+        return default
+    argument = call.args[0]
+    if not (isinstance(argument, ast.Constant) and type(argument.value) is int and 1 <= argument.value <= MAX_WINDOW):
+        raise ConditionError(f"{call.func.id}() : nombre de barres entier entre 1 et {MAX_WINDOW} attendu")
+    return argument.value
+
+
+def _function(call):
+    name = call.func.id
+    if name == 'premium':
+        if call.args or call.keywords:
+            raise ConditionError("premium() ne prend pas de paramètre")
+        return _Node(lambda frame: frame.premium(), 1, True)
+    if name not in _FUNCTIONS:
+        raise ConditionError(f"Fonction inconnue : {name}()")
+    compute, default, lookback = _FUNCTIONS[name]
+    n = _window_argument(call, default)
+    return _Node(lambda frame: frame.memo((name, n), lambda: compute(frame, n)), lookback(n), False)
+
+
+def _value(node):
+    """Compile une expression numérique"""
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        value = float(node.value)
+        return _Node(lambda frame: value, 0, False)
+    if isinstance(node, ast.Name):
+        name = 'close' if node.id == 'price' else node.id
+        if name in SERIES:
+            return _Node(lambda frame: frame.series(name), 1, False)
+        if name == 'target':
+            return _Node(lambda frame: frame.target, 0, False)
+        raise ConditionError(f"Nom inconnu : {node.id}")
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        operand = _value(node.operand)
+        sign = -1.0 if isinstance(node.op, ast.USub) else 1.0
+        return _Node(lambda frame: sign * operand.evaluate(frame), operand.lookback, operand.premium)
+    if isinstance(node, ast.BinOp) and type(node.op) in _ARITHMETIC:
+        left, right = _value(node.left), _value(node.right)
+        operation = _ARITHMETIC[type(node.op)]
+        return _Node(lambda frame: operation(left.evaluate(frame), right.evaluate(frame)),
+                     max(left.lookback, right.lookback), left.premium or right.premium)
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id not in ('cross_above', 'cross_below'):
+        return _function(node)
+    raise ConditionError(f"Valeur attendue : {_describe(node)}")
+
+
+def _compare(left, op, right):
+    """Comparaison : déclenchée au-delà du seuil, réarmée en deçà du seuil moins la marge"""
+    above = isinstance(op, (ast.Gt, ast.GtE))
+    strict = isinstance(op, (ast.Gt, ast.Lt))
+
+    def evaluate(frame):
+        a, b = left.evaluate(frame), right.evaluate(frame)
+        band = HYSTERESIS * np.abs(b)
+        if above:
+            return (a > b) if strict else (a >= b), a < b - band
+        return (a < b) if strict else (a <= b), a > b + band
+
+    return _Node(evaluate, max(left.lookback, right.lookback), left.premium or right.premium)
+
+
+def _cross(left, right, above):
+    """Croisement de deux séries : événement d'une barre, réarmé dès la barre suivante"""
+    def evaluate(frame):
+        spread = np.broadcast_to(left.evaluate(frame) - right.evaluate(frame), frame.shape)
+        previous = _shift(spread)
+        trigger = (spread > 0) & (previous <= 0) if above else (spread < 0) & (previous >= 0)
+        return trigger, ~trigger
+
+    return _Node(evaluate, max(left.lookback, right.lookback) + 1, left.premium or right.premium)
+
+
+def _combine(parts, both):
+    """ET : déclenché si toutes les parties le sont, réarmé dès qu'une l'est (l'inverse pour OU)"""
+    def evaluate(frame):
+        results = [part.evaluate(frame) for part in parts]
+        triggers = [trigger for trigger, _ in results]
+        releases = [release for _, release in results]
+        if both:
+            return functools.reduce(np.logical_and, triggers), functools.reduce(np.logical_or, releases)
+        return functools.reduce(np.logical_or, triggers), functools.reduce(np.logical_and, releases)
+
+    return _Node(evaluate, max(part.lookback for part in parts), any(part.premium for part in parts))
+
+
+def _test(node, negated=False):
+    """Compile une condition : evaluate(frame) -> (déclenchement, réarmement).
+
+    La négation descend jusqu'aux feuilles (lois de De Morgan, comparaison
+    inversée, cross_above <-> cross_below) : chaque comparaison garde sa
+    propre hystérésis, `not close > 10` se déclenche comme `close <= 10`.
+    """
+    if isinstance(node, ast.BoolOp):
+        return _combine([_test(value, negated) for value in node.values],
+                        isinstance(node.op, ast.And) != negated)
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        return _test(node.operand, not negated)
+    if isinstance(node, ast.Compare):
+        operands = [_value(node.left)] + [_value(comparator) for comparator in node.comparators]
+        if not all(isinstance(op, _COMPARISONS) for op in node.ops):
+            raise ConditionError(f"Comparaison non supportée (<, <=, >, >= uniquement) : {_describe(node)}")
+        ops = [_NEGATIONS[type(op)]() if negated else op for op in node.ops]
+        # a < b < c : a < b and b < c ; sa négation, a >= b or b >= c
+        parts = [_compare(a, op, b) for a, op, b in zip(operands, ops, operands[1:])]
+        return parts[0] if len(parts) == 1 else _combine(parts, not negated)
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+            and node.func.id in ('cross_above', 'cross_below')):
+        if len(node.args) != 2 or node.keywords:
+            raise ConditionError(f"{node.func.id}() prend deux séries")
+        return _cross(_value(node.args[0]), _value(node.args[1]), (node.func.id == 'cross_above') != negated)
+    raise ConditionError(f"Condition attendue (comparaison, cross_above, cross_below) : {_describe(node)}")
+
+
+class Condition:
+    """Expression compilée, évaluée sur une fenêtre de barres (lignes × barres)"""
+
+    def __init__(self, text, root):
+        self.text = text
+        self.lookback = max(root.lookback, 1)
+        self.uses_premium = root.premium
+        self._root = root
+
+    def evaluate(self, frame):
+        """(déclenchement, réarmement) : booléens lignes × barres, faux sans historique suffisant"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            trigger, release = self._root.evaluate(frame)
+        ready = frame.ready(self.lookback)
+        return np.broadcast_to(trigger, frame.shape) & ready, np.broadcast_to(release, frame.shape) & ready
+
+
+@functools.lru_cache(maxsize=512)
+def compile_condition(text):
+    """Compile (une fois par texte) une expression d'alerte ; ConditionError si invalide"""
+    text = ' '.join(text.split())
+    try:
+        tree = ast.parse(text, mode='eval')
+    except SyntaxError as error:
+        raise ConditionError(f"Syntaxe invalide : {error.msg}") from None
+    return Condition(text, _test(tree.body))
+
+
+# --- Fenêtres de barres ---
+
+def _epochs(frame):
+    return frame.index.as_unit('ns').asi8
+
+
+def _source(frame):
+    return None if frame is None or 'Close' not in frame else source(frame)
+
+
+def _asof(frame, times):
+    """Clôtures de `frame` à la dernière barre commencée à chaque instant (NaN avant)"""
+    if frame is None or frame.empty:
+        return np.full(times.shape, np.nan)
+    position = np.searchsorted(_epochs(frame), times, side='right') - 1
+    closes = frame['Close'].to_numpy(dtype=np.float64)
+    return np.where(position >= 0, closes[np.maximum(position, 0)], np.nan)
+
+
+class Frame:
+    """Dernières barres des symboles, alignées à droite (NaN avant la première)"""
+
+    def __init__(self, bars, symbols, width, target=None):
+        self.symbols = symbols
+        self.shape = (len(symbols), width)
+        self._bars = bars
+        self._columns = {name: np.full(self.shape, np.nan) for name in SERIES}
+        self.times = np.full(self.shape, np.iinfo(np.int64).min)
+        for row, symbol in enumerate(symbols):
+            tail = bars.get(symbol)
+            if tail is None or tail.empty:
+                continue
+            tail = tail.iloc[-width:]
+            # Une seule conversion par symbole, puis lecture des colonnes par position
+            values = tail.to_numpy(dtype=np.float64)
+            for name, position in zip(SERIES, tail.columns.get_indexer(list(SERIES.values()))):
+                if position >= 0:
+                    self._columns[name][row, width - len(tail):] = values[:, position]
+            self.times[row, width - len(tail):] = _epochs(tail)
+        self.target = np.full((len(symbols), 1), np.nan) if target is None else np.asarray(target, float)[:, None]
+        self._memo = {}
+
+    def series(self, name):
+        return self._columns[name]
+
+    def memo(self, key, compute):
+        if key not in self._memo:
+            self._memo[key] = compute()
+        return self._memo[key]
+
+    def ready(self, lookback):
+        """Barres précédées d'au moins `lookback` barres connues"""
+        return np.cumsum(~np.isnan(self._columns['close']), axis=-1) >= lookback
+
+    def premium(self):
+        """Prime des actions A sur les actions H (% , au change HKD/CNY), alignée sur chaque ligne"""
+        def compute():
+            out = np.full(self.shape, np.nan)
+            for row, symbol in enumerate(self.symbols):
+                pair = ah_pair(symbol)
+                if pair is None:
+                    continue
+                times = self.times[row]
+                a_share, h_share = (_asof(self._bars.get(s), times) for s in pair)
+                rate = _asof(self._bars.get(HKD_CNY), times)
+                out[row] = (a_share / (h_share * rate) - 1) * 100
+            return out
+        return self.memo('premium', compute)
+
+
+def required_symbols(condition, symbols):
+    """Symboles dont les barres sont nécessaires : ceux des alertes, plus paires A/H et change"""
+    needed = list(dict.fromkeys(symbols))
+    if condition.uses_premium:
+        needed += [s for symbol in needed for s in (ah_pair(symbol) or ())] + [HKD_CNY]
+    return list(dict.fromkeys(needed))
+
+
+def period_for(interval, bars):
+    """Plus courte période Yahoo couvrant `bars` barres de l'intervalle (dans la limite de Yahoo)"""
+    sessions = math.ceil(bars / INTERVALS.get(interval, 1))
+    limit = INTRADAY_LIMITS.get(interval)
+    chosen = _PERIODS[0][0]
+    for period, days in _PERIODS:
+        if limit is not None and days > limit:
+            break
+        chosen = period
+        # Jours ouvrés, moins une marge pour les fériés
+        if days * 5 / 7 * 0.9 >= sessions:
+            break
+    return chosen
+
+
+def armed_triggers(trigger, release):
+    """Déclenchements effectifs : condition vraie alors que l'alerte est armée.
+
+    L'alerte est armée au départ, désarmée par un déclenchement et réarmée
+    par la barre de réarmement suivante : elle est armée avant la barre t si
+    aucun déclenchement n'a eu lieu, ou si un réarmement a suivi le dernier.
+    """
+    columns = np.arange(trigger.shape[-1])
+    last_trigger = np.maximum.accumulate(np.where(trigger, columns, -1), axis=-1)
+    last_release = np.maximum.accumulate(np.where(release, columns, -1), axis=-1)
+    before_trigger = np.concatenate([np.full(trigger.shape[:-1] + (1,), -1), last_trigger[..., :-1]], axis=-1)
+    before_release = np.concatenate([np.full(trigger.shape[:-1] + (1,), -1), last_release[..., :-1]], axis=-1)
+    return trigger & ((before_trigger < 0) | (before_release > before_trigger))
+
+
+def expression_for(alert):
+    """Expression d'une alerte (les alertes de prix simples en sont un cas particulier)"""
+    if alert.get('expression'):
+        return alert['expression']
+    return 'close >= target' if alert.get('condition') == 'above' else 'close <= target'
+
+
+def describe(alert):
+    """Libellé lisible de la condition d'une alerte"""
+    if alert.get('expression'):
+        return f"{alert['expression']} · {alert.get('interval') or '1d'}"
+    sign = '≥' if alert.get('condition') == 'above' else '≤'
+    return f"{sign} {format_currency(alert['price'], alert['symbol'])}"
+
+
+# --- Surveillance ---
+
+class AlertMonitor:
+    """Évalue les alertes par lots (une passe par expression et intervalle)"""
+
+    def __init__(self, fetch=None):
+        self._fetch = fetch
+        self._lock = threading.Lock()
+        self._fired = OrderedDict()
+        self._cache = OrderedDict()
+
+    def _signals(self, condition, interval, members):
+        """(déclenchements effectifs, instants, clôtures) des alertes d'un groupe, lignes × barres"""
+        symbols = [alert['symbol'] for alert in members]
+        width = condition.lookback + REPLAY_BARS
+        needed = required_symbols(condition, symbols)
+        fetch = self._fetch or feed.get_bars_many
+        bars = fetch(needed, period_for(interval, width), interval)
+
+        key = (condition.text, interval, tuple((a['id'], a['symbol'], a.get('price'), a.get('created'))
+                                               for a in members))
+        # Les vues du cache sont recréées à chaque lecture, pas leurs tableaux
+        sources = tuple(_source(bars.get(symbol)) for symbol in needed)
+        with self._lock:
+            cached = self._cache.get(key)
+        # Barres inchangées : même résultat
+        if cached is not None and all(a is b for a, b in zip(cached[0], sources)):
+            return cached[1]
+
+        frame = Frame(bars, symbols, width, [alert.get('price') for alert in members])
+        trigger, release = condition.evaluate(frame)
+        # Barres antérieures à celle de la création de l'alerte : ignorées
+        created = [timezones.parse_time(alert.get('created')) for alert in members]
+        since = np.array([
+            0 if stamp is None else np.searchsorted(frame.times[row], stamp.value, side='right') - 1
+            for row, stamp in enumerate(created)
+        ])
+        alive = np.arange(width)[None, :] >= since[:, None]
+        result = (armed_triggers(trigger & alive, release & alive), frame.times, frame.series('close'))
+        with self._lock:
+            self._cache[key] = (sources, result)
+            self._cache.move_to_end(key)
+            while len(self._cache) > MAX_CACHED:
+                self._cache.popitem(last=False)
+        return result
+
+    def check(self, alerts):
+        """Alertes déclenchées sur leur dernière barre et pas encore notifiées.
+
+        Retourne [{'alert', 'time' (UTC), 'close'}] ; les expressions invalides
+        sont ignorées.
+        """
+        groups = {}
+        for alert in alerts:
+            try:
+                condition = compile_condition(expression_for(alert))
+            except ConditionError:
+                continue
+            interval = alert.get('interval') or '1d'
+            groups.setdefault((condition, interval if interval in INTERVALS else '1d'), []).append(alert)
+
+        events = []
+        for (condition, interval), members in groups.items():
+            fired, times, closes = self._signals(condition, interval, members)
+            for row in np.flatnonzero(fired[:, -1]):
+                alert = members[row]
+                key = (alert['id'], int(times[row, -1]))
+                with self._lock:
+                    if key in self._fired:
+                        continue
+                    self._fired[key] = True
+                    while len(self._fired) > MAX_FIRED:
+                        self._fired.popitem(last=False)
+                events.append({
+                    'alert': alert,
+                    'time': pd.Timestamp(int(times[row, -1]), tz='UTC'),
+                    'close': float(closes[row, -1]),
+                })
+        return events
+
+
+# Surveillance partagée par toutes les sessions du processus (un déclenchement notifié une fois)
+monitor = AlertMonitor()
@@ -0,0 +1,159 @@
+"""Export des historiques : CSV, JSON, Parquet, Arrow, CSV compressé, archives.
+
+Les fichiers sont produits par blocs de lignes dans un fichier temporaire
+(en mémoire jusqu'à SPOOL_SIZE, sur disque au-delà) : la mémoire utilisée
+par la sérialisation ne dépend pas de la taille de l'historique. Le fichier
+est relu d'un bloc à la fin : st.download_button n'accepte que des octets
+(ou io.BytesIO), pas un fichier temporaire.
+"""
+import gzip
+import io
+import json
+import tempfile
+import zipfile
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Nombre de lignes sérialisées à la fois
+CHUNK_ROWS = 5000
+# Taille au-delà de laquelle le fichier temporaire passe sur disque (octets)
+SPOOL_SIZE = 8 * 1024 * 1024
+
+# format : (libellé, extension, type MIME)
+FORMATS = {
+    'csv': ("CSV", 'csv', 'text/csv'),
+    'csv.gz': ("CSV compressé (gzip)", 'csv.gz', 'application/gzip'),
+    'csv.zst': ("CSV compressé (zstd)", 'csv.zst', 'application/zstd'),
+    'json': ("JSON", 'json', 'application/json'),
+    'parquet': ("Parquet", 'parquet', 'application/vnd.apache.parquet'),
+    'arrow': ("Arrow IPC", 'arrow', 'application/vnd.apache.arrow.file'),
+}
+
+# Formats déjà compressés : inutile de les recompresser dans une archive
+_COMPRESSED = ('csv.gz', 'csv.zst', 'parquet')
+
+
+def available_formats():
+    """Formats utilisables avec les bibliothèques installées"""
+    return [fmt for fmt in FORMATS if fmt != 'csv.zst' or pa.Codec.is_available('zstd')]
+
+
+def _chunks(frame, rows=CHUNK_ROWS):
+    for start in range(0, len(frame), rows):
+        yield start, frame.iloc[start:start + rows]
+
+
+def iter_csv(frame, rows=CHUNK_ROWS):
+    """CSV par blocs de texte (en-tête dans le premier bloc)"""
+    if frame.empty:
+        yield frame.to_csv()
+        return
+    for start, chunk in _chunks(frame, rows):
+        yield chunk.to_csv(header=start == 0)
+
+
+def iter_json(frame, meta, rows=CHUNK_ROWS):
+    """Document JSON {..meta, "data": [lignes]} produit par blocs"""
+    head = json.dumps(dict(meta, data=[]), default=str)
+    yield head[:-2]  # retire ']}' de fin pour insérer les lignes
+    for start, chunk in _chunks(frame, rows):
+        records = chunk.reset_index().to_dict(orient='records')
+        body = json.dumps(records, default=str)[1:-1]
+        if body:
+            yield (',' if start else '') + body
+    yield ']}'
+
+
+def _write_text(chunks, binary):
+    for chunk in chunks:
+        binary.write(chunk.encode('utf-8'))
+
+
+def _table(chunk):
+    return pa.Table.from_pandas(chunk, preserve_index=True)
+
+
+def write(frame, fmt, sink, meta=None):
+    """Écrit `frame` au format `fmt` dans le flux binaire `sink`"""
+    if fmt == 'csv':
+        _write_text(iter_csv(frame), sink)
+    elif fmt == 'csv.gz':
+        with gzip.GzipFile(fileobj=sink, mode='wb') as compressed:
+            _write_text(iter_csv(frame), compressed)
+    elif fmt == 'csv.zst':
+        with pa.CompressedOutputStream(pa.PythonFile(sink, mode='w'), 'zstd') as compressed:
+            _write_text(iter_csv(frame), compressed)
+    elif fmt == 'json':
+        _write_text(iter_json(frame, meta or {}), sink)
+    elif fmt in ('parquet', 'arrow'):
+        writer = None
+        target = pa.PythonFile(sink, mode='w')
+        try:
+            for _, chunk in _chunks(frame):
+                table = _table(chunk)
+                if writer is None:
+                    writer = (pq.ParquetWriter(target, table.schema, compression='zstd')
+                              if fmt == 'parquet' else pa.ipc.new_file(target, table.schema))
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        raise ValueError(f"Format d'export inconnu : {fmt}")
+
+
+class _Unclosable(io.RawIOBase):
+    """Flux qui ignore close() : pyarrow ferme ses puits en fin d'écriture"""
+
+    def __init__(self, raw):
+        self._raw = raw
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        return self._raw.write(data)
+
+    def tell(self):
+        return self._raw.tell()
+
+    def flush(self):
+        self._raw.flush()
+
+    def close(self):
+        pass
+
+
+def _drain(spool):
+    """Contenu du fichier temporaire, qui est ensuite fermé"""
+    with spool:
+        spool.seek(0)
+        return spool.read()
+
+
+def export_frame(frame, fmt, meta=None):
+    """Octets de l'export de `frame` au format `fmt`"""
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+    write(frame, fmt, _Unclosable(spool), meta)
+    return _drain(spool)
+
+
+def export_archive(symbols, load, fmt, meta=None):
+    """Octets d'une archive ZIP d'un fichier par symbole.
+
+    `load(symbol)` fournit l'historique d'un symbole (ou None) : un seul
+    historique est en mémoire à la fois. `meta(symbol)` fournit les
+    métadonnées JSON éventuelles.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+    compression = zipfile.ZIP_STORED if fmt in _COMPRESSED else zipfile.ZIP_DEFLATED
+    with zipfile.ZipFile(spool, mode='w', compression=compression, allowZip64=True) as archive:
+        for symbol in symbols:
+            frame = load(symbol)
+            if frame is None or frame.empty:
+                continue
+            name = f"{symbol}.{FORMATS[fmt][1]}"
+            with archive.open(name, mode='w', force_zip64=True) as member:
+                write(frame, fmt, _Unclosable(member), meta(symbol) if meta else None)
+    return _drain(spool)
@@ -0,0 +1,57 @@
+"""Point d'accès aux données du Dashboard.
+
+Si TRACKER_GATEWAY_URL est défini, les données viennent de la passerelle
+locale (tracker.gateway) ; sinon le processus interroge Yahoo lui-même.
+"""
+import os
+import time
+
+from tracker import upstream
+from tracker.bars import store as bar_store
+from tracker.gateway_client import GatewayClient, GatewayError
+from tracker.quotes import quote_book
+
+GATEWAY_URL = os.environ.get('TRACKER_GATEWAY_URL')
+gateway = GatewayClient(GATEWAY_URL) if GATEWAY_URL else None
+
+
+def get_bars(symbol, period, interval):
+    """Barres (index UTC) d'un symbole"""
+    if gateway is not None:
+        return gateway.get_bars(symbol, period, interval)
+    return bar_store.get_bars(symbol, period, interval)
+
+
+def get_bars_many(symbols, period, interval):
+    """Barres de plusieurs symboles, les manquantes en un seul appel : {symbole: DataFrame}"""
+    if gateway is not None:
+        return gateway.get_bars_many(symbols, period, interval)
+    return bar_store.get_many(symbols, period, interval)
+
+
+def get_info(symbol):
+    """Fiche descriptive d'un symbole"""
+    if gateway is not None:
+        return gateway.get_info(symbol)
+    return upstream.fetch_info(symbol)
+
+
+def get_quotes(symbols):
+    """Derniers cours d'un lot de symboles, en une seule requête"""
+    if gateway is not None:
+        return gateway.get_quotes(symbols)
+    return quote_book.get(symbols)
+
+
+def wait_for_quotes(symbols, timeout):
+    """Attend un changement de cours (abonnement si passerelle, sinon simple pause)"""
+    if gateway is not None:
+        started = time.monotonic()
+        try:
+            return gateway.wait_for_quotes(symbols, timeout)
+        except (GatewayError, OSError):
+            # Passerelle arrêtée ou flux coupé : simple pause jusqu'au délai
+            time.sleep(max(timeout - (time.monotonic() - started), 0))
+            return {}
+    time.sleep(timeout)
+    return {}
@@ -0,0 +1,247 @@
+"""Passerelle locale de cotations : un seul processus interroge Yahoo Finance.
+
+Les sessions du Dashboard interrogent la passerelle (HTTP sur la boucle
+locale ou socket Unix) au lieu d'appeler Yahoo elles-mêmes. La charge amont
+dépend alors du nombre de symboles distincts, plus du nombre d'utilisateurs.
+
+Lancement :
+    python -m tracker.gateway --port 8765
+    python -m tracker.gateway --unix /tmp/tracker-gateway.sock
+
+Points d'accès :
+    GET /health
+    GET /quotes?symbols=600519.SS,0700.HK          (JSON)
+    GET /bars?symbol=0700.HK&period=1mo&interval=1h (flux Arrow IPC)
+    GET /prefetch?symbols=600519.SS,0700.HK&period=2y&interval=1d
+                                                    (JSON, un seul appel amont)
+    GET /info?symbol=0700.HK                        (JSON)
+    GET /stream?symbols=600519.SS,0700.HK           (Server-Sent Events)
+"""
+import argparse
+import json
+import os
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pyarrow as pa
+
+from tracker import upstream
+from tracker.bars import store as bar_store
+from tracker.quotes import QuoteBook
+from tracker.shared_cache import to_arrow
+
+DEFAULT_PORT = 8765
+# Période de rafraîchissement des cotations suivies (secondes)
+POLL_INTERVAL = 15
+# Un symbole non demandé depuis ce délai n'est plus rafraîchi (secondes)
+SUBSCRIPTION_TTL = 600
+# Intervalle des messages de maintien des flux SSE (secondes)
+HEARTBEAT = 15
+INFO_TTL = 3600
+
+
+class Gateway:
+    """État partagé de la passerelle : carnet de cotations, symboles suivis, fiches"""
+
+    def __init__(self, quote_book=None, poll_interval=POLL_INTERVAL):
+        self.quotes = quote_book or QuoteBook(ttl=poll_interval)
+        self.poll_interval = poll_interval
+        self._watched = {}
+        self._infos = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def watch(self, symbols):
+        """Marque des symboles comme suivis (rafraîchis en tâche de fond)"""
+        now = time.time()
+        with self._lock:
+            for symbol in symbols:
+                self._watched[symbol] = now
+
+    def watched(self):
+        cutoff = time.time() - SUBSCRIPTION_TTL
+        with self._lock:
+            self._watched = {s: t for s, t in self._watched.items() if t >= cutoff}
+            return list(self._watched)
+
+    def info(self, symbol):
+        with self._lock:
+            cached = self._infos.get(symbol)
+        if cached is not None and time.time() - cached[0] < INFO_TTL:
+            return cached[1]
+        info = upstream.fetch_info(symbol)
+        with self._lock:
+            self._infos[symbol] = (time.time(), info)
+        return info
+
+    def poll_forever(self):
+        """Rafraîchit en un lot toutes les cotations suivies à intervalle fixe"""
+        while not self._stopped.wait(self.poll_interval):
+            symbols = self.watched()
+            if symbols:
+                try:
+                    self.quotes.refresh(symbols)
+                except Exception as e:
+                    print(f"Rafraîchissement des cotations impossible : {e}")
+
+    def stop(self):
+        self._stopped.set()
+
+
+def _symbols(query):
+    raw = ','.join(query.get('symbols', []))
+    return [s.strip().upper() for s in raw.split(',') if s.strip()]
+
+
+class GatewayHandler(BaseHTTPRequestHandler):
+    """Routes HTTP de la passerelle"""
+
+    gateway = None
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        route = {
+            '/health': self._health,
+            '/quotes': self._quotes,
+            '/bars': self._bars,
+            '/prefetch': self._prefetch,
+            '/info': self._info,
+            '/stream': self._stream,
+        }.get(url.path)
+        if route is None:
+            self._send_json({'error': 'route inconnue'}, status=404)
+            return
+        try:
+            route(query)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        except Exception as e:
+            self._send_json({'error': str(e)}, status=502)
+
+    def _send(self, body, content_type, status=200):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, payload, status=200):
+        self._send(json.dumps(payload, default=str).encode(), 'application/json', status)
+
+    def _health(self, query):
+        self._send_json({'status': 'ok', 'watched': len(self.gateway.watched())})
+
+    def _quotes(self, query):
+        symbols = _symbols(query)
+        self.gateway.watch(symbols)
+        self._send_json({'quotes': self.gateway.quotes.get(symbols)})
+
+    def _bars(self, query):
+        symbol = query['symbol'][0].upper()
+        period = query.get('period', ['1mo'])[0]
+        interval = query.get('interval', ['1d'])[0]
+        bars = bar_store.get_bars(symbol, period, interval)
+        if bars.empty:
+            self._send_json({'error': f"Aucune donnée pour {symbol}"}, status=404)
+            return
+        table = to_arrow(bars, {'symbol': symbol, 'period': period, 'interval': interval})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        self._send(sink.getvalue().to_pybytes(), 'application/vnd.apache.arrow.stream')
+
+    def _prefetch(self, query):
+        """Charge un lot de symboles en un appel groupé ; les barres se lisent ensuite via /bars"""
+        period = query.get('period', ['1mo'])[0]
+        interval = query.get('interval', ['1d'])[0]
+        found = bar_store.get_many(_symbols(query), period, interval)
+        self._send_json({'symbols': list(found)})
+
+    def _info(self, query):
+        self._send_json({'info': self.gateway.info(query['symbol'][0].upper())})
+
+    def _stream(self, query):
+        """Flux SSE : un évènement 'quote' à chaque changement de cours suivi"""
+        symbols = _symbols(query)
+        self.gateway.watch(symbols)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+        book = self.gateway.quotes
+        sent = {}
+        version = book.version
+        initial = True
+        while True:
+            self.gateway.watch(symbols)
+            snapshot = book.snapshot(symbols)
+            changed = {s: q for s, q in snapshot.items() if sent.get(s) != q}
+            if changed or initial:
+                # Le premier évènement décrit l'état courant, pas un changement
+                payload = json.dumps({'quotes': changed, 'version': book.version, 'initial': initial})
+                self.wfile.write(f"event: quote\ndata: {payload}\n\n".encode())
+                sent.update(changed)
+                initial = False
+            else:
+                self.wfile.write(b": heartbeat\n\n")
+            self.wfile.flush()
+            version = book.wait_for_change(version, HEARTBEAT)
+
+    def log_message(self, format, *args):
+        if os.environ.get('TRACKER_GATEWAY_LOG'):
+            super().log_message(format, *args)
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        # BaseHTTPRequestHandler attend une adresse (hôte, port)
+        return request, ('unix', 0)
+
+
+def serve(host='127.0.0.1', port=DEFAULT_PORT, unix_socket=None, poll_interval=POLL_INTERVAL):
+    """Démarre la passerelle (bloquant)"""
+    gateway = Gateway(poll_interval=poll_interval)
+    handler = type('BoundGatewayHandler', (GatewayHandler,), {'gateway': gateway})
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.unlink(unix_socket)
+        server = _UnixHTTPServer(unix_socket, handler)
+        where = f"unix://{unix_socket}"
+    else:
+        server = ThreadingHTTPServer((host, port), handler)
+        where = f"http://{host}:{port}"
+
+    threading.Thread(target=gateway.poll_forever, name='quote-poller', daemon=True).start()
+    print(f"🏮 Passerelle de cotations à l'écoute sur {where}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        gateway.stop()
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Passerelle locale de cotations pour le Dashboard")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--unix', help="chemin d'un socket Unix (remplace --host/--port)")
+    parser.add_argument('--poll', type=float, default=POLL_INTERVAL, help="période de rafraîchissement (s)")
+    args = parser.parse_args(argv)
+    serve(args.host, args.port, args.unix, args.poll)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""Client de la passerelle locale de cotations (voir tracker.gateway)."""
+import http.client
+import json
+import socket
+import time
+from urllib.parse import urlencode, urlsplit
+
+import pyarrow as pa
+
+from tracker import metrics
+from tracker.shared_cache import from_arrow
+
+TIMEOUT = 30
+
+
+class _UnixConnection(http.client.HTTPConnection):
+    """Connexion HTTP sur socket Unix"""
+
+    def __init__(self, path, timeout=TIMEOUT):
+        super().__init__('localhost', timeout=timeout)
+        self._path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self._path)
+
+
+class GatewayError(RuntimeError):
+    """Réponse en erreur de la passerelle"""
+
+
+class GatewayClient:
+    """Accès aux cotations et barres servies par la passerelle.
+
+    `url` : 'http://127.0.0.1:8765' ou 'unix:///tmp/tracker-gateway.sock'.
+    """
+
+    def __init__(self, url):
+        self.url = url
+        parts = urlsplit(url)
+        self._unix_path = parts.path if parts.scheme == 'unix' else None
+        self._host = parts.hostname
+        self._port = parts.port
+
+    def _connection(self, timeout=TIMEOUT):
+        if self._unix_path:
+            return _UnixConnection(self._unix_path, timeout=timeout)
+        return http.client.HTTPConnection(self._host, self._port, timeout=timeout)
+
+    def _get(self, path, params):
+        metrics.count('gateway_calls')
+        connection = self._connection()
+        try:
+            connection.request('GET', f"{path}?{urlencode(params)}")
+            response = connection.getresponse()
+            body = response.read()
+            if response.status != 200:
+                raise GatewayError(json.loads(body).get('error', response.reason))
+            return body, response.getheader('Content-Type', '')
+        finally:
+            connection.close()
+
+    def get_quotes(self, symbols):
+        body, _ = self._get('/quotes', {'symbols': ','.join(symbols)})
+        return json.loads(body)['quotes']
+
+    def get_bars(self, symbol, period, interval):
+        """Barres (index UTC) sous forme de DataFrame"""
+        body, _ = self._get('/bars', {'symbol': symbol, 'period': period, 'interval': interval})
+        table = pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+        return from_arrow(table)[0]
+
+    def get_bars_many(self, symbols, period, interval):
+        """{symbole: barres} ; la passerelle charge le lot en un seul appel amont"""
+        body, _ = self._get('/prefetch', {'symbols': ','.join(symbols), 'period': period, 'interval': interval})
+        return {symbol: self.get_bars(symbol, period, interval) for symbol in json.loads(body)['symbols']}
+
+    def get_info(self, symbol):
+        body, _ = self._get('/info', {'symbol': symbol})
+        return json.loads(body)['info']
+
+    def wait_for_quotes(self, symbols, timeout):
+        """S'abonne au flux et attend un changement de cours (ou `timeout`).
+
+        Retourne les cotations modifiées, ou {} si rien n'a changé ;
+        GatewayError si la passerelle ferme le flux avant.
+        """
+        deadline = time.monotonic() + timeout
+        connection = self._connection(timeout=timeout)
+        try:
+            connection.request('GET', f"/stream?{urlencode({'symbols': ','.join(symbols)})}")
+            response = connection.getresponse()
+            event = None
+            while time.monotonic() < deadline:
+                raw = response.fp.readline()
+                if not raw:
+                    # Flux fermé par la passerelle : readline() ne bloquerait plus
+                    raise GatewayError("Flux de cotations interrompu")
+                line = raw.decode().rstrip('\n')
+                if line.startswith('event:'):
+                    event = line[6:].strip()
+                elif line.startswith('data:') and event == 'quote':
+                    data = json.loads(line[5:])
+                    if not data.get('initial') and data['quotes']:
+                        return data['quotes']
+        except socket.timeout:
+            pass
+        finally:
+            connection.close()
+        return {}
@@ -0,0 +1,64 @@
+"""Indicateurs techniques vectorisés (tableaux 1D ou 2D symboles × barres).
+
+Les calculs se font le long du dernier axe : une seule passe sert toute une
+watchlist. Les premières valeurs, sans historique suffisant, valent NaN.
+"""
+import numpy as np
+import pandas as pd
+
+
+def _as_float(values):
+    return np.asarray(values, dtype=np.float64)
+
+
+def sma(values, window):
+    """Moyenne mobile simple sur `window` barres"""
+    values = _as_float(values)
+    out = np.full(values.shape, np.nan)
+    if values.shape[-1] < window:
+        return out
+    cumulative = np.cumsum(np.nan_to_num(values), axis=-1)
+    cumulative = np.concatenate([np.zeros(values.shape[:-1] + (1,)), cumulative], axis=-1)
+    out[..., window - 1:] = (cumulative[..., window:] - cumulative[..., :-window]) / window
+    return out
+
+
+def _wilder(values, window):
+    """Lissage de Wilder (moyenne exponentielle alpha = 1/window) le long du dernier axe"""
+    frame = pd.DataFrame(np.atleast_2d(values).T)
+    smoothed = frame.ewm(alpha=1.0 / window, adjust=False, min_periods=window).mean().to_numpy().T
+    return smoothed.reshape(np.shape(values))
+
+
+def rsi(values, window=14):
+    """Relative Strength Index (0-100)"""
+    values = _as_float(values)
+    delta = np.diff(values, axis=-1, prepend=np.nan)
+    gains = np.where(delta > 0, delta, 0.0)
+    losses = np.where(delta < 0, -delta, 0.0)
+    gains[..., 0] = np.nan
+    losses[..., 0] = np.nan
+    average_gain = _wilder(gains, window)
+    average_loss = _wilder(losses, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        strength = average_gain / average_loss
+        out = 100 - 100 / (1 + strength)
+    return np.where(average_loss == 0, np.where(average_gain > 0, 100.0, 50.0), out)
+
+
+def pct_change(values, periods=1):
+    """Variation en % sur `periods` barres"""
+    values = _as_float(values)
+    out = np.full(values.shape, np.nan)
+    if values.shape[-1] > periods:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out[..., periods:] = (values[..., periods:] / values[..., :-periods] - 1) * 100
+    return out
+
+
+def max_drawdown(values):
+    """Plus forte baisse depuis un plus haut, en % (valeur négative)"""
+    values = _as_float(values)
+    peaks = np.fmax.accumulate(values, axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.nanmin(values / peaks - 1, axis=-1) * 100
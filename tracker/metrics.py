@@ -0,0 +1,200 @@
+"""Mesures de performance par exécution du script (« spans »).
+
+Chaque span mesure une section du Dashboard (chargement, boucles, modèle,
+graphiques, exports) : durée, succès/échecs du cache, appels amont. Les
+compteurs sont propres au thread courant (Streamlit exécute le script de
+chaque session dans son propre thread) ; les durées sont agrégées pour tout
+le processus sur une fenêtre glissante, d'où les quantiles p50/p95/p99.
+
+Si TRACKER_METRICS_PORT est défini, les agrégats sont servis au format texte
+Prometheus sur http://127.0.0.1:<port>/metrics.
+"""
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+# Nombre de dernières durées conservées par span pour les quantiles
+RESERVOIR = 1024
+QUANTILES = (0.5, 0.95, 0.99)
+# Compteurs attribués aux spans ouverts
+COUNTERS = ('cache_hits', 'cache_misses', 'upstream_calls', 'gateway_calls')
+
+_local = threading.local()
+
+
+class _Series:
+    def __init__(self):
+        self.durations = deque(maxlen=RESERVOIR)
+        self.count = 0
+        self.total = 0.0
+        self.counters = dict.fromkeys(COUNTERS, 0)
+
+
+class Registry:
+    """Agrégats des spans de toutes les sessions du processus"""
+
+    def __init__(self):
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds, counters):
+        with self._lock:
+            series = self._series.get(name)
+            if series is None:
+                series = self._series[name] = _Series()
+            series.durations.append(seconds)
+            series.count += 1
+            series.total += seconds
+            for counter, value in counters.items():
+                series.counters[counter] += value
+
+    def summary(self):
+        """{span: {'count', 'sum', 'p50', 'p95', 'p99', compteurs...}}"""
+        with self._lock:
+            snapshot = {name: (list(s.durations), s.count, s.total, dict(s.counters))
+                        for name, s in self._series.items()}
+        summary = {}
+        for name, (durations, count, total, counters) in sorted(snapshot.items()):
+            values = np.percentile(durations, [q * 100 for q in QUANTILES])
+            summary[name] = dict(
+                count=count, sum=total,
+                **{f"p{int(q * 100)}": float(v) for q, v in zip(QUANTILES, values)},
+                **counters
+            )
+        return summary
+
+    def prometheus(self):
+        """Exposition au format texte Prometheus"""
+        summary = self.summary()
+        lines = [
+            "# HELP tracker_span_seconds Durée des sections du Dashboard (secondes)",
+            "# TYPE tracker_span_seconds summary",
+        ]
+        for name, row in summary.items():
+            for q in QUANTILES:
+                lines.append(f'tracker_span_seconds{{span="{name}",quantile="{q}"}} {row[f"p{int(q * 100)}"]:.6f}')
+            lines.append(f'tracker_span_seconds_sum{{span="{name}"}} {row["sum"]:.6f}')
+            lines.append(f'tracker_span_seconds_count{{span="{name}"}} {row["count"]}')
+        for counter in COUNTERS:
+            lines.append(f"# TYPE tracker_span_{counter}_total counter")
+            for name, row in summary.items():
+                lines.append(f'tracker_span_{counter}_total{{span="{name}"}} {row[counter]}')
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+registry = Registry()
+
+
+def _stack():
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+class Span:
+    """Section mesurée : `with span('x'):` ou `s = span('x').start()` ... `s.stop()`"""
+
+    def __init__(self, name):
+        self.name = name
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.seconds = None
+        self._started = None
+
+    def start(self):
+        self._started = time.perf_counter()
+        _stack().append(self)
+        return self
+
+    def stop(self):
+        if self._started is None or self.seconds is not None:
+            return self
+        self.seconds = time.perf_counter() - self._started
+        stack = _stack()
+        if self in stack:
+            stack.remove(self)
+        registry.observe(self.name, self.seconds, self.counters)
+        rerun = getattr(_local, 'rerun', None)
+        if rerun is not None:
+            rerun.append(self)
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def span(name):
+    return Span(name)
+
+
+def timed(name, fn, *args, **kwargs):
+    """Appelle `fn` dans un span (pour les fichiers générés hors du script)"""
+    with span(name):
+        return fn(*args, **kwargs)
+
+
+def count(counter, n=1):
+    """Ajoute `n` au compteur de tous les spans ouverts dans ce thread"""
+    for opened in getattr(_local, 'stack', ()):
+        opened.counters[counter] += n
+
+
+def begin_rerun():
+    """Début d'une exécution du script : oublie les spans restés ouverts"""
+    _local.stack = []
+    _local.rerun = []
+
+
+def rerun_spans():
+    """Spans terminés depuis `begin_rerun` dans ce thread"""
+    return list(getattr(_local, 'rerun', None) or ())
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = registry.prometheus().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def serve_from_environment():
+    """Démarre (une fois par processus) l'exposition Prometheus si TRACKER_METRICS_PORT est défini"""
+    global _server
+    port = os.environ.get('TRACKER_METRICS_PORT')
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            host = os.environ.get('TRACKER_METRICS_HOST', '127.0.0.1')
+            try:
+                _server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+            except OSError:
+                # Port déjà pris (autre réplica) : pas d'exposition pour ce processus
+                _server = False
+                return None
+            threading.Thread(target=_server.serve_forever, name='metrics-http', daemon=True).start()
+        return _server or None
@@ -0,0 +1,131 @@
+"""Figures en chandeliers détectées sur les barres OHLC (calcul vectorisé).
+
+Toutes les figures se lisent sur les mêmes matrices symboles × barres
+(ouverture, plus haut, plus bas, clôture), décalées d'une ou deux barres :
+une seule passe sur les données en colonnes sert toute la watchlist.
+Les limites de variation (±10 %, ±20 % pour ChiNext et STAR) ne concernent
+que les barres journalières des actions A.
+"""
+import numpy as np
+import pandas as pd
+
+from tracker.conditions import Frame
+from tracker.universe import price_limit
+
+# Figure : (libellé, sens : 1 haussier, -1 baissier, 0 neutre)
+PATTERNS = {
+    'doji': ("Doji", 0),
+    'bullish_engulfing': ("Avalement haussier", 1),
+    'bearish_engulfing': ("Avalement baissier", -1),
+    'hammer': ("Marteau", 1),
+    'morning_star': ("Étoile du matin", 1),
+    'evening_star': ("Étoile du soir", -1),
+    'gap_up': ("Gap haussier", 1),
+    'gap_down': ("Gap baissier", -1),
+    'limit_up': ("Limite haussière", 1),
+    'limit_down': ("Limite baissière", -1),
+}
+DIRECTIONS = {1: "Haussier", -1: "Baissier", 0: "Neutre"}
+# Corps d'un doji : au plus cette fraction de l'amplitude
+DOJI_BODY = 0.1
+# Corps « long » de la première bougie d'une étoile : au moins cette fraction de l'amplitude
+STAR_BODY = 0.6
+# Barres lues pour les signaux du jour
+SCAN_BARS = 10
+
+
+def _previous(values, bars=1):
+    """Valeurs `bars` barres plus tôt (NaN au début)"""
+    if values.shape[-1] <= bars:
+        return np.full(values.shape, np.nan)
+    return np.concatenate([np.full(values.shape[:-1] + (bars,), np.nan), values[..., :-bars]], axis=-1)
+
+
+def detect(open_, high, low, close, limits=None):
+    """{figure: booléens} de même forme que les tableaux OHLC (1D ou lignes × barres).
+
+    `limits` : limite de variation par ligne (NaN sans limite) ; sans elle,
+    les figures de limite ne sont pas cherchées.
+    """
+    open_, high, low, close = (np.asarray(values, dtype=np.float64) for values in (open_, high, low, close))
+    body = np.abs(close - open_)
+    span = high - low
+    top, bottom = np.maximum(open_, close), np.minimum(open_, close)
+    bullish, bearish = close > open_, close < open_
+    open_1, close_1, high_1, low_1 = (_previous(values) for values in (open_, close, high, low))
+    body_1, top_1, bottom_1 = _previous(body), _previous(top), _previous(bottom)
+    open_2, close_2, body_2, span_2 = (_previous(values, 2) for values in (open_, close, body, span))
+
+    with np.errstate(invalid='ignore'):
+        signals = {
+            'doji': (span > 0) & (body <= DOJI_BODY * span),
+            'bullish_engulfing': bullish & (close_1 < open_1) & (open_ <= close_1) & (close >= open_1) & (body > body_1),
+            'bearish_engulfing': bearish & (close_1 > open_1) & (open_ >= close_1) & (close <= open_1) & (body > body_1),
+            # Longue mèche basse après trois barres de baisse
+            'hammer': ((span > 0) & (bottom - low >= 2 * body) & (high - top <= 0.1 * span)
+                       & (close_1 < _previous(close, 4))),
+            # Longue bougie, petite bougie décalée, puis reprise au-delà du milieu de la première
+            'morning_star': ((close_2 < open_2) & (body_2 >= STAR_BODY * span_2) & (body_1 <= 0.3 * body_2)
+                             & (top_1 < close_2) & bullish & (close > (open_2 + close_2) / 2)),
+            'evening_star': ((close_2 > open_2) & (body_2 >= STAR_BODY * span_2) & (body_1 <= 0.3 * body_2)
+                             & (bottom_1 > close_2) & bearish & (close < (open_2 + close_2) / 2)),
+            'gap_up': low > high_1,
+            'gap_down': high < low_1,
+        }
+        if limits is not None:
+            limits = np.asarray(limits, dtype=np.float64)
+            limits = limits[:, None] if close.ndim == 2 else limits
+            # Prix limite arrondi au centime comme sur les bourses de Shanghai et Shenzhen
+            signals['limit_up'] = close >= np.round(close_1 * (1 + limits), 2) - 0.005
+            signals['limit_down'] = close <= np.round(close_1 * (1 - limits), 2) + 0.005
+    return signals
+
+
+def _limits(symbols):
+    return np.array([price_limit(symbol) or np.nan for symbol in symbols])
+
+
+def scan(bars, symbols, width=SCAN_BARS, daily=True):
+    """(Frame, {figure: booléens symboles × barres}) sur les `width` dernières barres"""
+    frame = Frame(bars, symbols, width)
+    signals = detect(frame.series('open'), frame.series('high'), frame.series('low'), frame.series('close'),
+                     _limits(symbols) if daily else None)
+    return frame, signals
+
+
+def signals_today(bars, symbols):
+    """Figures de la dernière barre journalière de chaque symbole : une ligne par signal"""
+    symbols = [symbol for symbol in dict.fromkeys(symbols) if symbol in bars and not bars[symbol].empty]
+    if not symbols:
+        return pd.DataFrame(columns=['Symbole', 'Signal', 'Sens', 'Clôture', 'Variation %', 'Date'])
+    frame, signals = scan(bars, symbols)
+    close = frame.series('close')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change = (close[:, -1] / close[:, -2] - 1) * 100
+    rows = []
+    for name, hits in signals.items():
+        label, direction = PATTERNS[name]
+        for row in np.flatnonzero(hits[:, -1]):
+            rows.append({
+                'Symbole': symbols[row],
+                'Signal': label,
+                'Sens': DIRECTIONS[direction],
+                'Clôture': close[row, -1],
+                'Variation %': change[row],
+                'Date': pd.Timestamp(int(frame.times[row, -1]), tz='UTC'),
+            })
+    return pd.DataFrame(rows, columns=['Symbole', 'Signal', 'Sens', 'Clôture', 'Variation %', 'Date'])
+
+
+def chart_marks(hist, symbol, daily=True):
+    """Barres de `hist` portant une figure : DataFrame (libellés, sens dominant, OHLC) indexé comme `hist`"""
+    signals = detect(hist['Open'].to_numpy(), hist['High'].to_numpy(), hist['Low'].to_numpy(),
+                     hist['Close'].to_numpy(), (price_limit(symbol) or np.nan) if daily else None)
+    names = list(signals)
+    hits = np.vstack([signals[name] for name in names])
+    marked = np.flatnonzero(hits.any(axis=0))
+    directions = np.array([PATTERNS[name][1] for name in names])
+    marks = hist.iloc[marked][['Open', 'High', 'Low', 'Close']].copy()
+    marks['Figures'] = [', '.join(PATTERNS[names[i]][0] for i in np.flatnonzero(hits[:, column])) for column in marked]
+    marks['Sens'] = np.sign((directions[:, None] * hits[:, marked]).sum(axis=0))
+    return marks
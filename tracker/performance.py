@@ -0,0 +1,259 @@
+"""Performance historique d'un portefeuille (calcul vectorisé).
+
+Les clôtures journalières sont alignées sur le calendrier local de chaque
+place (matrice jours × symboles, dernier cours reporté les jours fermés).
+Les quantités détenues forment une matrice de même forme (somme cumulée des
+lots à partir de leur date d'achat) : valeurs = quantités × cours, et les
+apports par marché sont le produit de la matrice des P&L par la matrice
+d'appartenance symboles × marchés. Les apports restent dans la devise de
+chaque place, comme le tableau des positions ; la courbe de l'ensemble
+(valeur, investi, P&L, drawdown) est en yuans : cours convertis au taux du
+jour (HKDCNY=X, USDCNY=X), achats au taux du jour d'achat. Un symbole dont
+le taux manque est exclu de la courbe.
+
+Le calcul est gardé par portefeuille : tant que les barres n'ont pas changé,
+le résultat est resservi tel quel ; à l'arrivée d'une nouvelle barre, seules
+les nouvelles lignes (et la dernière, dont le cours a pu bouger) sont
+recalculées.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from tracker import timezones
+from tracker.cache import source
+from tracker.resampling import period_start
+from tracker.sessions import market_for
+from tracker.universe import fx_to_cny, get_exchange
+
+# Périodes Yahoo candidates, de la plus courte à la plus longue
+PERIODS = ['1mo', '3mo', '6mo', '1y', '2y', '5y', '10y', 'max']
+# Portefeuilles dont le calcul est gardé pour la mise à jour incrémentale
+MAX_BOOKS = 256
+
+DAY_NS = 86_400 * 10**9
+
+
+def history_period(portfolio, now=None):
+    """Plus courte période Yahoo couvrant la plus ancienne position"""
+    now = now or pd.Timestamp.now(tz='UTC')
+    bought = [timezones.parse_time(p.get('date')) for positions in portfolio.values() for p in positions]
+    earliest = min((b for b in bought if b is not None), default=now)
+    for period in PERIODS:
+        if period_start(period, now) <= earliest:
+            return period
+    return PERIODS[-1]
+
+
+def _local_days(index, tz):
+    """Jour calendaire local (nombre de jours depuis 1970) de chaque barre"""
+    return index.tz_convert(tz).tz_localize(None).as_unit('ns').asi8 // DAY_NS
+
+
+def align_closes(bars, symbols):
+    """(jours, clôtures jours × symboles) au calendrier local de chaque place"""
+    days = [_local_days(bars[symbol].index, market_for(symbol).timezone) for symbol in symbols]
+    calendar = np.unique(np.concatenate(days))
+    prices = np.full((len(calendar), len(symbols)), np.nan)
+    for column, symbol in enumerate(symbols):
+        # Plusieurs barres le même jour : la dernière l'emporte
+        prices[np.searchsorted(calendar, days[column]), column] = bars[symbol]['Close'].to_numpy(dtype=np.float64)
+    # Jours fermés : dernier cours connu ; avant la première cotation : premier cours
+    rows = np.where(np.isnan(prices), 0, np.arange(len(calendar))[:, None])
+    prices = np.take_along_axis(prices, np.maximum.accumulate(rows, axis=0), axis=0)
+    first = np.take_along_axis(prices, np.argmax(~np.isnan(prices), axis=0)[None, :], axis=0)
+    prices = np.where(np.isnan(prices), first, prices)
+    return pd.DatetimeIndex(calendar * DAY_NS), prices
+
+
+def fx_symbols(symbols):
+    """Taux de change à télécharger avec les barres de `symbols` pour les ramener en yuans"""
+    return list(dict.fromkeys(rate for rate in map(fx_to_cny, symbols) if rate))
+
+
+def align_rates(bars, symbols, dates):
+    """Taux vers le yuan (jours × symboles) au calendrier `dates` ; NaN si le taux manque"""
+    calendar = dates.as_unit('ns').asi8 // DAY_NS
+    rates = np.ones((len(calendar), len(symbols)))
+    for rate in fx_symbols(symbols):
+        columns = [column for column, symbol in enumerate(symbols) if fx_to_cny(symbol) == rate]
+        frame = bars.get(rate)
+        if frame is None or frame.empty:
+            rates[:, columns] = np.nan
+            continue
+        # Barres de change datées à minuit UTC
+        days = _local_days(frame.index, 'UTC')
+        closes = frame['Close'].to_numpy(dtype=np.float64)
+        # Dernier taux connu à chaque jour ; avant le premier : premier taux
+        position = np.maximum(np.searchsorted(days, calendar, side='right') - 1, 0)
+        rates[:, columns] = closes[position][:, None]
+    return rates
+
+
+class PerformanceBook:
+    """Calcul incrémental de la performance d'un portefeuille figé"""
+
+    def __init__(self, portfolio):
+        self.symbols = list(portfolio)
+        lots = [(column, p['shares'], p['buy_price'], timezones.parse_time(p.get('date')))
+                for column, symbol in enumerate(self.symbols) for p in portfolio[symbol]]
+        self._lot_symbol = np.array([lot[0] for lot in lots], dtype=np.intp)
+        self._lot_shares = np.array([lot[1] for lot in lots], dtype=np.float64)
+        self._lot_cost = self._lot_shares * np.array([lot[2] for lot in lots], dtype=np.float64)
+        # Jour d'achat dans le calendrier de la place (inconnu : dès la première barre)
+        self._lot_day = np.array([
+            np.datetime64('NaT') if bought is None
+            else np.datetime64(bought.tz_convert(market_for(self.symbols[column]).timezone)
+                               .tz_localize(None).normalize(), 'ns')
+            for column, _, _, bought in lots
+        ], dtype='M8[ns]')
+        exchanges = [get_exchange(symbol) for symbol in self.symbols]
+        self.markets = list(dict.fromkeys(exchanges))
+        self._membership = np.zeros((len(self.symbols), len(self.markets)))
+        self._membership[np.arange(len(self.symbols)), [self.markets.index(e) for e in exchanges]] = 1.0
+        self._lock = threading.Lock()
+        self._sources = None
+        self._result = None
+        self._dates = None
+        self._prices = None
+        self._rates = None
+        self._state = None
+
+    def update(self, bars):
+        """Performance à partir des barres journalières {symbole: DataFrame}, taux de change compris"""
+        # Les vues du cache sont recréées à chaque lecture, pas leurs tableaux
+        sources = tuple(source(bars[symbol]) if symbol in bars and not bars[symbol].empty else None
+                        for symbol in self.symbols + fx_symbols(self.symbols))
+        with self._lock:
+            # Barres inchangées : rien à recalculer
+            if self._sources is not None and all(a is b for a, b in zip(sources, self._sources)):
+                return self._result
+            dates, prices = align_closes(bars, self.symbols)
+            self._result = self._compute(dates, prices, align_rates(bars, self.symbols, dates))
+            self._sources = sources
+            return self._result
+
+    def _kept_rows(self, dates, prices, rates):
+        """Lignes du calcul précédent encore valables (toutes sauf la dernière)"""
+        if self._dates is None:
+            return 0
+        kept = len(self._dates) - 1
+        if kept <= 0 or len(dates) < kept or not dates[:kept].equals(self._dates[:kept]):
+            return 0
+        if not np.array_equal(prices[:kept], self._prices[:kept]):
+            return 0
+        if not np.array_equal(rates[:kept], self._rates[:kept], equal_nan=True):
+            return 0
+        return kept
+
+    def _compute(self, dates, prices, rates):
+        kept = self._kept_rows(dates, prices, rates)
+        # Sans taux de change, le symbole ne compte pas dans la courbe en yuans
+        unconverted = np.isnan(rates).all(axis=0)
+        converted_rates = np.where(np.isnan(rates), 0.0, rates)
+        n, m = prices.shape
+        lot_rows = np.searchsorted(dates.to_numpy(), self._lot_day, side='left')
+        lot_rows[np.isnat(self._lot_day)] = 0
+        # Lots achetés sur les lignes recalculées ; les précédents sont dans la ligne `kept - 1`
+        fresh = (lot_rows >= kept) & (lot_rows < n)
+        bought = np.zeros((n - kept, m))
+        paid = np.zeros((n - kept, m))
+        paid_cny = np.zeros((n - kept, m))
+        rows, columns = lot_rows[fresh], self._lot_symbol[fresh]
+        np.add.at(bought, (rows - kept, columns), self._lot_shares[fresh])
+        np.add.at(paid, (rows - kept, columns), self._lot_cost[fresh])
+        np.add.at(paid_cny, (rows - kept, columns), self._lot_cost[fresh] * converted_rates[rows, columns])
+
+        if kept:
+            previous = {name: values[:kept] for name, values in self._state.items()}
+            quantities = previous['quantities'][-1] + np.cumsum(bought, axis=0)
+            costs = previous['costs'][-1] + np.cumsum(paid, axis=0)
+            costs_cny = previous['costs_cny'][-1] + np.cumsum(paid_cny, axis=0)
+        else:
+            previous = None
+            quantities = np.cumsum(bought, axis=0)
+            costs = np.cumsum(paid, axis=0)
+            costs_cny = np.cumsum(paid_cny, axis=0)
+
+        profits = quantities * prices[kept:] - costs
+        equity = (quantities * prices[kept:] * converted_rates[kept:]).sum(axis=1)
+        invested = costs_cny.sum(axis=1)
+        pnl = equity - invested
+        # Rendement du jour rapporté au capital exposé (valeur de la veille + achats du jour)
+        last_equity, last_invested, last_pnl, last_nav = (
+            (previous['equity'][-1], previous['invested'][-1], previous['pnl'][-1], previous['nav'][-1])
+            if previous else (0.0, 0.0, 0.0, 1.0)
+        )
+        daily_pnl = np.diff(pnl, prepend=last_pnl)
+        exposed = np.concatenate([[last_equity], equity[:-1]]) + np.diff(invested, prepend=last_invested)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = np.where(exposed > 0, daily_pnl / exposed, 0.0)
+        nav = last_nav * np.cumprod(1 + returns)
+
+        state = {
+            'quantities': quantities, 'costs': costs, 'costs_cny': costs_cny, 'profits': profits,
+            'equity': equity, 'invested': invested, 'pnl': pnl, 'daily_pnl': daily_pnl, 'nav': nav,
+        }
+        if previous:
+            state = {name: np.concatenate([previous[name], values]) for name, values in state.items()}
+        self._state, self._dates, self._prices, self._rates = state, dates, prices, rates
+
+        nav = state['nav']
+        curve = pd.DataFrame({
+            'equity': state['equity'],
+            'invested': state['invested'],
+            'pnl': state['pnl'],
+            'daily_pnl': state['daily_pnl'],
+            'drawdown': (nav / np.maximum.accumulate(nav) - 1) * 100,
+        }, index=dates)
+        return {
+            'curve': curve,
+            'markets': pd.DataFrame(state['profits'] @ self._membership, index=dates, columns=self.markets),
+            'symbols': pd.Series(state['profits'][-1], index=self.symbols),
+            'unconverted': [symbol for symbol, missing in zip(self.symbols, unconverted) if missing],
+            # Premier achat compté dans la courbe (tous les symboles sans taux : premier achat)
+            'start': int(np.argmax(state['costs_cny' if not unconverted.all() else 'costs'].sum(axis=1) > 0)),
+        }
+
+
+_books = OrderedDict()
+_books_lock = threading.Lock()
+
+
+def _signature(portfolio):
+    return tuple(
+        (symbol, tuple((p['shares'], p['buy_price'], p.get('date')) for p in positions))
+        for symbol, positions in portfolio.items()
+    )
+
+
+def portfolio_history(portfolio, bars):
+    """Performance depuis le premier achat : {'curve', 'markets', 'symbols', 'unconverted'}, ou None.
+
+    `bars` : barres journalières {symbole: DataFrame}, avec celles des taux de
+    change (fx_symbols) ; les symboles sans barres sont ignorés, ceux sans
+    taux sont exclus de la courbe en yuans (`unconverted`).
+    """
+    held = {symbol: positions for symbol, positions in portfolio.items()
+            if positions and symbol in bars and not bars[symbol].empty}
+    if not held:
+        return None
+    key = _signature(held)
+    with _books_lock:
+        book = _books.get(key)
+        if book is None:
+            book = _books[key] = PerformanceBook(held)
+        _books.move_to_end(key)
+        while len(_books) > MAX_BOOKS:
+            _books.popitem(last=False)
+    result = book.update(bars)
+    # La courbe commence au premier achat
+    first = result['start']
+    return {
+        'curve': result['curve'].iloc[first:],
+        'markets': result['markets'].iloc[first:],
+        'symbols': result['symbols'],
+        'unconverted': result['unconverted'],
+    }
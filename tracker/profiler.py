@@ -0,0 +1,180 @@
+"""Profilage à la demande d'une exécution du script (administrateurs).
+
+Un thread échantillonne la pile du thread de la session toutes les
+INTERVAL secondes ; rien ne tourne tant qu'aucune capture n'est demandée.
+Chaque capture est enregistrée sur disque (arbre d'appels en texte et piles
+repliées lisibles par speedscope ou flamegraph.pl) avec le contexte de la
+session ; seules les HISTORY dernières sont conservées.
+
+Accès : TRACKER_ADMIN_TOKEN doit être défini et passé dans l'URL
+(?admin=<jeton>) ; ?admin=<jeton>&profile=1 profile directement la page.
+"""
+import hmac
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+
+# Période d'échantillonnage (secondes)
+INTERVAL = 0.005
+# Durée maximale d'une capture (secondes), au cas où l'exécution serait interrompue
+MAX_DURATION = 120
+# Nombre de captures conservées sur disque
+HISTORY = int(os.environ.get('TRACKER_PROFILE_HISTORY', 20))
+# Part minimale (en %) d'un nœud pour figurer dans l'arbre d'appels
+MIN_PERCENT = 0.5
+
+
+def is_admin(token):
+    """Vrai si `token` correspond à TRACKER_ADMIN_TOKEN (jamais si non défini)"""
+    expected = os.environ.get('TRACKER_ADMIN_TOKEN')
+    if not expected or not token:
+        return False
+    return hmac.compare_digest(str(token), expected)
+
+
+def _label(code):
+    path = code.co_filename.replace(os.sep, '/').split('/')
+    return f"{code.co_name} ({'/'.join(path[-2:])}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Échantillonneur de la pile d'un thread.
+
+    `root` : fichier à partir duquel les piles sont gardées (le script), pour
+    ne pas afficher la mécanique de Streamlit au-dessus.
+    """
+
+    def __init__(self, thread_id=None, root=None, interval=INTERVAL, max_duration=MAX_DURATION):
+        self.thread_id = thread_id or threading.get_ident()
+        self.root = os.path.abspath(root) if root else None
+        self.interval = interval
+        self.max_duration = max_duration
+        self.samples = Counter()
+        self.started_at = None
+        self.seconds = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is None:
+            return self
+        self._stopped.set()
+        self._thread.join()
+        self._thread = None
+        self.seconds = time.time() - self.started_at
+        return self
+
+    def _run(self):
+        deadline = time.monotonic() + self.max_duration
+        while not self._stopped.wait(self.interval) and time.monotonic() < deadline:
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                break
+            stack = []
+            while frame is not None:
+                stack.append(frame.f_code)
+                if self.root and os.path.abspath(frame.f_code.co_filename) == self.root:
+                    break
+                frame = frame.f_back
+            self.samples[tuple(_label(code) for code in reversed(stack))] += 1
+
+    def folded(self):
+        """Piles repliées (« a;b;c 12 »), format de flamegraph.pl et speedscope"""
+        return '\n'.join(f"{';'.join(stack)} {n}" for stack, n in self.samples.most_common()) + '\n'
+
+    def call_tree(self, min_percent=MIN_PERCENT):
+        """Arbre d'appels en texte : part totale et part propre de chaque nœud"""
+        total = sum(self.samples.values())
+        if not total:
+            return "Aucun échantillon (exécution trop courte)\n"
+        root = {}
+        for stack, n in self.samples.items():
+            level = root
+            for depth, label in enumerate(stack):
+                node = level.setdefault(label, {'total': 0, 'self': 0, 'children': {}})
+                node['total'] += n
+                if depth == len(stack) - 1:
+                    node['self'] += n
+                level = node['children']
+
+        lines = [f"{total} échantillons, période {self.interval * 1000:.0f} ms", "total%  propre%  fonction"]
+
+        def walk(level, depth):
+            for label, node in sorted(level.items(), key=lambda item: -item[1]['total']):
+                share = node['total'] * 100 / total
+                if share < min_percent:
+                    continue
+                lines.append(f"{share:6.1f}  {node['self'] * 100 / total:6.1f}  {'  ' * depth}{label}")
+                walk(node['children'], depth + 1)
+
+        walk(root, 0)
+        return '\n'.join(lines) + '\n'
+
+
+class ProfileStore:
+    """Historique borné des captures (un fichier JSON par capture)"""
+
+    def __init__(self, directory, keep=HISTORY):
+        self.directory = directory
+        self.keep = keep
+
+    def save(self, profile, context):
+        """Enregistre une capture arrêtée avec son contexte ; renvoie son identifiant"""
+        stamp = datetime.fromtimestamp(profile.started_at).strftime('%Y%m%d_%H%M%S_%f')[:-3]
+        capture_id = f"{stamp}_{uuid.uuid4().hex[:6]}"
+        os.makedirs(self.directory, exist_ok=True)
+        record = dict(
+            context,
+            id=capture_id,
+            started_at=profile.started_at,
+            seconds=profile.seconds,
+            samples=sum(profile.samples.values()),
+            call_tree=profile.call_tree(),
+            folded=profile.folded(),
+        )
+        handle, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(handle, 'w', encoding='utf-8') as sink:
+            json.dump(record, sink)
+        os.replace(temporary, os.path.join(self.directory, f"{capture_id}.json"))
+        self._prune()
+        return capture_id
+
+    def _files(self):
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted((name for name in names if name.endswith('.json')), reverse=True)
+
+    def _prune(self):
+        for name in self._files()[self.keep:]:
+            try:
+                os.unlink(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    def captures(self):
+        """Captures conservées, de la plus récente à la plus ancienne"""
+        records = []
+        for name in self._files():
+            try:
+                with open(os.path.join(self.directory, name), encoding='utf-8') as source:
+                    records.append(json.load(source))
+            except (FileNotFoundError, ValueError):
+                continue
+        return records
+
+
+store = ProfileStore(os.environ.get('TRACKER_PROFILE_DIR') or os.path.join(tempfile.gettempdir(), 'tracker-profiles'))
@@ -0,0 +1,78 @@
+"""Carnet de cotations : derniers cours mis en cache et rafraîchis par lots."""
+import threading
+import time
+
+from tracker import upstream
+from tracker.resilience import UpstreamError
+
+# Durée de validité d'une cotation (secondes)
+QUOTE_TTL = 30
+# Nombre maximal de symboles par requête amont
+BATCH_SIZE = 50
+
+
+class QuoteBook:
+    """Derniers cours par symbole ; les cotations expirées sont rechargées en un lot"""
+
+    def __init__(self, fetch=upstream.fetch_quotes, ttl=QUOTE_TTL):
+        self._fetch = fetch
+        self._ttl = ttl
+        self._quotes = {}
+        self._fetched_at = {}
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self.version = 0
+
+    def get(self, symbols):
+        """Cotations de `symbols`, rafraîchies si nécessaire"""
+        symbols = list(dict.fromkeys(symbols))
+        now = time.time()
+        with self._lock:
+            stale = [s for s in symbols if now - self._fetched_at.get(s, 0) > self._ttl]
+        if stale:
+            try:
+                self.refresh(stale)
+            except UpstreamError:
+                # Amont indisponible : on sert les derniers cours connus
+                pass
+        with self._lock:
+            return {s: self._quotes[s] for s in symbols if s in self._quotes}
+
+    def refresh(self, symbols):
+        """Recharge `symbols` par lots de BATCH_SIZE ; notifie les abonnés des changements"""
+        symbols = list(symbols)
+        for offset in range(0, len(symbols), BATCH_SIZE):
+            batch = symbols[offset:offset + BATCH_SIZE]
+            fresh = self._fetch(batch)
+            now = time.time()
+            with self._lock:
+                changed = False
+                for symbol in batch:
+                    self._fetched_at[symbol] = now
+                    quote = fresh.get(symbol)
+                    if quote is not None and quote != self._quotes.get(symbol):
+                        self._quotes[symbol] = quote
+                        changed = True
+                if changed:
+                    self.version += 1
+                    self._changed.notify_all()
+
+    def wait_for_change(self, version, timeout):
+        """Attend une version plus récente que `version` ; renvoie la version courante"""
+        with self._lock:
+            self._changed.wait_for(lambda: self.version > version, timeout=timeout)
+            return self.version
+
+    def clear(self):
+        with self._lock:
+            self._quotes.clear()
+            self._fetched_at.clear()
+
+    def snapshot(self, symbols):
+        """Cotations connues, sans accès réseau"""
+        with self._lock:
+            return {s: self._quotes[s] for s in symbols if s in self._quotes}
+
+
+# Carnet partagé par toutes les sessions du processus
+quote_book = QuoteBook()
@@ -0,0 +1,87 @@
+"""Rejeu historique d'une alerte : quand se serait-elle déclenchée, et ensuite ?
+
+Même expression compilée et même hystérésis que la surveillance en direct
+(tracker.conditions), appliquées d'un coup à tout l'historique en cache :
+la condition est évaluée sur la matrice symboles × barres, les
+déclenchements effectifs s'en déduisent par accumulations, et les rendements
+suivant chaque déclenchement sont des décalages de la même matrice. Aucune
+boucle sur les barres.
+"""
+import numpy as np
+import pandas as pd
+
+from tracker import feed
+from tracker.bars import INTRADAY_LIMITS
+from tracker.conditions import Frame, armed_triggers, compile_condition, required_symbols
+
+# Horizons des rendements après déclenchement (barres)
+HORIZONS = (1, 5, 20)
+# Historiques proposés, du plus court au plus long (durée calendaire en jours)
+HISTORY_PERIODS = {'1mo': 30, '3mo': 91, '6mo': 182, '1y': 365, '2y': 730, '5y': 1826, '10y': 3652}
+DAYS_PER_MONTH = 30.44
+
+
+def periods_for(interval):
+    """Historiques disponibles à cet intervalle (Yahoo limite la profondeur intraday)"""
+    limit = INTRADAY_LIMITS.get(interval)
+    return [period for period, days in HISTORY_PERIODS.items() if limit is None or days <= limit]
+
+
+def _forward_returns(closes, horizon):
+    """Rendement (%) de chaque barre à `horizon` barres plus tard (NaN au-delà de la fin)"""
+    out = np.full(closes.shape, np.nan)
+    if closes.shape[-1] > horizon:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out[:, :-horizon] = (closes[:, horizon:] / closes[:, :-horizon] - 1) * 100
+    return out
+
+
+def replay(text, bars, symbols, target=None, horizons=HORIZONS):
+    """Déclenchements de l'expression `text` sur tout l'historique des `symbols`.
+
+    `bars` : {symbole: DataFrame}, y compris paires A/H et change si
+    l'expression utilise premium() ; `target` : prix cible (alertes de prix).
+    Retourne {'triggers': DataFrame (un déclenchement par ligne),
+    'summary': DataFrame par symbole}, ou None sans barres.
+    """
+    condition = compile_condition(text)
+    symbols = [symbol for symbol in dict.fromkeys(symbols) if symbol in bars and not bars[symbol].empty]
+    if not symbols:
+        return None
+    width = max(len(bars[symbol]) for symbol in symbols)
+    frame = Frame(bars, symbols, width, [target] * len(symbols) if target is not None else None)
+    fired = armed_triggers(*condition.evaluate(frame))
+    closes = frame.series('close')
+    returns = {horizon: _forward_returns(closes, horizon) for horizon in horizons}
+
+    rows, columns = np.nonzero(fired)
+    triggers = pd.DataFrame({
+        'Symbole': np.array(symbols, dtype=object)[rows],
+        'Date': pd.to_datetime(frame.times[rows, columns], utc=True),
+        'Clôture': closes[rows, columns],
+        **{f"+{horizon} barres %": returns[horizon][rows, columns] for horizon in horizons},
+    })
+
+    # Fréquence : déclenchements par mois d'historique de chaque symbole
+    known = frame.times != np.iinfo(np.int64).min
+    first = np.where(known, frame.times, np.iinfo(np.int64).max).min(axis=1)
+    months = (frame.times[:, -1] - first) / (86_400 * 10**9 * DAYS_PER_MONTH)
+    counts = fired.sum(axis=1)
+    summary = pd.DataFrame({
+        'Déclenchements': counts,
+        'Par mois': np.divide(counts, months, out=np.zeros(len(symbols)), where=months > 0),
+    }, index=pd.Index(symbols, name='Symbole'))
+    for horizon in horizons:
+        after = np.where(fired, returns[horizon], np.nan)
+        with np.errstate(invalid='ignore'):
+            valid = (~np.isnan(after)).sum(axis=1)
+            summary[f"Moyenne +{horizon} %"] = np.where(valid > 0, np.nansum(after, axis=1) / np.maximum(valid, 1), np.nan)
+            summary[f"Hausse +{horizon} %"] = np.where(valid > 0, (after > 0).sum(axis=1) / np.maximum(valid, 1) * 100, np.nan)
+    return {'triggers': triggers, 'summary': summary}
+
+
+def run(text, symbols, interval='1d', period='1y', target=None, horizons=HORIZONS):
+    """Rejoue l'expression sur l'historique en cache (un téléchargement groupé pour le reste)"""
+    needed = required_symbols(compile_condition(text), symbols)
+    bars = feed.get_bars_many(needed, period, interval)
+    return replay(text, bars, symbols, target, horizons)
@@ -0,0 +1,266 @@
+"""Rapports HTML/PDF multi-symboles générés en parallèle.
+
+Chaque symbole (graphique, statistiques, indicateurs, prévision) est rendu
+dans un processus séparé ; les barres sont préchargées une fois par des
+threads (accès réseau) puis relues par les processus depuis le cache
+partagé. Les sections déjà rendues pour la même dernière barre sont
+reprises telles quelles depuis le disque ; ce cache est élagué après chaque
+rapport (fichiers de plus de TRACKER_REPORT_CACHE_DAYS jours, puis les
+moins récemment lus au-delà de TRACKER_REPORT_CACHE_MB Mo).
+
+Utilisation :
+    python -m tracker.report --output rapport.html
+    python -m tracker.report 600519.SS 0700.HK BABA --period 1y --interval 1d --output rapport.pdf
+"""
+import argparse
+import hashlib
+import html
+import importlib.util
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import plotly.graph_objs as go
+from plotly.offline import get_plotlyjs
+
+from tracker import feed
+from tracker.indicators import max_drawdown, rsi, sma
+from tracker.universe import DEFAULT_WATCHLIST, format_currency, get_exchange
+
+# Nombre de jours prédits par la régression polynomiale
+FORECAST_DAYS = 7
+FORECAST_DEGREE = 2
+# Threads de préchargement des barres (accès réseau)
+PREFETCH_THREADS = 8
+# Sections gardées sur disque : âge maximal (jours) et taille totale (Mo)
+CACHE_MAX_DAYS = float(os.environ.get('TRACKER_REPORT_CACHE_DAYS', 7))
+CACHE_MAX_MB = float(os.environ.get('TRACKER_REPORT_CACHE_MB', 256))
+
+_CSS = """
+body { font-family: 'Microsoft YaHei', 'SimHei', sans-serif; margin: 2rem; color: #222; }
+h1 { color: #c41e3a; }
+h2 { color: #c41e3a; border-bottom: 2px solid #c41e3a; padding-bottom: .3rem; }
+section { page-break-after: always; margin-bottom: 3rem; }
+table { border-collapse: collapse; margin: 1rem 0; }
+td, th { border: 1px solid #ddd; padding: .3rem .8rem; text-align: right; }
+th { background: #f0f2f6; }
+.error { color: #ef553b; }
+nav li { display: inline; margin-right: 1rem; }
+"""
+
+
+def _cache_directory():
+    directory = os.environ.get('TRACKER_REPORT_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'tracker-reports')
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def prune_cache(max_days=CACHE_MAX_DAYS, max_mb=CACHE_MAX_MB):
+    """Supprime les sections trop anciennes, puis les moins récemment lues au-delà du budget"""
+    directory = _cache_directory()
+    files = []
+    for entry in os.scandir(directory):
+        if entry.name.endswith('.html'):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+    files.sort()
+    oldest = time.time() - max_days * 86400
+    total = sum(size for _, size, _ in files)
+    removed = 0
+    for modified, size, path in files:
+        if modified >= oldest and total <= max_mb * 1024 * 1024:
+            break
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    return removed
+
+
+def _table(rows):
+    cells = ''.join(f"<tr><th>{html.escape(k)}</th><td>{html.escape(str(v))}</td></tr>" for k, v in rows.items())
+    return f"<table>{cells}</table>"
+
+
+def _forecast(dates, closes):
+    """Régression polynomiale sur le temps écoulé (en jours), comme la page ML"""
+    days = (dates - dates[0]).total_seconds().to_numpy() / 86400
+    coefficients = np.polyfit(days, closes, FORECAST_DEGREE)
+    future_days = days[-1] + np.arange(1, FORECAST_DAYS + 1)
+    future_dates = [dates[-1] + timedelta(days=i + 1) for i in range(FORECAST_DAYS)]
+    residuals = closes - np.polyval(coefficients, days)
+    return future_dates, np.polyval(coefficients, future_days), float(np.std(residuals))
+
+
+def _figure(symbol, bars, future_dates, predictions, static):
+    closes = bars['Close'].to_numpy(dtype=np.float64)
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=bars.index, y=closes, mode='lines', name='Prix',
+                             line=dict(color='#c41e3a', width=2)))
+    for window, color in ((20, 'orange'), (50, 'purple')):
+        if len(closes) >= window:
+            fig.add_trace(go.Scatter(x=bars.index, y=sma(closes, window), mode='lines',
+                                     name=f'MA {window}', line=dict(color=color, width=1, dash='dash')))
+    fig.add_trace(go.Scatter(x=future_dates, y=predictions, mode='lines+markers', name='Prévision',
+                             line=dict(color='blue', dash='dot')))
+    fig.add_trace(go.Bar(x=bars.index, y=bars['Volume'], name='Volume', yaxis='y2',
+                         marker=dict(color='lightgray', opacity=0.3)))
+    fig.update_layout(
+        title=f"{symbol} - {get_exchange(symbol)} (UTC)",
+        yaxis2=dict(overlaying='y', side='right', showgrid=False),
+        height=450, template='plotly_white', hovermode='x unified'
+    )
+    if static:
+        # PDF : image statique (nécessite kaleido)
+        import base64
+        image = base64.b64encode(fig.to_image(format='png', width=1000, height=450)).decode()
+        return f"<img src='data:image/png;base64,{image}' style='width:100%'>"
+    return fig.to_html(full_html=False, include_plotlyjs=False)
+
+
+def render_symbol(symbol, period, interval, static=False):
+    """Section HTML d'un symbole (exécutée dans un processus du pool)"""
+    anchor = html.escape(symbol)
+    try:
+        bars = feed.get_bars(symbol, period, interval)
+    except Exception as e:
+        return f"<section id='{anchor}'><h2>{anchor}</h2><p class='error'>Données indisponibles : {html.escape(str(e))}</p></section>"
+    if bars.empty or len(bars) < 3:
+        return f"<section id='{anchor}'><h2>{anchor}</h2><p class='error'>Pas assez de données.</p></section>"
+
+    key = hashlib.sha1(repr((symbol, period, interval, static, bars.index[-1].value, len(bars))).encode()).hexdigest()
+    cached = os.path.join(_cache_directory(), f"{key}.html")
+    if os.path.exists(cached):
+        try:
+            with open(cached, encoding='utf-8') as handle:
+                section = handle.read()
+            # Date de dernière lecture, pour l'élagage
+            os.utime(cached)
+            return section
+        except FileNotFoundError:
+            pass
+
+    closes = bars['Close'].to_numpy(dtype=np.float64)
+    returns = np.diff(closes) / closes[:-1]
+    future_dates, predictions, residual_std = _forecast(bars.index, closes)
+
+    statistics = {
+        'Dernier cours': format_currency(closes[-1], symbol),
+        'Variation sur la période': f"{(closes[-1] / closes[0] - 1) * 100:.2f}%",
+        'Moyenne': format_currency(closes.mean(), symbol),
+        'Écart-type': format_currency(closes.std(ddof=1), symbol),
+        'Min / Max': f"{format_currency(closes.min(), symbol)} / {format_currency(closes.max(), symbol)}",
+        'Volatilité par barre': f"{returns.std(ddof=1) * 100:.2f}%",
+        'Drawdown maximal': f"{max_drawdown(closes):.2f}%",
+    }
+    indicators = {
+        'MA 20': format_currency(sma(closes, 20)[-1], symbol) if len(closes) >= 20 else 'N/A',
+        'MA 50': format_currency(sma(closes, 50)[-1], symbol) if len(closes) >= 50 else 'N/A',
+        'RSI 14': f"{rsi(closes)[-1]:.1f}" if len(closes) > 14 else 'N/A',
+    }
+    forecast = {
+        date.strftime('%Y-%m-%d'): f"{format_currency(value, symbol)} (± {format_currency(2 * residual_std, symbol)})"
+        for date, value in zip(future_dates, predictions)
+    }
+
+    section = (
+        f"<section id='{anchor}'><h2>{anchor} — {html.escape(get_exchange(symbol))}</h2>"
+        f"{_figure(symbol, bars, future_dates, predictions, static)}"
+        f"<h3>Statistiques</h3>{_table(statistics)}"
+        f"<h3>Indicateurs</h3>{_table(indicators)}"
+        f"<h3>Prévision ({FORECAST_DAYS} jours, régression polynomiale degré {FORECAST_DEGREE})</h3>{_table(forecast)}"
+        f"</section>"
+    )
+    with open(cached, 'w', encoding='utf-8') as handle:
+        handle.write(section)
+    return section
+
+
+def _prefetch(symbols, period, interval):
+    """Charge les barres de tous les symboles en parallèle (threads, accès réseau)"""
+    def load(symbol):
+        try:
+            feed.get_bars(symbol, period, interval)
+        except Exception:
+            pass  # l'erreur sera rapportée dans la section du symbole
+
+    with ThreadPoolExecutor(max_workers=PREFETCH_THREADS) as pool:
+        list(pool.map(load, symbols))
+
+
+def generate_html(symbols, period='6mo', interval='1d', workers=None, static=False, title=None):
+    """Rapport HTML autonome (plotly.js inclus une seule fois)"""
+    symbols = list(dict.fromkeys(symbols))
+    started = time.perf_counter()
+    _prefetch(symbols, period, interval)
+
+    if workers == 0 or len(symbols) <= 1:
+        sections = [render_symbol(s, period, interval, static) for s in symbols]
+    else:
+        workers = workers or min(len(symbols), os.cpu_count() or 1)
+        # 'spawn' : sûr depuis un processus multi-thread (serveur Streamlit)
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            sections = list(pool.map(render_symbol, symbols, [period] * len(symbols),
+                                     [interval] * len(symbols), [static] * len(symbols)))
+    prune_cache()
+
+    title = title or f"Rapport Bourse Chine — {len(symbols)} symboles"
+    generated = datetime.now().strftime('%Y-%m-%d %H:%M')
+    summary = ''.join(f"<li><a href='#{html.escape(s)}'>{html.escape(s)}</a></li>" for s in symbols)
+    script = '' if static else f"<script type='text/javascript'>{get_plotlyjs()}</script>"
+    return (
+        "<!DOCTYPE html><html lang='fr'><head><meta charset='utf-8'>"
+        f"<title>{html.escape(title)}</title><style>{_CSS}</style>{script}</head><body>"
+        f"<h1>🏮 {html.escape(title)}</h1>"
+        f"<p>Généré le {generated} — période {period}, intervalle {interval} — "
+        f"{time.perf_counter() - started:.1f} s</p><nav><ul>{summary}</ul></nav>"
+        f"{''.join(sections)}</body></html>"
+    )
+
+
+def generate_pdf(symbols, period='6mo', interval='1d', workers=None, title=None):
+    """Rapport PDF (nécessite les paquets optionnels kaleido et weasyprint)"""
+    unavailable = RuntimeError("Export PDF indisponible : installer les paquets 'kaleido' et 'weasyprint'")
+    # kaleido : export statique des graphiques plotly, chargé par plotly lui-même
+    if importlib.util.find_spec('kaleido') is None:
+        raise unavailable
+    try:
+        from weasyprint import HTML
+    except ImportError:
+        raise unavailable
+    document = generate_html(symbols, period, interval, workers, static=True, title=title)
+    return HTML(string=document).write_pdf()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rapport HTML/PDF de la watchlist")
+    parser.add_argument('symbols', nargs='*', help="symboles (par défaut : watchlist initiale)")
+    parser.add_argument('--period', default='6mo')
+    parser.add_argument('--interval', default='1d')
+    parser.add_argument('--workers', type=int, default=None, help="processus de rendu (0 : aucun)")
+    parser.add_argument('--output', default='rapport.html', help="fichier .html ou .pdf")
+    args = parser.parse_args(argv)
+
+    symbols = [s.upper() for s in args.symbols] or DEFAULT_WATCHLIST
+    started = time.perf_counter()
+    if args.output.lower().endswith('.pdf'):
+        payload = generate_pdf(symbols, args.period, args.interval, args.workers)
+    else:
+        payload = generate_html(symbols, args.period, args.interval, args.workers).encode('utf-8')
+    with open(args.output, 'wb') as handle:
+        handle.write(payload)
+    print(f"Rapport écrit dans {args.output} ({len(symbols)} symboles, {time.perf_counter() - started:.1f} s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+"""Agrégation locale des barres OHLCV, alignée sur les séances de cotation.
+
+Les barres sont agrégées à partir de barres plus fines déjà en cache : une
+barre cible ne chevauche jamais deux séances (pause déjeuner de Shanghai,
+Shenzhen et Hong Kong comprise) et commence à l'ouverture de sa séance.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+NS_PER_MINUTE = 60 * 10**9
+MINUTES_PER_DAY = 24 * 60
+NS_PER_DAY = MINUTES_PER_DAY * NS_PER_MINUTE
+
+# Intervalles servis directement par Yahoo Finance
+NATIVE_INTERVALS = ('1m', '2m', '5m', '15m', '30m', '60m', '90m', '1h', '1d', '5d', '1wk', '1mo', '3mo')
+
+# Intervalles intraday natifs utilisables comme base d'agrégation
+NATIVE_MINUTES = {'1m': 1, '2m': 2, '5m': 5, '15m': 15, '30m': 30, '1h': 60}
+
+# Règles d'agrégation par colonne (les autres colonnes gardent la dernière valeur)
+AGGREGATIONS = {
+    'Open': 'first',
+    'High': 'max',
+    'Low': 'min',
+    'Close': 'last',
+    'Adj Close': 'last',
+    'Volume': 'sum',
+    'Dividends': 'sum',
+    'Stock Splits': 'max',
+    'Capital Gains': 'sum',
+}
+
+_INTERVAL_RE = re.compile(r'^(\d+)(m|h)$')
+_PERIOD_RE = re.compile(r'^(\d+)(d|wk|mo|y)$')
+
+
+def parse_interval(interval):
+    """Décompose un intervalle en (type, minutes).
+
+    Types : 'minutes' (ex. '5m', '2h'), 'session' (une barre par séance),
+    'day', 'week' et 'month'.
+    """
+    if interval == 'session':
+        return 'session', None
+    if interval == '1d':
+        return 'day', None
+    if interval == '1wk':
+        return 'week', None
+    if interval == '1mo':
+        return 'month', None
+    match = _INTERVAL_RE.match(interval)
+    if not match:
+        raise ValueError(f"Intervalle non supporté : {interval}")
+    count = int(match.group(1))
+    return 'minutes', count * (60 if match.group(2) == 'h' else 1)
+
+
+def is_intraday(interval):
+    """Indique si l'intervalle produit des barres infra-journalières"""
+    return parse_interval(interval)[0] in ('minutes', 'session')
+
+
+def can_derive(base, target):
+    """Indique si des barres `base` peuvent être agrégées en barres `target`"""
+    base_kind, base_minutes = parse_interval(base)
+    target_kind, target_minutes = parse_interval(target)
+    if base_kind == 'minutes':
+        if target_kind == 'minutes':
+            return target_minutes % base_minutes == 0
+        return True
+    if base_kind == 'day':
+        return target_kind in ('day', 'week', 'month')
+    return base_kind == target_kind
+
+
+def _local_ns(index, market):
+    """Horodatages en heure locale de la place (int64, nanosecondes)"""
+    local = index.tz_convert(market.timezone).tz_localize(None)
+    return local.as_unit('ns').asi8
+
+
+def session_dates(index, market):
+    """Date de séance locale (jours depuis l'epoch) de chaque barre"""
+    return _local_ns(index, market) // NS_PER_DAY
+
+
+def _bin_keys(index, market, target):
+    """Clé de regroupement : début de la barre cible en minutes locales"""
+    kind, minutes = parse_interval(target)
+    local = _local_ns(index, market)
+    day = local // NS_PER_DAY
+
+    if kind == 'day':
+        return day * MINUTES_PER_DAY
+    if kind == 'week':
+        # 1970-01-01 est un jeudi : on ramène chaque date au lundi
+        return (day - (day + 3) % 7) * MINUTES_PER_DAY
+    if kind == 'month':
+        month_start = day.astype('datetime64[D]').astype('datetime64[M]').astype('datetime64[D]')
+        return month_start.astype(np.int64) * MINUTES_PER_DAY
+
+    minute = (local % NS_PER_DAY) // NS_PER_MINUTE
+    starts = np.array([start for start, _ in market.sessions])
+    lengths = np.array([end - start for start, end in market.sessions])
+
+    # Séance de rattachement : dernière séance ouverte avant la barre
+    session = np.clip(np.searchsorted(starts, minute, side='right') - 1, 0, len(starts) - 1)
+    offset = np.clip(minute - starts[session], 0, lengths[session] - 1)
+    if kind == 'session':
+        return day * MINUTES_PER_DAY + starts[session]
+
+    bucket = offset // minutes
+    return day * MINUTES_PER_DAY + starts[session] + bucket * minutes
+
+
+def _labels(keys, market):
+    """Convertit les clés (minutes locales) en index UTC"""
+    local = pd.DatetimeIndex(keys.astype(np.int64) * NS_PER_MINUTE)
+    local = local.tz_localize(market.timezone, ambiguous='NaT', nonexistent='shift_forward')
+    return local.tz_convert('UTC')
+
+
+def resample_bars(bars, target, market):
+    """Agrège des barres (index UTC trié) vers l'intervalle `target`.
+
+    Une seule passe vectorisée (`ufunc.reduceat`) : pas de groupby pandas.
+    """
+    bars = bars[bars['Close'].notna()] if 'Close' in bars else bars
+    if bars.empty:
+        return bars.iloc[:0]
+
+    keys = _bin_keys(bars.index, market, target)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:] - 1, len(keys) - 1]
+
+    columns = {}
+    for column in bars.columns:
+        values = bars[column].to_numpy()
+        how = AGGREGATIONS.get(column, 'last')
+        if how == 'first':
+            columns[column] = values[starts]
+        elif how == 'last':
+            columns[column] = values[ends]
+        elif how == 'max':
+            columns[column] = np.fmax.reduceat(values, starts)
+        elif how == 'min':
+            columns[column] = np.fmin.reduceat(values, starts)
+        else:
+            columns[column] = np.add.reduceat(np.nan_to_num(values), starts)
+
+    index = _labels(keys[starts], market)
+    index.name = 'Datetime' if is_intraday(target) else 'Date'
+    return pd.DataFrame(columns, index=index)
+
+
+def period_start(period, now):
+    """Début (UTC) de la fenêtre couverte par une période Yahoo ('5d', '1mo', ...)"""
+    if period == 'max':
+        return pd.Timestamp('1900-01-01', tz='UTC')
+    if period == 'ytd':
+        return pd.Timestamp(year=now.year, month=1, day=1, tz='UTC')
+    match = _PERIOD_RE.match(period)
+    if not match:
+        raise ValueError(f"Période non supportée : {period}")
+    count, unit = int(match.group(1)), match.group(2)
+    if unit == 'd':
+        # Jours de bourse : marge pour les week-ends et jours fériés courts
+        return now - pd.Timedelta(days=count + 2 * (count // 5) + 4)
+    if unit == 'wk':
+        return now - pd.Timedelta(weeks=count)
+    if unit == 'mo':
+        return now - pd.DateOffset(months=count)
+    return now - pd.DateOffset(years=count)
+
+
+def slice_period(bars, period, market, now):
+    """Restreint des barres à la fenêtre d'une période Yahoo"""
+    if bars.empty or period == 'max':
+        return bars
+    match = _PERIOD_RE.match(period)
+    if match and match.group(2) == 'd':
+        # 'Nd' = les N dernières séances, comme Yahoo
+        dates = session_dates(bars.index, market)
+        kept = np.unique(dates)[-int(match.group(1)):]
+        return bars[dates >= kept[0]]
+    return bars[bars.index >= period_start(period, now)]
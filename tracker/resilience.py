@@ -0,0 +1,198 @@
+"""Protection des appels amont : limitation de débit, reprises, disjoncteur.
+
+Chaque hôte amont a son `UpstreamGuard` :
+- un seau à jetons limite le débit des requêtes sortantes ;
+- les échecs sont repris avec un délai exponentiel aléatoire (« full jitter »),
+  dans un budget de temps total qui borne la latence ;
+- après trop d'échecs consécutifs, le disjoncteur s'ouvre et les appels
+  échouent immédiatement jusqu'à une requête d'essai réussie ;
+- en cas d'échec, la dernière valeur valide connue (si une clé est fournie)
+  est servie à la place ; les échecs ne sont jamais mis en cache.
+"""
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from tracker import metrics
+
+# Nombre maximal de dernières valeurs valides conservées par hôte
+LAST_GOOD_SIZE = 2000
+
+
+class UpstreamError(RuntimeError):
+    """Échec d'un appel amont après reprises"""
+
+
+class CircuitOpen(UpstreamError):
+    """Disjoncteur ouvert : l'hôte est considéré comme indisponible"""
+
+
+class RateLimited(UpstreamError):
+    """Aucun jeton disponible dans le budget de temps de l'appel"""
+
+
+class TokenBucket:
+    """Seau à jetons : `rate` requêtes par seconde, rafales jusqu'à `burst`"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout):
+        """Prend un jeton en attendant au plus `timeout` secondes ; False sinon"""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """Disjoncteur : fermé, ouvert pendant `cooldown` secondes, puis demi-ouvert"""
+
+    def __init__(self, failure_threshold=5, cooldown=30):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return 'closed'
+        if time.monotonic() - self._opened_at >= self.cooldown:
+            return 'half-open'
+        return 'open'
+
+    def allow(self):
+        """Indique si un appel peut partir (une seule requête d'essai en demi-ouvert)"""
+        with self._lock:
+            state = self._state()
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def release(self):
+        """Libère une requête d'essai qui n'a finalement pas été envoyée"""
+        with self._lock:
+            self._trial_running = False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_running = False
+
+
+class UpstreamGuard:
+    """Intermédiaire des appels vers un hôte amont"""
+
+    def __init__(self, host, rate=5.0, burst=10, attempts=3, base_delay=0.5,
+                 max_delay=4.0, deadline=10.0, failure_threshold=5, cooldown=30):
+        self.host = host
+        self.limiter = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(failure_threshold, cooldown)
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self._last_good = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'calls': 0, 'failures': 0, 'retries': 0, 'rejected': 0, 'stale_served': 0}
+
+    def call(self, fn, *args, fallback_key=None, **kwargs):
+        """Appelle `fn(*args, **kwargs)` avec limitation, reprises et disjoncteur.
+
+        Si `fallback_key` est fourni, la dernière valeur valide pour cette clé
+        est renvoyée en cas d'échec au lieu de lever UpstreamError.
+        """
+        try:
+            value = self._call(fn, args, kwargs)
+        except UpstreamError:
+            if fallback_key is not None:
+                with self._lock:
+                    if fallback_key in self._last_good:
+                        self.stats['stale_served'] += 1
+                        return self._last_good[fallback_key]
+            raise
+        if fallback_key is not None:
+            with self._lock:
+                self._last_good[fallback_key] = value
+                self._last_good.move_to_end(fallback_key)
+                while len(self._last_good) > LAST_GOOD_SIZE:
+                    self._last_good.popitem(last=False)
+        return value
+
+    def _call(self, fn, args, kwargs):
+        deadline = time.monotonic() + self.deadline
+        last_error = None
+        for attempt in range(self.attempts):
+            if not self.breaker.allow():
+                self._count('rejected')
+                raise CircuitOpen(f"{self.host} indisponible (disjoncteur ouvert)")
+            if not self.limiter.acquire(max(0.0, deadline - time.monotonic())):
+                self.breaker.release()
+                self._count('rejected')
+                raise RateLimited(f"Débit maximal atteint pour {self.host}")
+            self._count('calls')
+            metrics.count('upstream_calls')
+            try:
+                value = fn(*args, **kwargs)
+            except Exception as e:
+                last_error = e
+                self._count('failures')
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+                return value
+
+            # Délai exponentiel aléatoire, sans dépasser le budget de l'appel
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+            if attempt + 1 >= self.attempts or time.monotonic() + delay >= deadline:
+                break
+            self._count('retries')
+            time.sleep(delay)
+        raise UpstreamError(f"Échec de l'appel à {self.host} : {last_error}") from last_error
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+
+def guard_from_environment(host):
+    """Intermédiaire configuré par TRACKER_UPSTREAM_RATE / _BURST / _DEADLINE"""
+    return UpstreamGuard(
+        host,
+        rate=float(os.environ.get('TRACKER_UPSTREAM_RATE', 5)),
+        burst=int(os.environ.get('TRACKER_UPSTREAM_BURST', 10)),
+        deadline=float(os.environ.get('TRACKER_UPSTREAM_DEADLINE', 10)),
+    )
@@ -0,0 +1,146 @@
+"""Risque du portefeuille : VaR et Expected Shortfall par simulation Monte Carlo.
+
+Les rendements journaliers (log) viennent des barres en cache, alignées comme
+pour la performance historique. Trois modèles :
+- 'bootstrap' : tirage de jours historiques entiers (les corrélations entre
+  symboles sont conservées telles quelles) ;
+- 'gaussian' : loi normale multivariée de même moyenne et covariance ;
+- 'student' : loi de Student multivariée (queues épaisses, `dof` degrés de
+  liberté), ramenée à la même covariance.
+
+La simulation est vectorisée par blocs de trajectoires dont la taille est
+fixée par le plafond mémoire (TRACKER_RISK_MEMORY_MB) ; chaque bloc a son
+propre générateur dérivé de `seed`, si bien qu'à graine et plafond égaux le
+résultat est identique. Les montants par marché restent dans la devise de
+chaque place ; le total est en yuans, chaque position convertie au dernier
+taux de change connu (le risque de change n'est pas simulé). Sans ce taux
+pour l'une des devises, le total n'est pas calculé.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from tracker.performance import align_closes, align_rates
+from tracker.universe import REPORTING_CURRENCY, currency, get_exchange
+
+METHODS = ('bootstrap', 'gaussian', 'student')
+# Plafond mémoire d'un bloc de trajectoires (Mo)
+MEMORY_MB = float(os.environ.get('TRACKER_RISK_MEMORY_MB', 128))
+# Tableaux trajectoires × symboles vivants simultanément dans un bloc
+_ARRAYS_PER_BLOCK = 6
+# Degrés de liberté par défaut du modèle de Student
+DEFAULT_DOF = 5
+TOTAL = 'Total'
+
+
+def _factor(covariance):
+    """Racine de la covariance (tolère les matrices singulières, contrairement à Cholesky)"""
+    eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+    return eigenvectors * np.sqrt(np.clip(eigenvalues, 0, None))
+
+
+def block_size(symbols, memory_mb=MEMORY_MB):
+    """Trajectoires par bloc pour tenir dans le plafond mémoire"""
+    per_path = max(symbols, 1) * 8 * _ARRAYS_PER_BLOCK
+    return max(1, int(memory_mb * 2**20 // per_path))
+
+
+def _horizon_returns(rng, size, returns, horizon, method, mean, factor, dof):
+    """Log-rendements cumulés sur l'horizon : tableau (size, symboles)"""
+    days, symbols = returns.shape
+    if method == 'bootstrap':
+        total = np.zeros((size, symbols))
+        for _ in range(horizon):
+            total += returns[rng.integers(0, days, size)]
+        return total
+    if method == 'gaussian':
+        # Somme de `horizon` tirages indépendants : N(h·μ, h·Σ), un seul tirage suffit
+        return horizon * mean + np.sqrt(horizon) * (rng.standard_normal((size, symbols)) @ factor.T)
+    scale = np.sqrt((dof - 2) / dof)  # variance de la loi de Student ramenée à Σ
+    total = np.zeros((size, symbols))
+    for _ in range(horizon):
+        shocks = rng.standard_normal((size, symbols)) @ factor.T
+        total += mean + shocks * (scale / np.sqrt(rng.chisquare(dof, size) / dof))[:, None]
+    return total
+
+
+def simulate(values, returns, groups, horizon=1, paths=100_000, method='bootstrap', seed=None,
+             dof=DEFAULT_DOF, memory_mb=MEMORY_MB, rates=None):
+    """P&L simulés sur l'horizon : tableau (paths, groupes + 1), la dernière colonne est le total.
+
+    `values` : valeur actuelle par symbole ; `returns` : log-rendements
+    journaliers (jours × symboles) ; `groups` : matrice d'appartenance
+    symboles × groupes (marchés) ; `rates` : conversion de chaque symbole
+    vers la devise du total (1 par défaut).
+    """
+    if method not in METHODS:
+        raise ValueError(f"Méthode inconnue : {method}")
+    if method == 'student' and dof <= 2:
+        raise ValueError("La loi de Student demande plus de 2 degrés de liberté")
+    values = np.asarray(values, dtype=np.float64)
+    returns = np.asarray(returns, dtype=np.float64)
+    mean = returns.mean(axis=0)
+    factor = _factor(np.atleast_2d(np.cov(returns, rowvar=False))) if method != 'bootstrap' else None
+    weights = np.column_stack([groups, np.ones(len(values)) if rates is None else rates])
+    size = block_size(len(values), memory_mb)
+    seeds = np.random.SeedSequence(seed).spawn(-(-paths // size))
+    pnl = np.empty((paths, weights.shape[1]))
+    for block, child in enumerate(seeds):
+        start = block * size
+        count = min(size, paths - start)
+        simulated = _horizon_returns(np.random.default_rng(child), count, returns, horizon, method, mean, factor, dof)
+        pnl[start:start + count] = (np.expm1(simulated) * values) @ weights
+    return pnl
+
+
+def var_es(pnl, confidence=0.99):
+    """(VaR, ES) par colonne, en pertes positives"""
+    threshold = np.quantile(pnl, 1 - confidence, axis=0)
+    tail = pnl <= threshold
+    shortfall = (pnl * tail).sum(axis=0) / np.maximum(tail.sum(axis=0), 1)
+    return -threshold, -shortfall
+
+
+def risk_report(portfolio, bars, horizon=1, paths=100_000, method='bootstrap', confidence=0.99, seed=None,
+                dof=DEFAULT_DOF):
+    """VaR et ES par marché et pour l'ensemble : (DataFrame, P&L total simulés), ou None.
+
+    `bars` : barres journalières {symbole: DataFrame}, avec celles des taux de
+    change (performance.fx_symbols) ; la valeur actuelle de chaque ligne est
+    la quantité détenue au dernier cours. Sans taux pour l'une des devises,
+    pas de ligne TOTAL et les P&L totaux valent None.
+    """
+    symbols = [symbol for symbol, positions in portfolio.items()
+               if positions and symbol in bars and len(bars[symbol]) > 2]
+    if not symbols:
+        return None
+    dates, closes = align_closes(bars, symbols)
+    rates = align_rates(bars, symbols, dates)[-1]
+    converted = not np.isnan(rates).any()
+    returns = np.diff(np.log(closes), axis=0)
+    shares = np.array([sum(p['shares'] for p in portfolio[symbol]) for symbol in symbols])
+    values = shares * closes[-1]
+    exchanges = [get_exchange(symbol) for symbol in symbols]
+    markets = list(dict.fromkeys(exchanges))
+    groups = np.zeros((len(symbols), len(markets)))
+    groups[np.arange(len(symbols)), [markets.index(e) for e in exchanges]] = 1.0
+
+    currencies = [currency(symbols[exchanges.index(market)]) for market in markets]
+
+    pnl = simulate(values, returns, groups, horizon, paths, method, seed, dof,
+                   rates=rates if converted else None)
+    var, es = var_es(pnl, confidence)
+    exposure = np.append(values @ groups, values @ rates if converted else np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        report = pd.DataFrame({
+            'Devise': currencies + [REPORTING_CURRENCY],
+            'Valeur': exposure,
+            'VaR': var,
+            'ES': es,
+            'VaR %': var / exposure * 100,
+            'ES %': es / exposure * 100,
+        }, index=pd.Index(markets + [TOTAL], name='Marché'))
+    if not converted:
+        return report.drop(index=TOTAL), None
+    return report, pnl[:, -1]
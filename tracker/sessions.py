@@ -0,0 +1,52 @@
+"""Calendrier des séances de cotation (Shanghai/Shenzhen, Hong Kong, US)."""
+import pytz
+
+# Séances en heure locale de la place, en minutes depuis minuit
+CHINA_SESSIONS = ((9 * 60 + 30, 11 * 60 + 30), (13 * 60, 15 * 60))
+HK_SESSIONS = ((9 * 60 + 30, 12 * 60), (13 * 60, 16 * 60))
+US_SESSIONS = ((9 * 60 + 30, 16 * 60),)
+
+
+class Market:
+    """Place de cotation : fuseau horaire et séances quotidiennes"""
+
+    def __init__(self, name, timezone, sessions):
+        self.name = name
+        self.timezone = pytz.timezone(timezone)
+        self.sessions = sessions
+
+    @property
+    def open_minute(self):
+        return self.sessions[0][0]
+
+    @property
+    def close_minute(self):
+        return self.sessions[-1][1]
+
+    def __repr__(self):
+        return f"Market({self.name!r})"
+
+
+CHINA = Market('China', 'Asia/Shanghai', CHINA_SESSIONS)
+HONG_KONG = Market('Hong Kong', 'Asia/Hong_Kong', HK_SESSIONS)
+US = Market('US', 'America/New_York', US_SESSIONS)
+
+# Indices dont le suffixe ne suffit pas à déterminer la place
+INDEX_MARKETS = {
+    '^SSEC': CHINA,
+    '^SZSI': CHINA,
+    '^FTXIN9': CHINA,
+    '^HSI': HONG_KONG,
+    '^HSCE': HONG_KONG,
+}
+
+
+def market_for(symbol):
+    """Détermine la place (et donc le calendrier) d'un symbole"""
+    if symbol in INDEX_MARKETS:
+        return INDEX_MARKETS[symbol]
+    if symbol.endswith(('.SS', '.SZ')):
+        return CHINA
+    if symbol.endswith('.HK'):
+        return HONG_KONG
+    return US
@@ -0,0 +1,137 @@
+"""Cache de barres partagé entre processus (fichiers Arrow IPC mappés en mémoire).
+
+Un seul processus télécharge et écrit un fichier ; les autres réplicas du
+même hôte le mappent en lecture seule et partagent donc les mêmes pages.
+L'écriture passe par un fichier temporaire renommé atomiquement : un lecteur
+voit soit l'ancienne version, soit la nouvelle, jamais un fichier partiel.
+"""
+import contextlib
+import json
+import os
+import tempfile
+import time
+from urllib.parse import quote, unquote
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow est normalement installé avec streamlit
+    pa = None
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas de verrou inter-processus
+    fcntl = None
+
+INDEX_COLUMN = '__index__'
+SUFFIX = '.arrow'
+# Au-delà, un fichier partagé est considéré comme abandonné
+MAX_AGE = 24 * 3600
+
+
+def to_arrow(bars, meta):
+    """Table Arrow (index UTC en int64) portant `meta` dans son schéma"""
+    arrays = {name: pa.array(np.ascontiguousarray(bars[name].to_numpy())) for name in bars.columns}
+    arrays[INDEX_COLUMN] = pa.array(bars.index.tz_convert('UTC').as_unit('ns').asi8)
+    meta = dict(meta, index_name=bars.index.name)
+    return pa.table(arrays).replace_schema_metadata({'tracker': json.dumps(meta)})
+
+
+def from_arrow(table):
+    """(barres, métadonnées) sans copie à partir d'une table écrite par `to_arrow`"""
+    meta = json.loads(table.schema.metadata[b'tracker'])
+    # Colonnes à un seul bloc sans valeurs nulles : to_numpy ne copie pas
+    columns = {
+        name: table.column(name).chunk(0).to_numpy(zero_copy_only=True)
+        for name in table.column_names if name != INDEX_COLUMN
+    }
+    stamps = table.column(INDEX_COLUMN).chunk(0).to_numpy(zero_copy_only=True)
+    index = pd.DatetimeIndex(stamps.view('M8[ns]'), name=meta['index_name']).tz_localize('UTC')
+    return pd.DataFrame(columns, index=index, copy=False), meta
+
+
+def _default_directory():
+    base = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(base, 'tracker-bars')
+
+
+def _file_name(symbol, interval):
+    return f"{quote(symbol, safe='')}__{quote(interval, safe='')}{SUFFIX}"
+
+
+class SharedBarCache:
+    """Répertoire de fichiers Arrow : un fichier par (symbole, intervalle de base)"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, symbol, interval):
+        return os.path.join(self.directory, _file_name(symbol, interval))
+
+    def intervals(self, symbol):
+        """Intervalles de base publiés pour `symbol`"""
+        prefix = f"{quote(symbol, safe='')}__"
+        found = []
+        with contextlib.suppress(FileNotFoundError):
+            for name in os.listdir(self.directory):
+                if name.startswith(prefix) and name.endswith(SUFFIX):
+                    found.append(unquote(name[len(prefix):-len(SUFFIX)]))
+        return found
+
+    def read(self, symbol, interval):
+        """(barres, métadonnées) mappées en lecture seule, ou (None, None)"""
+        path = self._path(symbol, interval)
+        try:
+            source = pa.memory_map(path, 'r')
+            table = pa.ipc.open_file(source).read_all()
+        except (FileNotFoundError, pa.ArrowInvalid):
+            return None, None
+        bars, meta = from_arrow(table)
+        if time.time() - meta['fetched_at'] > MAX_AGE:
+            return None, None
+        return bars, meta
+
+    def write(self, symbol, interval, bars, meta):
+        """Publie des barres (index UTC) puis remplace atomiquement l'ancienne version"""
+        table = to_arrow(bars, meta)
+        handle, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(temporary, self._path(symbol, interval))
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(temporary)
+            raise
+
+    @contextlib.contextmanager
+    def writer_lock(self, symbol):
+        """Verrou inter-processus : un seul réplica télécharge un symbole à la fois"""
+        if fcntl is None:
+            yield
+            return
+        path = os.path.join(self.directory, f"{quote(symbol, safe='')}.lock")
+        with open(path, 'a') as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def _from_environment():
+    if pa is None or os.environ.get('TRACKER_SHARED_CACHE', '1') == '0':
+        return None
+    directory = os.environ.get('TRACKER_SHARED_CACHE_DIR') or _default_directory()
+    try:
+        return SharedBarCache(directory)
+    except OSError:
+        return None
+
+
+# Cache partagé de l'hôte (None si désactivé ou indisponible)
+shared_cache = _from_environment()
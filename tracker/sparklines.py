@@ -0,0 +1,118 @@
+"""Mini-graphiques de la watchlist : variation du jour et tracé de la séance.
+
+Un seul téléchargement groupé de barres 5 minutes pour toute la watchlist,
+rangé en matrices symboles × barres (conditions.Frame) : la dernière séance
+de chaque symbole, la clôture de la veille et la variation du jour se lisent
+sur ces matrices, et chaque tracé est réduit à SPARK_POINTS valeurs
+arrondies. Le résultat est gardé tant que les barres en cache n'ont pas
+changé, et resservi sans même relire le cache pendant REFRESH secondes (le
+cours affiché vient des cotations en direct).
+"""
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from tracker import feed
+from tracker.cache import source
+from tracker.conditions import Frame
+from tracker.sessions import market_for
+
+PERIOD, INTERVAL = '5d', '5m'
+# Points au plus par mini-graphique
+SPARK_POINTS = 40
+# Watchlists dont le résultat est gardé
+MAX_CACHED = 64
+# Délai (secondes) pendant lequel le résultat est resservi sans relire les barres
+REFRESH = 30
+
+
+def _session_starts(frame, symbols):
+    """Minuit local (ns UTC) du jour de la dernière barre de chaque symbole"""
+    return np.array([
+        pd.Timestamp(int(frame.times[row, -1]), tz='UTC').tz_convert(market_for(symbol).timezone).normalize().value
+        for row, symbol in enumerate(symbols)
+    ], dtype=np.int64)
+
+
+def snapshot(bars, symbols, points=SPARK_POINTS):
+    """{symbole: {'last', 'previous', 'change', 'line'}} pour la dernière séance de chaque symbole.
+
+    `previous` : dernière clôture de la séance précédente ; `change` : variation
+    du jour en % (NaN sans séance précédente) ; `line` : clôtures de la séance
+    réduites à `points` valeurs.
+    """
+    symbols = [symbol for symbol in dict.fromkeys(symbols) if symbol in bars and not bars[symbol].empty]
+    if not symbols:
+        return {}
+    width = max(len(bars[symbol]) for symbol in symbols)
+    frame = Frame(bars, symbols, width)
+    close = frame.series('close')
+    # Clôtures manquantes : dernier cours connu
+    filled = np.where(np.isnan(close), 0, np.arange(width))
+    close = np.take_along_axis(close, np.maximum.accumulate(filled, axis=1), axis=1)
+
+    rows = np.arange(len(symbols))
+    today = frame.times >= _session_starts(frame, symbols)[:, None]
+    counts = today.sum(axis=1)
+    before = width - counts - 1
+    previous = np.where(before >= 0, close[rows, np.maximum(before, 0)], np.nan)
+    last = close[:, -1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change = (last / previous - 1) * 100
+
+    # Réduction : clôture de la dernière barre de chaque paquet de la séance
+    steps = np.arange(1, points + 1)
+    positions = (width - counts)[:, None] + np.ceil(steps * counts[:, None] / points).astype(np.int64) - 1
+    values = np.round(close[rows[:, None], positions], 4)
+    # Séances plus courtes que `points` : positions répétées retirées
+    distinct = np.concatenate([np.ones((len(symbols), 1), bool), np.diff(positions, axis=1) > 0], axis=1)
+    distinct &= ~np.isnan(values)
+    return {
+        symbol: {
+            'last': float(last[row]),
+            'previous': float(previous[row]),
+            'change': float(change[row]),
+            'line': values[row, distinct[row]].tolist(),
+        }
+        for row, symbol in enumerate(symbols)
+    }
+
+
+class SparklineBook:
+    """Mini-graphiques par watchlist, recalculés seulement quand les barres changent"""
+
+    def __init__(self, fetch=None):
+        self._fetch = fetch
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+
+    def get(self, symbols):
+        """Résultat de snapshot() pour `symbols`, à partir d'un seul téléchargement groupé"""
+        symbols = list(dict.fromkeys(symbols))
+        key = tuple(symbols)
+        now = time.time()
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached is not None and now - cached[2] < REFRESH:
+            return cached[1]
+        fetch = self._fetch or feed.get_bars_many
+        bars = fetch(symbols, PERIOD, INTERVAL)
+        # Les vues du cache sont recréées à chaque lecture, pas leurs tableaux
+        sources = tuple(source(bars[symbol]) if symbol in bars else None for symbol in symbols)
+        if cached is not None and all(a is b for a, b in zip(cached[0], sources)):
+            result = cached[1]
+        else:
+            result = snapshot(bars, symbols)
+        with self._lock:
+            self._cache[key] = (sources, result, now)
+            self._cache.move_to_end(key)
+            while len(self._cache) > MAX_CACHED:
+                self._cache.popitem(last=False)
+        return result
+
+
+# Partagé par toutes les sessions du processus
+sparkline_book = SparklineBook()
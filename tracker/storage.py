@@ -0,0 +1,361 @@
+"""Stockage durable des données utilisateur (SQLite en mode WAL).
+
+Portefeuilles, alertes, watchlists et configuration email (jamais le mot de
+passe SMTP), rangés par utilisateur. C'est la source de vérité du Dashboard
+comme des processus hors bande (surveillance des alertes, préchauffage…) :
+chacun ouvre la même base.
+
+Les lectures sont servies par un cache mémoire par utilisateur (LRU borné),
+sans accès disque sur le chemin d'une exécution ; `PRAGMA data_version`
+détecte les écritures d'un autre processus et invalide le cache. Les
+écritures mettent le cache à jour immédiatement et partent en lot vers la
+base (une transaction toutes les FLUSH_INTERVAL secondes) depuis un thread
+dédié.
+
+TRACKER_DB : chemin de la base (":memory:" pour une base éphémère).
+"""
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+# Délai maximal avant l'écriture d'un lot (secondes)
+FLUSH_INTERVAL = 0.2
+# Nombre maximal d'instructions par transaction
+BATCH_SIZE = 500
+# Fréquence de détection des écritures des autres processus (secondes)
+CHECK_INTERVAL = 0.5
+# Utilisateurs gardés en cache
+MAX_CACHED_USERS = 10000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS positions (
+    id INTEGER PRIMARY KEY,
+    user TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    shares REAL NOT NULL,
+    buy_price REAL NOT NULL,
+    date TEXT
+);
+CREATE INDEX IF NOT EXISTS positions_user ON positions (user);
+CREATE TABLE IF NOT EXISTS alerts (
+    id TEXT PRIMARY KEY,
+    user TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    price REAL NOT NULL,
+    condition TEXT NOT NULL,
+    one_time INTEGER NOT NULL,
+    created TEXT,
+    expression TEXT,
+    interval TEXT
+);
+CREATE INDEX IF NOT EXISTS alerts_user ON alerts (user);
+CREATE INDEX IF NOT EXISTS alerts_symbol ON alerts (symbol);
+CREATE TABLE IF NOT EXISTS watchlists (
+    user TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    symbol TEXT NOT NULL,
+    PRIMARY KEY (user, rank)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS settings (
+    user TEXT NOT NULL,
+    name TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (user, name)
+) WITHOUT ROWID;
+"""
+# Colonnes ajoutées depuis la création du schéma : (table, colonne, type)
+MIGRATIONS = [
+    ('alerts', 'expression', 'TEXT'),
+    ('alerts', 'interval', 'TEXT'),
+]
+ALERT_COLUMNS = "id, symbol, price, condition, one_time, created, expression, interval"
+
+
+def _alert(row):
+    alert_id, symbol, price, condition, one_time, created, expression, interval = row
+    return {'id': alert_id, 'symbol': symbol, 'price': price, 'condition': condition,
+            'one_time': bool(one_time), 'created': created, 'expression': expression,
+            'interval': interval or '1d'}
+
+
+def _migrate(connection):
+    """Ajoute aux tables existantes les colonnes apparues depuis"""
+    for table, column, kind in MIGRATIONS:
+        columns = {row[1] for row in connection.execute(f"PRAGMA table_info({table})")}
+        if column not in columns:
+            connection.execute(f"ALTER TABLE {table} ADD COLUMN {column} {kind}")
+    # Mots de passe SMTP enregistrés par les versions précédentes : effacés
+    for user, value in connection.execute("SELECT user, value FROM settings WHERE name = 'email_config'").fetchall():
+        config = json.loads(value)
+        if config.pop('password', None) is not None:
+            connection.execute("UPDATE settings SET value = ? WHERE user = ? AND name = 'email_config'",
+                               (json.dumps(config), user))
+
+
+class Storage:
+    """Base SQLite partagée, cache de lecture par utilisateur et écritures groupées"""
+
+    def __init__(self, path, flush_interval=FLUSH_INTERVAL, max_users=MAX_CACHED_USERS):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_users = max_users
+        self._connection = None
+        self._lock = threading.RLock()
+        self._users = OrderedDict()
+        self._pending = []
+        self._wake = threading.Event()
+        self._writer = None
+        self._data_version = None
+        self._checked_at = 0.0
+
+    # --- Connexion ---
+
+    def _connect(self):
+        """Connexion unique (ouverte au premier usage), partagée sous verrou"""
+        if self._connection is None:
+            if self.path != ':memory:':
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA busy_timeout=5000")
+            connection.executescript(SCHEMA)
+            _migrate(connection)
+            if self.path != ':memory:':
+                # La base contient les portefeuilles et adresses email des utilisateurs
+                os.chmod(self.path, 0o600)
+            self._connection = connection
+            self._data_version = connection.execute("PRAGMA data_version").fetchone()[0]
+            self._checked_at = time.monotonic()
+            self._writer = threading.Thread(target=self._run, name='storage-writer', daemon=True)
+            self._writer.start()
+            atexit.register(self.flush)
+        return self._connection
+
+    def _check_external_writes(self):
+        """Vide le cache si un autre processus a écrit depuis la dernière vérification"""
+        now = time.monotonic()
+        if now - self._checked_at < CHECK_INTERVAL:
+            return
+        self._checked_at = now
+        version = self._connection.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._data_version:
+            self._data_version = version
+            self._write_pending()
+            self._users.clear()
+
+    # --- Lectures (cache) ---
+
+    def _user(self, user):
+        with self._lock:
+            connection = self._connect()
+            self._check_external_writes()
+            record = self._users.get(user)
+            if record is not None:
+                self._users.move_to_end(user)
+                return record
+            # Écritures en attente d'abord : la base doit refléter le cache
+            self._write_pending()
+            portfolio = {}
+            for symbol, shares, buy_price, date in connection.execute(
+                    "SELECT symbol, shares, buy_price, date FROM positions WHERE user = ? ORDER BY id", (user,)):
+                portfolio.setdefault(symbol, []).append({'shares': shares, 'buy_price': buy_price, 'date': date})
+            alerts = [_alert(row) for row in connection.execute(
+                f"SELECT {ALERT_COLUMNS} FROM alerts WHERE user = ? ORDER BY rowid", (user,))]
+            watchlist = [symbol for symbol, in connection.execute(
+                "SELECT symbol FROM watchlists WHERE user = ? ORDER BY rank", (user,))]
+            settings = {name: json.loads(value) for name, value in connection.execute(
+                "SELECT name, value FROM settings WHERE user = ?", (user,))}
+            record = self._users[user] = {
+                'portfolio': portfolio,
+                'alerts': alerts,
+                'watchlist': watchlist or None,
+                'settings': settings,
+            }
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+            return record
+
+    def portfolio(self, user):
+        """{symbole: [{'shares', 'buy_price', 'date'}]} de l'utilisateur"""
+        with self._lock:
+            record = self._user(user)
+            return {symbol: [dict(p) for p in positions] for symbol, positions in record['portfolio'].items()}
+
+    def alerts(self, user):
+        """Alertes de l'utilisateur (chacune avec son 'id')"""
+        with self._lock:
+            record = self._user(user)
+            return [dict(alert) for alert in record['alerts']]
+
+    def watchlist(self, user):
+        """Watchlist de l'utilisateur, ou None s'il n'en a jamais enregistré"""
+        with self._lock:
+            record = self._user(user)
+            return list(record['watchlist']) if record['watchlist'] is not None else None
+
+    def email_config(self, user):
+        """Configuration email de l'utilisateur, ou None"""
+        with self._lock:
+            record = self._user(user)
+            config = record['settings'].get('email_config')
+            return dict(config) if config is not None else None
+
+    # --- Écritures (cache immédiat, base en lot) ---
+
+    def _queue(self, *statements):
+        self._pending.extend(statements)
+        self._wake.set()
+
+    def add_position(self, user, symbol, position):
+        with self._lock:
+            record = self._user(user)
+            record['portfolio'].setdefault(symbol, []).append(dict(position))
+            self._queue(("INSERT INTO positions (user, symbol, shares, buy_price, date) VALUES (?, ?, ?, ?, ?)",
+                         (user, symbol, position['shares'], position['buy_price'], position.get('date'))))
+
+    def clear_portfolio(self, user):
+        with self._lock:
+            record = self._user(user)
+            record['portfolio'] = {}
+            self._queue(("DELETE FROM positions WHERE user = ?", (user,)))
+
+    def add_alert(self, user, alert):
+        """Enregistre une alerte ; renvoie son identifiant"""
+        alert = dict(alert, id=alert.get('id') or uuid.uuid4().hex)
+        with self._lock:
+            record = self._user(user)
+            record['alerts'].append(alert)
+            self._queue(("INSERT OR REPLACE INTO alerts "
+                         "(id, user, symbol, price, condition, one_time, created, expression, interval) "
+                         "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                         (alert['id'], user, alert['symbol'], alert['price'], alert['condition'],
+                          int(alert.get('one_time', False)), alert.get('created'), alert.get('expression'),
+                          alert.get('interval'))))
+        return alert['id']
+
+    def remove_alert(self, user, alert_id):
+        with self._lock:
+            record = self._user(user)
+            record['alerts'] = [alert for alert in record['alerts'] if alert['id'] != alert_id]
+            self._queue(("DELETE FROM alerts WHERE user = ? AND id = ?", (user, alert_id)))
+
+    def set_watchlist(self, user, symbols):
+        symbols = list(dict.fromkeys(symbols))
+        with self._lock:
+            record = self._user(user)
+            record['watchlist'] = symbols
+            self._queue(("DELETE FROM watchlists WHERE user = ?", (user,)),
+                        *[("INSERT INTO watchlists (user, rank, symbol) VALUES (?, ?, ?)", (user, rank, symbol))
+                          for rank, symbol in enumerate(symbols)])
+
+    def set_email_config(self, user, config):
+        """Enregistre la configuration email, jamais le mot de passe SMTP"""
+        config = {name: value for name, value in config.items() if name != 'password'}
+        with self._lock:
+            record = self._user(user)
+            record['settings']['email_config'] = dict(config)
+            self._queue(("INSERT OR REPLACE INTO settings (user, name, value) VALUES (?, 'email_config', ?)",
+                         (user, json.dumps(config))))
+
+    # --- Processus hors bande (lecture directe de la base) ---
+
+    def all_alerts(self):
+        """{utilisateur: [alertes]} de tous les utilisateurs"""
+        with self._lock:
+            connection = self._connect()
+            self._write_pending()
+            alerts = {}
+            for user, *row in connection.execute(
+                    f"SELECT user, {ALERT_COLUMNS} FROM alerts ORDER BY rowid"):
+                alerts.setdefault(user, []).append(_alert(row))
+            return alerts
+
+    def all_watchlists(self):
+        """{utilisateur: watchlist} des utilisateurs qui en ont enregistré une"""
+        with self._lock:
+            connection = self._connect()
+            self._write_pending()
+            watchlists = {}
+            for user, symbol in connection.execute("SELECT user, symbol FROM watchlists ORDER BY user, rank"):
+                watchlists.setdefault(user, []).append(symbol)
+            return watchlists
+
+    def all_portfolios(self):
+        """{utilisateur: portefeuille} de tous les utilisateurs (même forme que portfolio())"""
+        with self._lock:
+            connection = self._connect()
+            self._write_pending()
+            portfolios = {}
+            for user, symbol, shares, buy_price, date in connection.execute(
+                    "SELECT user, symbol, shares, buy_price, date FROM positions ORDER BY id"):
+                portfolios.setdefault(user, {}).setdefault(symbol, []).append(
+                    {'shares': shares, 'buy_price': buy_price, 'date': date})
+            return portfolios
+
+    def users(self):
+        """Utilisateurs ayant au moins une donnée enregistrée"""
+        with self._lock:
+            connection = self._connect()
+            self._write_pending()
+            return sorted(user for user, in connection.execute(
+                "SELECT user FROM positions UNION SELECT user FROM alerts "
+                "UNION SELECT user FROM watchlists UNION SELECT user FROM settings"))
+
+    # --- Écriture des lots ---
+
+    def _write_pending(self):
+        """Écrit les instructions en attente (appelé sous verrou)"""
+        # Nos propres transactions ne changent pas data_version (seules celles
+        # des autres connexions le font) : le cache reste valide
+        while self._pending:
+            batch = self._pending[:BATCH_SIZE]
+            connection = self._connection
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                for statement, parameters in batch:
+                    connection.execute(statement, parameters)
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+            # Retiré de la file seulement une fois validé
+            del self._pending[:len(batch)]
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            time.sleep(self.flush_interval)  # regroupe les écritures proches
+            self._wake.clear()
+            with self._lock:
+                try:
+                    self._write_pending()
+                except sqlite3.Error:
+                    # Base momentanément verrouillée : le lot reste en attente
+                    self._wake.set()
+
+    def flush(self):
+        """Écrit immédiatement les modifications en attente"""
+        with self._lock:
+            if self._connection is not None:
+                self._write_pending()
+
+    def invalidate(self):
+        """Vide le cache de lecture (les données restent en base)"""
+        with self._lock:
+            if self._connection is not None:
+                self._write_pending()
+            self._users.clear()
+
+
+def _default_path():
+    return os.path.join(os.path.expanduser('~'), '.tracker', 'tracker.db')
+
+
+# Base partagée par toutes les sessions du processus
+storage = Storage(os.environ.get('TRACKER_DB') or _default_path())
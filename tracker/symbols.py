@@ -0,0 +1,216 @@
+"""Référentiel de symboles : actions A, Hong Kong, ADR chinois et indices.
+
+Source : tracker/data/symbols.csv (colonnes symbol, name, pinyin, name_en,
+market), complétée par TRACKER_SYMBOLS_CSV s'il est défini (par exemple la
+liste complète d'un marché, même format ; les initiales pinyin manquantes
+sont calculées avec pypinyin s'il est installé).
+
+Les sources sont compilées en deux tableaux NumPy, les fiches triées par
+symbole et les clés de recherche triées (symbole, code, initiales pinyin,
+noms chinois et anglais), enregistrés dans TRACKER_SYMBOLS_DIR puis ouverts
+en mémoire projetée : le chargement ne lit rien d'avance, une recherche par
+préfixe est une recherche dichotomique dans les clés. L'index est recompilé
+dès qu'une source est plus récente.
+
+    python -m tracker.symbols 贵州        # recherche en ligne de commande
+"""
+import argparse
+import csv
+import os
+import re
+import threading
+
+import numpy as np
+
+SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'symbols.csv')
+
+RECORD = np.dtype([('symbol', 'S16'), ('name', 'S64'), ('pinyin', 'S24'), ('name_en', 'S64'), ('market', 'S4')])
+KEY = np.dtype([('key', 'S48'), ('row', '<i4'), ('kind', 'i1')])
+# Genres de clés, du plus pertinent au moins pertinent
+KINDS = ('symbol', 'code', 'pinyin', 'name', 'name_en', 'word')
+# Clés examinées au plus pour classer les résultats d'un préfixe
+MAX_CANDIDATES = 512
+# Formats de tickers Yahoo acceptés hors référentiel
+FORMATS = [re.compile(pattern) for pattern in (
+    r'^\d{6}\.(SS|SZ)$',
+    r'^\d{4,5}\.HK$',
+    r'^\^[A-Z0-9]{2,10}$',
+    r'^[A-Z]{1,5}$',
+)]
+
+
+def _key(text):
+    return text.strip().lower().encode('utf-8')[:KEY['key'].itemsize]
+
+
+def _initials(name):
+    """Initiales pinyin d'un nom chinois (vide sans pypinyin)"""
+    try:
+        from pypinyin import Style, lazy_pinyin
+    except ImportError:
+        return ''
+    return ''.join(lazy_pinyin(name, style=Style.FIRST_LETTER)).upper()
+
+
+def _read(path):
+    with open(path, newline='', encoding='utf-8') as handle:
+        return [row for row in csv.DictReader(handle) if (row.get('symbol') or '').strip()]
+
+
+def _replace(path, array):
+    """Écriture atomique d'un tableau .npy (les lecteurs gardent l'ancien fichier projeté)"""
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, 'wb') as handle:
+        np.save(handle, array)
+    os.replace(temporary, path)
+
+
+def build(sources, directory):
+    """Compile les CSV `sources` (les derniers l'emportent) en fiches et clés dans `directory`"""
+    rows = {}
+    for path in sources:
+        for row in _read(path):
+            rows[row['symbol'].strip().upper()] = row
+    symbols = sorted(rows)
+    records = np.zeros(len(symbols), RECORD)
+    keys = set()
+    for index, symbol in enumerate(symbols):
+        row = rows[symbol]
+        name = (row.get('name') or '').strip()
+        name_en = (row.get('name_en') or '').strip()
+        pinyin = ((row.get('pinyin') or '').strip() or _initials(name)).upper()
+        records[index] = (symbol.encode(), name.encode(), pinyin.encode(), name_en.encode(),
+                          (row.get('market') or '').strip().encode())
+        code = symbol.split('.')[0].lstrip('^')
+        candidates = [(symbol, 0), (code, 1), (code.lstrip('0'), 1), (pinyin, 2), (name, 3), (name_en, 4)]
+        candidates += [(word, 5) for word in name_en.split()[1:] if len(word) > 1]
+        keys.update((_key(text), index, kind) for text, kind in candidates if text)
+    os.makedirs(directory, exist_ok=True)
+    _replace(os.path.join(directory, 'records.npy'), records)
+    _replace(os.path.join(directory, 'keys.npy'), np.array(sorted(keys), dtype=KEY))
+
+
+def _decode(record):
+    return {
+        'symbol': record['symbol'].decode(),
+        'name': record['name'].decode('utf-8', 'ignore'),
+        'pinyin': record['pinyin'].decode(),
+        'name_en': record['name_en'].decode('utf-8', 'ignore'),
+        'market': record['market'].decode(),
+    }
+
+
+def label(record):
+    """Libellé d'un résultat : symbole, nom chinois et nom anglais"""
+    names = ' / '.join(name for name in (record['name'], record['name_en']) if name)
+    return f"{record['symbol']} · {names}" if names else record['symbol']
+
+
+class SymbolMaster:
+    """Index de symboles en mémoire projetée, compilé à la demande"""
+
+    def __init__(self, sources, directory):
+        self.sources = [path for path in sources if path and os.path.exists(path)]
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._records = None
+        self._keys = None
+
+    def _stale(self):
+        paths = [os.path.join(self.directory, name) for name in ('records.npy', 'keys.npy')]
+        if not all(os.path.exists(path) for path in paths):
+            return True
+        built = min(os.path.getmtime(path) for path in paths)
+        return any(os.path.getmtime(source) > built for source in self.sources)
+
+    def _load(self):
+        if self._records is None:
+            with self._lock:
+                if self._records is None:
+                    if self._stale():
+                        build(self.sources, self.directory)
+                    self._keys = np.load(os.path.join(self.directory, 'keys.npy'), mmap_mode='r')
+                    self._records = np.load(os.path.join(self.directory, 'records.npy'), mmap_mode='r')
+        return self._records, self._keys
+
+    def __len__(self):
+        return len(self._load()[0])
+
+    def lookup(self, symbol):
+        """Fiche d'un symbole exact, ou None"""
+        records, _ = self._load()
+        wanted = symbol.strip().upper().encode()
+        position = int(np.searchsorted(records['symbol'], wanted))
+        if position < len(records) and records['symbol'][position] == wanted:
+            return _decode(records[position])
+        return None
+
+    def _rows(self, candidates, prefix):
+        """Fiches distinctes des clés candidates : exactes d'abord, puis par genre et longueur"""
+        keys = candidates['key']
+        order = np.lexsort((candidates['row'], np.char.str_len(keys), candidates['kind'], keys != prefix))
+        rows = candidates['row'][order]
+        _, first = np.unique(rows, return_index=True)
+        return rows[np.sort(first)]
+
+    def search(self, query, limit=10):
+        """Symboles dont une clé commence par `query` (code, ticker, pinyin, nom chinois ou anglais)"""
+        prefix = _key(query)
+        if not prefix:
+            return []
+        records, keys = self._load()
+        start = int(np.searchsorted(keys['key'], prefix, side='left'))
+        stop = int(np.searchsorted(keys['key'], prefix + b'\xff', side='left'))
+        candidates = np.asarray(keys[start:min(stop, start + MAX_CANDIDATES)])
+        if not len(candidates):
+            return []
+        return [_decode(records[row]) for row in self._rows(candidates, prefix)[:limit]]
+
+    def resolve(self, text):
+        """Symbole Yahoo d'une saisie, avant tout téléchargement : (symbole, connu).
+
+        Ticker exact, ou code sans suffixe, initiales ou nom chinois désignant
+        une seule fiche : symbole du référentiel. Sinon un ticker au format
+        Yahoo est accepté comme inconnu ; (None, False) pour une saisie invalide.
+        """
+        text = text.strip()
+        if not text:
+            return None, False
+        record = self.lookup(text)
+        if record is not None:
+            return record['symbol'], True
+        records, keys = self._load()
+        key = _key(text)
+        start = int(np.searchsorted(keys['key'], key, side='left'))
+        stop = int(np.searchsorted(keys['key'], key, side='right'))
+        exact = np.asarray(keys[start:stop])
+        rows = np.unique(exact['row'][exact['kind'] <= KINDS.index('name')])
+        if len(rows) == 1:
+            return records[rows[0]]['symbol'].decode(), True
+        candidate = text.upper()
+        if any(pattern.match(candidate) for pattern in FORMATS):
+            return candidate, False
+        return None, False
+
+
+# Référentiel partagé par toutes les sessions du processus
+symbol_master = SymbolMaster(
+    [SOURCE, os.environ.get('TRACKER_SYMBOLS_CSV')],
+    os.environ.get('TRACKER_SYMBOLS_DIR') or os.path.join(os.path.expanduser('~'), '.tracker', 'symbols'),
+)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recherche dans le référentiel de symboles")
+    parser.add_argument('query', help="code, ticker, initiales pinyin ou nom")
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--rebuild', action='store_true', help="recompile l'index")
+    args = parser.parse_args(argv)
+    if args.rebuild:
+        build(symbol_master.sources, symbol_master.directory)
+    for record in symbol_master.search(args.query, args.limit):
+        print(label(record))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""Fuseau d'affichage : les barres restent en UTC, la conversion se fait au rendu.
+
+Les instants sont conservés en UTC (epochs int64 en nanosecondes dans le
+cache). Seules les lignes effectivement affichées sont converties dans le
+fuseau choisi par l'utilisateur, et les libellés (UTC+1, UTC+2, ...) sont
+calculés pour chaque instant : ils suivent donc l'heure d'été.
+"""
+import os
+from datetime import datetime
+
+import pandas as pd
+import pytz
+
+# Fuseau par défaut, modifiable par TRACKER_DISPLAY_TZ
+DEFAULT_ZONE = os.environ.get('TRACKER_DISPLAY_TZ', 'Europe/Paris')
+
+# Fuseaux proposés dans la barre latérale
+DISPLAY_ZONES = [
+    'Europe/Paris',
+    'Europe/London',
+    'Europe/Berlin',
+    'Asia/Shanghai',
+    'Asia/Hong_Kong',
+    'Asia/Singapore',
+    'Asia/Tokyo',
+    'America/New_York',
+    'America/Los_Angeles',
+    'UTC',
+]
+if DEFAULT_ZONE not in DISPLAY_ZONES:
+    DISPLAY_ZONES.insert(0, DEFAULT_ZONE)
+
+
+def zone(name):
+    return pytz.timezone(name)
+
+
+def offset_label(tz, when=None):
+    """Décalage de `tz` à l'instant `when` (maintenant par défaut) : 'UTC+2', 'UTC-4', 'UTC+5:30'"""
+    if when is None:
+        when = datetime.now(tz)
+    elif when.tzinfo is None:
+        when = pytz.UTC.localize(when).astimezone(tz)
+    else:
+        when = when.astimezone(tz)
+    minutes = int(when.utcoffset().total_seconds() // 60)
+    if minutes == 0:
+        return 'UTC'
+    sign = '+' if minutes > 0 else '-'
+    hours, rest = divmod(abs(minutes), 60)
+    return f"UTC{sign}{hours}" + (f":{rest:02d}" if rest else '')
+
+
+def zone_label(tz, when=None):
+    """'Europe/Paris (UTC+1)'"""
+    return f"{tz.zone} ({offset_label(tz, when)})"
+
+
+def epochs(index):
+    """Instants UTC d'un index de barres en int64 (nanosecondes), sans copie"""
+    if index.tz is None:
+        index = index.tz_localize('UTC')
+    return index.as_unit('ns').asi8
+
+
+def to_display(index, tz):
+    """Index converti dans le fuseau d'affichage (les instants ne changent pas)"""
+    if index.tz is None:
+        index = index.tz_localize('UTC')
+    return index.tz_convert(tz)
+
+
+def chart_times(index, tz):
+    """Heures murales du fuseau d'affichage pour un graphique.
+
+    plotly ignore les décalages horaires : on lui passe directement l'heure
+    locale, sans fuseau.
+    """
+    return to_display(pd.DatetimeIndex(index), tz).tz_localize(None)
+
+
+def format_times(index, tz, fmt='%Y-%m-%d %H:%M:%S'):
+    """Libellés des lignes affichées, avec le décalage exact de chacune"""
+    local = to_display(index, tz)
+    return pd.Index([f"{stamp.strftime(fmt)} ({offset_label(tz, stamp)})" for stamp in local], name=index.name)
+
+
+def format_time(when, tz, fmt='%Y-%m-%d %H:%M:%S'):
+    """Libellé d'un instant isolé (datetime ou Timestamp)"""
+    if when.tzinfo is None:
+        when = pytz.UTC.localize(when)
+    local = when.astimezone(tz)
+    return f"{local.strftime(fmt)} ({offset_label(tz, local)})"
+
+
+def parse_time(label):
+    """Instant UTC (Timestamp) d'un libellé écrit par `format_time`, ou None"""
+    try:
+        text, _, offset = label.partition(' (')
+        stamp = pd.Timestamp(text)
+        if stamp.tzinfo is not None:
+            return stamp.tz_convert('UTC')
+        offset = offset.rstrip(')')[len('UTC'):]
+        minutes = 0
+        if offset:
+            hours, _, rest = offset[1:].partition(':')
+            minutes = (int(hours) * 60 + int(rest or 0)) * (-1 if offset[0] == '-' else 1)
+        return (stamp - pd.Timedelta(minutes=minutes)).tz_localize('UTC')
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def session_hours(market, tz, day=None):
+    """Séances de `market` pour le jour `day` (aujourd'hui par défaut), en heure de `tz`"""
+    if day is None:
+        day = datetime.now(market.timezone).date()
+    hours = []
+    for start, end in market.sessions:
+        bounds = [
+            market.timezone.localize(datetime(day.year, day.month, day.day, minute // 60, minute % 60)).astimezone(tz)
+            for minute in (start, end)
+        ]
+        hours.append(tuple(bounds))
+    return hours
@@ -0,0 +1,110 @@
+"""Univers de symboles par défaut (watchlist initiale, indices chinois)."""
+
+DEFAULT_WATCHLIST = [
+    '000858.SZ',  # Wuliangye
+    '600519.SS',  # Kweichow Moutai
+    '000333.SZ',  # Midea Group
+    '601318.SS',  # Ping An Insurance
+    '0700.HK',    # Tencent
+    '9988.HK',    # Alibaba
+    'BABA',       # Alibaba US
+    'JD',         # JD.com US
+    'BIDU',       # Baidu US
+    'NTES'        # NetEase US
+]
+
+CHINESE_INDICES = {
+    '^SSEC': 'Shanghai Composite (SSE)',
+    '^SZSI': 'Shenzhen Composite (SZSE)',
+    '^HSI': 'Hang Seng Index (Hong Kong)',
+    '^HSCE': 'Hang Seng China Enterprises (H-shares)',
+    '^FTXIN9': 'FTSE China A50',
+    '000300.SS': 'CSI 300',
+    '000905.SS': 'CSI 500',
+    '399006.SZ': 'ChiNext (Startups)',
+    'BABA': 'Alibaba (référence)',
+    '0700.HK': 'Tencent (référence)'
+}
+
+# Sociétés cotées à la fois en actions A (Shanghai/Shenzhen) et H (Hong Kong)
+AH_PAIRS = {
+    '601318.SS': '2318.HK',  # Ping An Insurance
+    '600036.SS': '3968.HK',  # China Merchants Bank
+    '601398.SS': '1398.HK',  # ICBC
+    '601939.SS': '0939.HK',  # China Construction Bank
+    '601288.SS': '1288.HK',  # Agricultural Bank of China
+    '601988.SS': '3988.HK',  # Bank of China
+    '601628.SS': '2628.HK',  # China Life
+    '601601.SS': '2601.HK',  # China Pacific Insurance
+    '600028.SS': '0386.HK',  # Sinopec
+    '601857.SS': '0857.HK',  # PetroChina
+    '601088.SS': '1088.HK',  # China Shenhua
+    '600030.SS': '6030.HK',  # CITIC Securities
+    '600585.SS': '0914.HK',  # Anhui Conch Cement
+    '601899.SS': '2899.HK',  # Zijin Mining
+    '000002.SZ': '2202.HK',  # China Vanke
+    '002594.SZ': '1211.HK',  # BYD
+    '000333.SZ': '0300.HK',  # Midea Group
+}
+# Taux de change HKD → CNY et USD → CNY (Yahoo)
+HKD_CNY = 'HKDCNY=X'
+USD_CNY = 'USDCNY=X'
+# Devise des totaux multi-places
+REPORTING_CURRENCY = 'CNY'
+
+
+def ah_pair(symbol):
+    """(action A, action H) d'une société doublement cotée, ou None"""
+    if symbol in AH_PAIRS:
+        return symbol, AH_PAIRS[symbol]
+    for a_share, h_share in AH_PAIRS.items():
+        if h_share == symbol:
+            return a_share, h_share
+    return None
+
+
+def price_limit(symbol):
+    """Limite de variation journalière d'une action A (0.10, ou 0.20 pour ChiNext et STAR), None sinon"""
+    code, _, suffix = symbol.partition('.')
+    if suffix == 'SS' and code.startswith('6'):
+        return 0.20 if code.startswith(('688', '689')) else 0.10
+    if suffix == 'SZ' and code.startswith(('000', '001', '002', '003', '300', '301')):
+        return 0.20 if code.startswith(('300', '301')) else 0.10
+    return None
+
+
+def get_exchange(symbol):
+    """Détermine l'échange pour un symbole"""
+    if symbol.endswith('.SS'):
+        return 'Shanghai'
+    elif symbol.endswith('.SZ'):
+        return 'Shenzhen'
+    elif symbol.endswith('.HK'):
+        return 'Hong Kong'
+    else:
+        return 'US Listed'
+
+
+def currency(symbol):
+    """Devise de cotation d'un symbole"""
+    if symbol.endswith('.HK'):
+        return 'HKD'
+    elif symbol.endswith(('.SS', '.SZ')):
+        return 'CNY'
+    else:
+        return 'USD'
+
+
+def fx_to_cny(symbol):
+    """Symbole Yahoo du taux qui ramène la devise de `symbol` en yuans, None pour le yuan"""
+    return {'HKD': HKD_CNY, 'USD': USD_CNY}.get(currency(symbol))
+
+
+def format_currency(value, symbol):
+    """Formate la monnaie selon le symbole"""
+    if symbol.endswith('.HK'):
+        return f"HK${value:.2f}"
+    elif symbol.endswith(('.SS', '.SZ')):
+        return f"¥{value:.2f}"
+    else:
+        return f"${value:.2f}"
@@ -0,0 +1,119 @@
+"""Accès à Yahoo Finance : seul module qui interroge le réseau.
+
+Tous les appels passent par `yahoo` (tracker.resilience) : limitation de
+débit, reprises avec délai aléatoire et disjoncteur. Ils lèvent
+UpstreamError en cas d'échec persistant.
+
+yfinance n'est importé qu'au premier accès réseau : un processus servi par
+la passerelle ou par le cache partagé ne le charge jamais.
+"""
+from tracker.resilience import guard_from_environment
+
+# Délai maximal d'une requête HTTP individuelle (secondes)
+REQUEST_TIMEOUT = 10
+
+yahoo = guard_from_environment('query.finance.yahoo.com')
+
+
+def to_utc(hist):
+    """Normalise l'index d'un historique en UTC"""
+    if hist is None or hist.empty:
+        return hist
+    if hist.index.tz is None:
+        hist.index = hist.index.tz_localize('UTC')
+    else:
+        hist.index = hist.index.tz_convert('UTC')
+    return hist
+
+
+def _history(symbol, interval, period, start, end):
+    import yfinance as yf
+    ticker = yf.Ticker(symbol)
+    if period is not None:
+        hist = ticker.history(period=period, interval=interval, timeout=REQUEST_TIMEOUT)
+    else:
+        hist = ticker.history(start=start, end=end, interval=interval, timeout=REQUEST_TIMEOUT)
+    return to_utc(hist)
+
+
+def fetch_history(symbol, interval, period=None, start=None, end=None):
+    """Télécharge l'historique d'un symbole, par période ou par bornes (UTC)"""
+    return yahoo.call(_history, symbol, interval, period, start, end)
+
+
+def _histories(symbols, interval, period):
+    import yfinance as yf
+    data = yf.download(
+        symbols, period=period, interval=interval, group_by='ticker', actions=True,
+        progress=False, threads=True, auto_adjust=True, timeout=REQUEST_TIMEOUT
+    )
+    histories = {}
+    for symbol in symbols:
+        try:
+            hist = data[symbol].dropna(how='all')
+        except KeyError:
+            continue
+        if not hist.empty:
+            histories[symbol] = to_utc(hist)
+    if not histories:
+        raise RuntimeError(f"Aucun historique reçu pour {len(symbols)} symbole(s)")
+    return histories
+
+
+def fetch_histories(symbols, interval, period):
+    """Historiques d'un lot de symboles sur une même période, en un seul appel.
+
+    Retourne {symbole: DataFrame} ; les symboles sans données sont absents du
+    résultat.
+    """
+    symbols = list(symbols)
+    if not symbols:
+        return {}
+    return yahoo.call(_histories, symbols, interval, period)
+
+
+def _info(symbol):
+    import yfinance as yf
+    return yf.Ticker(symbol).info
+
+
+def fetch_info(symbol):
+    """Télécharge la fiche descriptive d'un symbole (dernière fiche valide en cas d'échec)"""
+    return yahoo.call(_info, symbol, fallback_key=('info', symbol))
+
+
+def _quotes(symbols):
+    import yfinance as yf
+    data = yf.download(
+        symbols, period='5d', interval='1d', group_by='ticker',
+        progress=False, threads=True, auto_adjust=False, timeout=REQUEST_TIMEOUT
+    )
+    quotes = {}
+    for symbol in symbols:
+        try:
+            closes = data[symbol]['Close'].dropna()
+        except KeyError:
+            continue
+        if closes.empty:
+            continue
+        quotes[symbol] = {
+            'price': float(closes.iloc[-1]),
+            'previous_close': float(closes.iloc[-2]) if len(closes) > 1 else float(closes.iloc[-1]),
+            'time': closes.index[-1].timestamp(),
+        }
+    if not quotes:
+        # yf.download n'échoue pas : un lot entièrement vide est traité comme un échec
+        raise RuntimeError(f"Aucune cotation reçue pour {len(symbols)} symbole(s)")
+    return quotes
+
+
+def fetch_quotes(symbols):
+    """Derniers cours d'un lot de symboles, en un seul appel.
+
+    Retourne {symbole: {'price', 'previous_close', 'time'}} ; les symboles
+    sans données sont absents du résultat.
+    """
+    symbols = list(symbols)
+    if not symbols:
+        return {}
+    return yahoo.call(_quotes, symbols)
@@ -0,0 +1,248 @@
+"""Préchauffage des caches avant l'ouverture des places (Chine, Hong Kong, US).
+
+De LEAD minutes avant chaque ouverture jusqu'à HOLD minutes après, les
+barres de tous les symboles suivis sont téléchargées par lots et gardées
+fraîches (toutes les REFRESH secondes, en deçà de la durée de validité du
+magasin de barres) : watchlists, portefeuilles et alertes de tous les
+utilisateurs, watchlist par défaut, indices chinois et leurs membres
+(tracker.breadth). Les calculs gardés en mémoire (mini-graphiques,
+performance des portefeuilles, conditions compilées) sont faits au passage,
+utiles quand le planificateur tourne dans le processus du Dashboard. Le
+premier visiteur de la séance lit le cache au lieu d'attendre Yahoo.
+
+Les lots de BATCH_SIZE symboles qui ont dû appeler l'amont sont espacés de
+PAUSE secondes. Les barres sont publiées dans le cache partagé de l'hôte :
+lancé à part, le planificateur sert tous les réplicas du Dashboard.
+
+    python -m tracker.warmup            # planificateur (bloquant)
+    python -m tracker.warmup --now      # un préchauffage immédiat, puis sortie
+
+TRACKER_WARMUP=1 le démarre aussi dans le processus du Dashboard ;
+TRACKER_WARMUP_LEAD, TRACKER_WARMUP_HOLD (minutes) et TRACKER_WARMUP_PAUSE
+(secondes) règlent son calendrier et son débit.
+"""
+import argparse
+import os
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+
+import pytz
+
+from tracker import breadth, conditions, feed, metrics, performance, sparklines, timezones
+from tracker.bars import DATA_TTL
+from tracker.sessions import CHINA, HONG_KONG, US, market_for
+from tracker.storage import storage
+from tracker.universe import CHINESE_INDICES, DEFAULT_WATCHLIST
+
+MARKETS = (CHINA, HONG_KONG, US)
+# Début du préchauffage avant l'ouverture, et maintien après (minutes)
+LEAD = int(os.environ.get('TRACKER_WARMUP_LEAD', 10))
+HOLD = int(os.environ.get('TRACKER_WARMUP_HOLD', 30))
+# Rafraîchissement pendant la fenêtre, avant que les barres n'expirent (secondes)
+REFRESH = max(DATA_TTL - 60, 30)
+# Symboles par appel amont, et pause après un lot téléchargé (secondes)
+BATCH_SIZE = 50
+PAUSE = float(os.environ.get('TRACKER_WARMUP_PAUSE', 2))
+# Rapports conservés
+HISTORY = 50
+
+# Vues ouvertes par défaut : graphique principal et signaux du jour, comparaison des indices
+MAIN_VIEW = ('1mo', '1d')
+INDEX_VIEW = ('5d', '1d')
+
+
+def window(market, day):
+    """(début, fin) UTC de la fenêtre de préchauffage de `market` le jour local `day`"""
+    opening = timezones.session_hours(market, pytz.UTC, day)[0][0]
+    return opening - timedelta(minutes=LEAD), opening + timedelta(minutes=HOLD)
+
+
+def next_window(now=None):
+    """(place, début, fin) de la prochaine fenêtre non terminée, du lundi au vendredi (fériés non connus)"""
+    now = now or datetime.now(pytz.UTC)
+    upcoming = []
+    for market in MARKETS:
+        day = now.astimezone(market.timezone).date() - timedelta(days=1)
+        while True:
+            if day.weekday() < 5:
+                start, end = window(market, day)
+                if end > now:
+                    upcoming.append((start, end, market))
+                    break
+            day += timedelta(days=1)
+    start, end, market = min(upcoming, key=lambda item: item[0])
+    return market, start, end
+
+
+def plan(store=storage):
+    """(travaux {(période, intervalle): [symboles]}, watchlists, portefeuilles) de tous les utilisateurs"""
+    jobs = {}
+
+    def add(period, interval, symbols):
+        jobs.setdefault((period, interval), {}).update(dict.fromkeys(symbols))
+
+    # Watchlist par défaut : celle des utilisateurs qui n'en ont pas enregistré
+    watchlists = list(dict.fromkeys(tuple(w) for w in store.all_watchlists().values()))
+    watchlists = [list(w) for w in dict.fromkeys(watchlists + [tuple(DEFAULT_WATCHLIST)])]
+    portfolios = [portfolio for portfolio in store.all_portfolios().values() if portfolio]
+    for watchlist in watchlists:
+        add(*MAIN_VIEW, watchlist)
+        add(sparklines.PERIOD, sparklines.INTERVAL, watchlist)
+    add(*MAIN_VIEW, CHINESE_INDICES)
+    add(*INDEX_VIEW, CHINESE_INDICES)
+    listed = breadth.constituents()
+    for index in breadth.available(listed):
+        add(breadth.PERIOD, '1d', [member['symbol'] for member in listed[index]])
+    for portfolio in portfolios:
+        add(performance.history_period(portfolio), '1d', list(portfolio) + performance.fx_symbols(portfolio))
+    for alerts in store.all_alerts().values():
+        for alert in alerts:
+            try:
+                condition = conditions.compile_condition(conditions.expression_for(alert))
+            except conditions.ConditionError:
+                continue
+            interval = alert.get('interval') or '1d'
+            add(conditions.period_for(interval, condition.lookback + conditions.REPLAY_BARS), interval,
+                conditions.required_symbols(condition, [alert['symbol']]))
+    return {job: list(symbols) for job, symbols in jobs.items()}, watchlists, portfolios
+
+
+class Warmer:
+    """Planificateur du préchauffage, dans un thread ou un processus dédié"""
+
+    def __init__(self, store=storage, fetch=None, batch_size=BATCH_SIZE, pause=PAUSE):
+        self._store = store
+        self._fetch = fetch
+        self.batch_size = batch_size
+        self.pause = pause
+        self.reports = deque(maxlen=HISTORY)
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def warm(self, market=None):
+        """Un préchauffage complet (symboles de `market` d'abord) ; retourne son rapport"""
+        fetch = self._fetch or feed.get_bars_many
+        started = datetime.now(pytz.UTC)
+        span = metrics.span('warmup').start()
+        jobs, watchlists, portfolios = plan(self._store)
+        warmed, missing = {}, set()
+        for (period, interval), symbols in jobs.items():
+            if self._stop.is_set():
+                break
+            if market is not None:
+                symbols = sorted(symbols, key=lambda symbol: market_for(symbol) is not market)
+            found = 0
+            for first in range(0, len(symbols), self.batch_size):
+                chunk = symbols[first:first + self.batch_size]
+                calls = span.counters['upstream_calls'] + span.counters['gateway_calls']
+                try:
+                    bars = fetch(chunk, period, interval)
+                except Exception:
+                    bars = {}
+                found += len(bars)
+                missing.update(symbol for symbol in chunk if symbol not in bars)
+                # Débit limité : pause seulement après un lot qui a appelé l'amont
+                if (span.counters['upstream_calls'] + span.counters['gateway_calls'] > calls
+                        and self._stop.wait(self.pause)):
+                    break
+            warmed[f"{period}/{interval}"] = found
+
+        # Calculs gardés entre les exécutions, à partir des barres désormais en cache
+        for watchlist in watchlists:
+            try:
+                sparklines.sparkline_book.get(watchlist)
+            except Exception:
+                pass
+        for portfolio in portfolios:
+            try:
+                performance.portfolio_history(portfolio, fetch(
+                    list(portfolio) + performance.fx_symbols(portfolio), performance.history_period(portfolio), '1d'))
+            except Exception:
+                pass
+        span.stop()
+
+        report = {
+            'market': market.name if market is not None else None,
+            'started': started,
+            'seconds': span.seconds,
+            'symbols': len({symbol for symbols in jobs.values() for symbol in symbols}),
+            'warmed': warmed,
+            'missing': sorted(missing),
+            'upstream_calls': span.counters['upstream_calls'] + span.counters['gateway_calls'],
+            'watchlists': len(watchlists),
+            'portfolios': len(portfolios),
+        }
+        self.reports.append(report)
+        return report
+
+    def run_forever(self, on_report=None):
+        """Préchauffe à chaque fenêtre d'ouverture jusqu'à stop()"""
+        while not self._stop.is_set():
+            market, start, end = next_window()
+            now = datetime.now(pytz.UTC)
+            if now < start:
+                self._stop.wait((start - now).total_seconds())
+                continue
+            report = self.warm(market)
+            if on_report is not None:
+                on_report(report)
+            remaining = (end - datetime.now(pytz.UTC)).total_seconds()
+            self._stop.wait(max(min(REFRESH, remaining), 1))
+
+    def start(self):
+        """Démarre le planificateur dans un thread (une fois)"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self.run_forever, name='warmup', daemon=True)
+                self._thread.start()
+        return self
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def stop(self):
+        self._stop.set()
+
+
+def describe(report):
+    """Résumé d'un rapport sur une ligne"""
+    when = report['started'].strftime('%Y-%m-%d %H:%M:%S UTC')
+    jobs = ', '.join(f"{job} {count}" for job, count in report['warmed'].items())
+    line = (f"{when} · {report['market'] or 'toutes places'} · {report['symbols']} symboles en "
+            f"{report['seconds']:.1f} s, {report['upstream_calls']} appels amont · {jobs}")
+    if report['missing']:
+        line += f" · sans données : {', '.join(report['missing'][:10])}"
+    return line
+
+
+# Planificateur du processus
+warmer = Warmer()
+
+
+def start_from_environment():
+    """Démarre le planificateur dans ce processus si TRACKER_WARMUP est défini"""
+    if os.environ.get('TRACKER_WARMUP', '') in ('', '0'):
+        return None
+    return warmer.start()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Préchauffage des caches avant l'ouverture des marchés")
+    parser.add_argument('--now', action='store_true', help="un préchauffage immédiat, puis sortie")
+    args = parser.parse_args(argv)
+    if args.now:
+        print(describe(warmer.warm()))
+        return
+    market, start, _ = next_window()
+    print(f"🔥 Prochain préchauffage : {market.name}, {start.strftime('%Y-%m-%d %H:%M UTC')}")
+    try:
+        warmer.run_forever(on_report=lambda report: print(describe(report), flush=True))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()